@@ -0,0 +1,261 @@
+# Headless JSON API over the same data loader, statistics and model pipelines as the
+# Streamlit pages. Run with:
+#
+#   python api_server.py --port 8502 --threads 16 --processes 4
+#
+# GET  /health
+# GET  /states                      per-state metrics with 2021/2031 predictions
+# GET  /states/<name>               one state
+# GET  /statistics/summary          describe() table
+# GET  /statistics/correlation      correlation matrix
+# GET  /models                      model metrics for the current dataset version
+# GET  /metrics                     Prometheus text metrics
+# POST /predict                     {"scenarios": [{...}, ...]} or
+#                                   {"grid": {"literacy": [...], "unemployment": [...], "states": [...]}}
+import argparse
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import unquote, urlparse
+
+from utils.data_loader import STATE_COLUMN, data_version, load_dataset
+from utils.instrumentation import count, prometheus_text, span
+from utils.model_registry import get_models, predict
+from utils.scenarios import expand_grid, score_scenarios
+from utils.statistics import get_stats
+
+MAX_BODY_BYTES = 10 * 1024 * 1024
+MAX_CACHED_RESPONSES = 256
+MAX_SCENARIOS = 200_000  # Rows one /predict call may score, after expanding a grid
+IDLE_TIMEOUT_SECONDS = 30  # Keep-alive connections idle this long are closed, freeing their worker thread
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# Small LRU of serialized GET responses keyed by (dataset version, path)
+class JsonResponseCache:
+    def __init__(self, max_items=MAX_CACHED_RESPONSES):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key, factory):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        body = json.dumps(factory(), default=str).encode("utf-8")
+        entry = (body, '"' + hashlib.sha1(body).hexdigest() + '"')
+        with self._lock:
+            self._items[key] = entry
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+        return entry
+
+
+response_cache = JsonResponseCache()
+
+
+def _records(frame):
+    return json.loads(frame.to_json(orient="records"))
+
+
+def _states_frame():
+    df = load_dataset()
+    models = get_models(df, data_version())
+    return df.join(predict(models, df)).astype({STATE_COLUMN: str})
+
+
+def _get_states():
+    return _records(_states_frame())
+
+
+def _get_state(name):
+    states = _states_frame()
+    match = states[states[STATE_COLUMN].str.lower() == name.lower()]
+    if match.empty:
+        raise ApiError(404, f"Unknown state: {name}")
+    return _records(match)[0]
+
+
+def _get_summary():
+    stats = get_stats(load_dataset(), data_version())
+    return json.loads(stats.describe().to_json(orient="index"))
+
+
+def _get_correlation():
+    stats = get_stats(load_dataset(), data_version())
+    return json.loads(stats.corr().to_json(orient="index"))
+
+
+def _get_models():
+    return {"version": data_version(), "metrics": get_models(load_dataset(), data_version())["metrics"]}
+
+
+def _post_predict(payload):
+    import pandas as pd
+
+    df = load_dataset()
+    models = get_models(df, data_version())
+    if "grid" in payload:
+        grid = payload["grid"]
+        states = grid.get("states")
+        regions = len(df) if states is None else int(df[STATE_COLUMN].isin(states).sum())
+        rows = regions * len(grid["literacy"]) * len(grid["unemployment"])
+        if rows > MAX_SCENARIOS:
+            raise ApiError(413, f"Grid expands to {rows:,} scenarios; at most {MAX_SCENARIOS:,} are allowed")
+        scenarios = expand_grid(df, grid["literacy"], grid["unemployment"], states=states)
+    elif "scenarios" in payload:
+        if len(payload["scenarios"]) > MAX_SCENARIOS:
+            raise ApiError(413, f"At most {MAX_SCENARIOS:,} scenarios are allowed per request")
+        scenarios = pd.DataFrame(payload["scenarios"])
+    else:
+        raise ApiError(400, 'Expected a "scenarios" list or a "grid" object')
+    return {"version": data_version(), "results": _records(score_scenarios(models, scenarios))}
+
+
+GET_ROUTES = {
+    "/states": _get_states,
+    "/statistics/summary": _get_summary,
+    "/statistics/correlation": _get_correlation,
+    "/models": _get_models,
+}
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    timeout = IDLE_TIMEOUT_SECONDS
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, etag=None, content_type="application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "public, max-age=60")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        self._send(status, json.dumps({"error": message}).encode("utf-8"))
+
+    def do_GET(self):
+        path = urlparse(self.path).path.rstrip("/") or "/"
+        try:
+            if path == "/health":
+                self._send(200, b'{"status": "ok"}')
+                return
+            if path == "/metrics":
+                self._send(200, prometheus_text().encode("utf-8"), content_type="text/plain; version=0.0.4")
+                return
+            if path in GET_ROUTES:
+                route, factory = path, GET_ROUTES[path]
+            elif path.startswith("/states/"):
+                name = unquote(path[len("/states/"):])
+                route, factory = "/states/<name>", lambda: _get_state(name)
+            else:
+                raise ApiError(404, f"Not found: {path}")
+
+            with span("api.request", route=route):
+                body, etag = response_cache.get_or_create((data_version(), path.lower()), factory)
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self._send(200, body, etag)
+        except ApiError as e:
+            count("api.error", status=str(e.status))
+            self._send_error(e.status, str(e))
+        except Exception as e:
+            count("api.error", status="500")
+            self._send_error(500, f"Internal error: {e}")
+
+    def do_POST(self):
+        path = urlparse(self.path).path.rstrip("/")
+        try:
+            # Until the body has been read, an error response must close the connection:
+            # otherwise the unread body would be parsed as the client's next request
+            keep_alive = not self.close_connection
+            self.close_connection = True
+            if path != "/predict":
+                raise ApiError(404, f"Not found: {path}")
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+            except ValueError:
+                raise ApiError(400, "Invalid Content-Length")
+            if length < 0:
+                raise ApiError(400, "Invalid Content-Length")
+            if length > MAX_BODY_BYTES:
+                raise ApiError(413, "Request body too large")
+            body = self.rfile.read(length)
+            self.close_connection = not keep_alive
+            try:
+                payload = json.loads(body or b"{}")
+            except json.JSONDecodeError:
+                raise ApiError(400, "Request body must be JSON")
+            try:
+                with span("api.request", route="/predict"):
+                    result = _post_predict(payload)
+            except (KeyError, TypeError, ValueError) as e:
+                raise ApiError(400, str(e))
+            self._send(200, json.dumps(result).encode("utf-8"))
+        except ApiError as e:
+            self._send_error(e.status, str(e))
+        except Exception as e:
+            self._send_error(500, f"Internal error: {e}")
+
+
+# HTTP server that hands each connection to a fixed-size thread pool
+class PooledHTTPServer(HTTPServer):
+    def __init__(self, address, handler, threads):
+        super().__init__(address, handler)
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SEDVT JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--threads", type=int, default=16, help="worker threads per process")
+    parser.add_argument("--processes", type=int, default=1, help="pre-forked worker processes (Unix only)")
+    args = parser.parse_args()
+
+    # Warm the shared data, models and statistics before serving
+    df = load_dataset()
+    get_models(df, data_version())
+    get_stats(df, data_version())
+
+    server = PooledHTTPServer((args.host, args.port), ApiHandler, args.threads)
+    print(f"SEDVT API on http://{args.host}:{args.port} ({args.processes} x {args.threads} workers)")
+    for _ in range(args.processes - 1):
+        if os.fork() == 0:
+            break
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
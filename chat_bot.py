@@ -1,11 +1,14 @@
 # **For Deploying on Render**
-import requests
 import streamlit as st
-from streamlit.components.v1 import html
-import os
-from dotenv import load_dotenv
+from utils.chat_client import ChatClient, ChatClientError, get_client
+from utils.conversation import Conversation
+from utils.data_questions import answer_question, context_message
+from utils.instrumentation import count, span
+from utils.llm_scheduler import get_scheduler, scheduled_complete, scheduled_stream, streamlit_session
+from utils.response_cache import get_response_cache
 
-load_dotenv()
+# Number of messages rendered on each rerun before older ones are hidden behind a toggle
+RECENT_MESSAGES_SHOWN = 20
 
 # Initialize the Groq client
 def init_groq_client(api_key, api_url):
@@ -16,45 +19,77 @@ def init_groq_client(api_key, api_url):
 
 # Function to get responses from Groq API
 def get_groq_response(prompt, model="mixtral-8x7b-32768",api_key=None, api_url=None):
-    if not api_key:
-        api_key = os.environ.get("GROQ_API_KEY")
-    if not api_url:
-        api_url = os.environ.get("GROQ_API_URL")
+    answer = answer_question(prompt)
+    if answer is not None:
+        return answer
+    client = ChatClient(api_key, api_url) if api_key or api_url else get_client()
+    session, cancelled = streamlit_session()
+    try:
+        return scheduled_complete([context_message(prompt), {"role": "user", "content": prompt}],
+                                  session=session, cancelled=cancelled, client=client, model=model)
+    except ChatClientError as e:
+        return str(e)
 
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "model": model,
-        "messages": [{
-            "role": "user",
-            "content": prompt
-        }],
-        "temperature": 0.7
-    }
+# Function to stream responses from Groq API token by token. Questions about the dataset
+# are answered directly from it, and standalone questions (no earlier turns) are served
+# from the response cache when possible. LLM calls wait for their turn in the process-wide
+# scheduler; `queue_status` (an st.empty placeholder) shows the queue position meanwhile.
+def stream_groq_response(prompt, model="mixtral-8x7b-32768", conversation=None, queue_status=None):
+    answer = answer_question(prompt)
+    if answer is not None:
+        count("chat.response", source="data")
+        yield answer
+        return
 
-    response = requests.post(
-        api_url,
-        headers=headers,
-        json=data
-    )
+    standalone = conversation is None or len(conversation) == 0
+    cache = get_response_cache()
+    if standalone:
+        cached = cache.lookup(prompt)
+        if cached is not None:
+            count("chat.response", source="cache")
+            yield cached
+            return
 
-    if response.status_code == 200:
-        return response.json()["choices"][0]["message"]["content"]
-    else:
-        return f"Error: {response.status_code}"
+    count("chat.response", source="llm")
+    messages = conversation.context_messages(prompt) if conversation is not None else [{"role": "user", "content": prompt}]
+    messages.insert(0, context_message(prompt))  # Compact dataset facts instead of raw data
+    session, cancelled = streamlit_session()
+    on_wait = None
+    if queue_status is not None:
+        on_wait = lambda position: queue_status.caption(
+            f"⏳ Many people are asking right now: {position} request(s) ahead of yours..." if position
+            else "⏳ You're next...")
+    chunks = []
+    try:
+        for chunk in scheduled_stream(messages, session=session, on_wait=on_wait, cancelled=cancelled, model=model):
+            if not chunks and queue_status is not None:
+                queue_status.empty()
+            chunks.append(chunk)
+            yield chunk
+    except ChatClientError as e:
+        yield str(e)
+        return
+    # A stream cut short (session gone, request cancelled) or an empty reply is never cached
+    response = "".join(chunks)
+    if standalone and response.strip() and (cancelled is None or not cancelled()):
+        cache.store(prompt, response)
 
 # Streamlit app
 st.title("💬 AI Chatbot - Poverty Combat Assistance")
 st.write("Ask me anything about unemployment solutions, addressing poverty, aid programs, or donations!")
 
 # Initialize chat history
-if "messages" not in st.session_state:
-    st.session_state.messages = []
+if "conversation" not in st.session_state:
+    st.session_state.conversation = Conversation()
+conversation = st.session_state.conversation
 
-# Display chat history
-for i, message in enumerate(st.session_state.messages):
+# Display chat history (only the latest messages unless older ones are requested)
+messages = list(conversation.display)
+recent_messages = messages[-RECENT_MESSAGES_SHOWN:]
+older_messages = messages[:-RECENT_MESSAGES_SHOWN] if len(messages) > RECENT_MESSAGES_SHOWN else []
+if older_messages and st.toggle(f"Show {len(older_messages)} earlier messages"):
+    recent_messages = messages
+for message in recent_messages:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
 
@@ -63,14 +98,28 @@ if prompt := st.chat_input("What would you like to discuss?"):
     # Display user message
     with st.chat_message("user"):
         st.markdown(prompt)
-    st.session_state.messages.append({"role": "user", "content": prompt})
 
     # Get response from Groq
     with st.chat_message("assistant"):
         # st.markdown("Think")
-        response = get_groq_response(prompt)
-        st.markdown(response)
-    st.session_state.messages.append({"role": "assistant", "content": response})
+        queue_status = st.empty()
+        with span("chat.turn"):
+            response = st.write_stream(stream_groq_response(prompt, conversation=conversation, queue_status=queue_status))
+    conversation.add("user", prompt)
+    conversation.add("assistant", response)
+
+# Response cache metrics
+with st.sidebar.expander("Response cache"):
+    cache_stats = get_response_cache().stats()
+    st.write(f"Exact hits: {cache_stats['exact_hits']}, similar hits: {cache_stats['similar_hits']}, misses: {cache_stats['misses']}")
+    st.write(f"Hit rate: {cache_stats['hit_rate']:.0%} ({cache_stats['entries']} cached answers)")
+
+# LLM admission control
+with st.sidebar.expander("LLM queue"):
+    scheduler_stats = get_scheduler().stats()
+    st.write(f"In flight: {scheduler_stats['active']}, waiting: {scheduler_stats['queued']}")
+    st.write(f"Admitted: {scheduler_stats['admitted']}, rejected: {scheduler_stats['rejected']}, "
+             f"cancelled: {scheduler_stats['cancelled']}, timed out: {scheduler_stats['timed_out']}")
 
 # Add loading spinner
 with st.spinner("Processing your request..."):
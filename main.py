@@ -1,4 +1,18 @@
+import os
 import streamlit as st
+from utils.instrumentation import ADMIN_TOKEN, begin_run, prometheus_text, run_report, span, start_metrics_server
+from utils.startup import start_warmup, startup_report
+
+# Collect stage timings for this rerun
+begin_run()
+
+# Import heavy modules and build shared data, models and maps in the background
+start_warmup()
+
+# Prometheus endpoint (e.g. SEDVT_METRICS_PORT=9464 serves http://host:9464/metrics); only
+# the first rerun of the process starts it, and a port already in use is logged, not raised
+if os.environ.get("SEDVT_METRICS_PORT"):
+    start_metrics_server(int(os.environ["SEDVT_METRICS_PORT"]))
 
 landing_page = st.Page(
     page="views/home_page.py",
@@ -42,4 +56,39 @@ pg = st.navigation(
 
 # st.sidebar.text("")
 
-pg.run()
\ No newline at end of file
+# Per-module import and warm-up timings, for spotting startup regressions
+if os.environ.get("SEDVT_STARTUP_REPORT") == "1":
+    with st.sidebar.expander("Startup timings"):
+        report = startup_report()
+        st.write("Warm-up finished" if report["done"] else "Warm-up running...")
+        st.dataframe(
+            [{"Step": name, "ms": round(seconds * 1000, 1)} for name, seconds in {**report["imports"], **report["preloads"]}.items()],
+            hide_index=True,
+        )
+
+with span("page.run", page=pg.title):
+    pg.run()
+
+# Per-rerun stage timings and cache hit rates, only for admins (open the app once with ?admin=<SEDVT_ADMIN_TOKEN>)
+if ADMIN_TOKEN and st.query_params.get("admin") == ADMIN_TOKEN:
+    st.session_state.admin = True
+if st.session_state.get("admin"):
+    with st.sidebar.expander("Performance"):
+        report = run_report()
+        st.write(f"This rerun took {report['seconds'] * 1000:.0f} ms")
+        st.dataframe(
+            [
+                {"Stage": name, "Labels": ", ".join(f"{k}={v}" for k, v in labels.items()), "ms": round(seconds * 1000, 1)}
+                for name, labels, seconds in report["timings"]
+            ],
+            hide_index=True,
+        )
+        st.dataframe(
+            [
+                {"Cache": name, "Hits": stats["hits"], "Misses": stats["misses"],
+                 "Hit rate": "-" if stats["hit_rate"] is None else f"{stats['hit_rate']:.0%}"}
+                for name, stats in report["caches"].items()
+            ],
+            hide_index=True,
+        )
+        st.download_button("Download Prometheus metrics", prometheus_text(), file_name="sedvt_metrics.prom", mime="text/plain")
\ No newline at end of file
@@ -0,0 +1,240 @@
+# Performance benchmarks for the page pipelines. Times the core stages against synthetic
+# datasets of increasing size, drives each page headlessly through Streamlit's AppTest
+# and compares time and peak memory with the best recorded run (or a pinned baseline).
+# Passing runs are appended to a JSON history; regressions and failed pages exit non-zero:
+#
+#   python scripts/benchmark.py --scales 32,1000,100000 --threshold 0.25
+#   python scripts/benchmark.py --baseline benchmarks/baseline.json
+#
+# Pages run against SEDVT_DATA_PATH; use --page-data to run them against a generated
+# dataset (see scripts/generate_dataset.py).
+import argparse
+import atexit
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Benchmarks build their artifacts in a throwaway cache so every run measures real work
+if "SEDVT_CACHE_DIR" not in os.environ:
+    os.environ["SEDVT_CACHE_DIR"] = tempfile.mkdtemp(prefix="sedvt-bench-")
+    atexit.register(shutil.rmtree, os.environ["SEDVT_CACHE_DIR"], ignore_errors=True)
+
+import pandas as pd
+
+from utils.data_loader import COORDINATE_COLUMNS, STATE_COLUMN, apply_schema
+from utils.synthetic import write_dataset
+
+HISTORY_PATH = os.path.join(".cache", "benchmark_history.json")
+PAGES = [
+    "views/home_page.py",
+    "views/geographical_data.py",
+    "views/data_preparation.py",
+    "views/data_prediction.py",
+    "views/assistance.py",
+]
+NOISE_FLOOR_SECONDS = 0.005
+NOISE_FLOOR_MB = 1.0
+MAP_MAX_ROWS = 20_000  # Larger maps are not useful as a single HTML page
+
+
+# Function to time a callable, returning the best wall time and the peak traced memory
+def measure(func, repeat):
+    times = []
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return {"seconds": min(times), "peak_mb": peak / 1024 / 1024}
+
+
+# Function to turn the generated region coordinates into point features for the map
+def synthetic_boundaries(raw):
+    lat_column, lon_column = COORDINATE_COLUMNS
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "geometry": {"type": "Point", "coordinates": [lon, lat]}, "properties": {"name": name}}
+            for name, lat, lon in zip(raw[STATE_COLUMN].astype(str), raw[lat_column], raw[lon_column])
+        ],
+    }
+
+
+# Function to build the stage benchmarks for one synthetic dataset
+def stage_benchmarks(csv_path, raw, df):
+    from utils.charts import chart_cache, render_figure
+    from utils.map_engine import MAP_COLUMNS, create_map, map_cache
+    from utils.model_registry import predict, train_models
+    from utils.spatial_index import INDIA_BOUNDS, SpatialIndex
+    from utils.statistics import DatasetStats
+
+    models = train_models(df)
+
+    def render_chart():
+        chart_cache.clear()
+        render_figure("benchmark", "", lambda ax: ax.scatter(df["2011-LIT"], df["2011-Poverty"], s=2))
+
+    def viewport_clusters():
+        lat_column, lon_column = COORDINATE_COLUMNS
+        index = SpatialIndex(raw.index, raw[STATE_COLUMN], raw[lat_column], raw[lon_column])
+        index.visible_points(df["2011-LIT"], INDIA_BOUNDS, 5)
+
+    stages = {
+        "load_data": lambda: apply_schema(pd.read_csv(csv_path, encoding="utf-8-sig")),
+        "map_viewport": viewport_clusters,
+        "model_fit": lambda: train_models(df),
+        "model_predict": lambda: predict(models, df),
+        "correlation": lambda: DatasetStats.from_frame(df).corr(),
+        "chart_render": render_chart,
+    }
+
+    if len(df) <= MAP_MAX_ROWS:
+        boundaries = synthetic_boundaries(raw)
+
+        def build_map():
+            map_cache.clear()
+            create_map(df, MAP_COLUMNS, boundaries=boundaries).get_root().render()
+
+        stages["create_map"] = build_map
+    return stages
+
+
+# Function to run every page once through AppTest in a fresh process and time it,
+# returning the timings and the pages that failed or raised
+def page_benchmarks(timeout, data_path=None):
+    results = {}
+    failures = []
+    for page in PAGES:
+        code = (
+            "import time; from streamlit.testing.v1 import AppTest; "
+            f"at = AppTest.from_file({page!r}, default_timeout={timeout}); "
+            "start = time.perf_counter(); at.run(); "
+            "print(time.perf_counter() - start, len(at.exception))"
+        )
+        env = dict(os.environ, SEDVT_WARMUP="0")
+        if data_path:
+            env["SEDVT_DATA_PATH"] = data_path
+        completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env)
+        if completed.returncode != 0 or not completed.stdout.strip():
+            print(f"  page {page}: failed\n{completed.stderr.strip()[-500:]}")
+            failures.append(f"page:{page}: failed to run")
+            continue
+        seconds, exceptions = completed.stdout.split()[-2:]
+        results[f"page:{page}"] = {"seconds": float(seconds), "peak_mb": None}
+        if int(exceptions):
+            print(f"  page {page}: raised {exceptions} exception(s)")
+            failures.append(f"page:{page}: raised {exceptions} exception(s)")
+    return results, failures
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+# Function to get the best time and peak memory ever recorded for each benchmark
+def best_results(history):
+    best = {}
+    for run in history:
+        for name, result in run["results"].items():
+            entry = best.setdefault(name, {"seconds": result["seconds"], "peak_mb": result["peak_mb"]})
+            entry["seconds"] = min(entry["seconds"], result["seconds"])
+            peaks = [value for value in (entry["peak_mb"], result["peak_mb"]) if value is not None]
+            entry["peak_mb"] = min(peaks) if peaks else None
+    return best
+
+
+# Function to compare a run with the baseline and list the time and memory regressions
+def find_regressions(baseline, current, threshold, memory_threshold):
+    regressions = []
+    for name, result in current.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if result["seconds"] > NOISE_FLOOR_SECONDS and result["seconds"] > before["seconds"] * (1 + threshold):
+            regressions.append(f"{name}: {before['seconds']:.4f}s -> {result['seconds']:.4f}s")
+        if (result["peak_mb"] is not None and before.get("peak_mb") is not None
+                and result["peak_mb"] > NOISE_FLOOR_MB and result["peak_mb"] > before["peak_mb"] * (1 + memory_threshold)):
+            regressions.append(f"{name}: {before['peak_mb']:.1f} MB -> {result['peak_mb']:.1f} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SEDVT performance benchmarks")
+    parser.add_argument("--scales", default="32,1000,100000", help="comma-separated synthetic row counts")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown vs the baseline")
+    parser.add_argument("--memory-threshold", type=float, default=0.25, help="allowed peak memory growth vs the baseline")
+    parser.add_argument("--history", default=HISTORY_PATH)
+    parser.add_argument("--baseline", help="pinned results (JSON) to compare with instead of the best recorded run")
+    parser.add_argument("--pin", action="store_true", help="write this run's results to --baseline if it passes")
+    parser.add_argument("--no-pages", action="store_true", help="skip the headless page runs")
+    parser.add_argument("--page-timeout", type=float, default=120)
+    parser.add_argument("--page-data", help="dataset (.csv or .parquet) the pages run against")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in [int(value) for value in args.scales.split(",")]:
+            csv_path = write_dataset(os.path.join(tmp, f"data-{rows}.csv"), rows)
+            raw = pd.read_csv(csv_path)
+            df = apply_schema(raw)
+            print(f"{rows:,} rows")
+            for stage, func in stage_benchmarks(csv_path, raw, df).items():
+                result = measure(func, args.repeat)
+                results[f"{stage}@{rows}"] = result
+                print(f"  {stage:<14} {result['seconds'] * 1000:10.1f} ms {result['peak_mb']:9.1f} MB")
+
+    failures = []
+    if not args.no_pages:
+        print("pages")
+        page_results, failures = page_benchmarks(args.page_timeout, args.page_data)
+        for name, result in page_results.items():
+            print(f"  {name:<40} {result['seconds'] * 1000:10.1f} ms")
+        results.update(page_results)
+
+    history = []
+    if os.path.exists(args.history):
+        with open(args.history, encoding="utf-8") as f:
+            history = json.load(f)
+    if args.baseline and os.path.exists(args.baseline) and not args.pin:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    else:
+        baseline = best_results(history)
+    regressions = find_regressions(baseline, results, args.threshold, args.memory_threshold)
+
+    if failures or regressions:
+        # Failing runs are not recorded, so they never lower the bar for the next run
+        for title, lines in (("Failed pages:", failures), ("Regressions beyond threshold:", regressions)):
+            if lines:
+                print(title)
+                for line in lines:
+                    print(f"  {line}")
+        sys.exit(1)
+
+    history.append({"timestamp": time.time(), "commit": git_commit(), "results": results})
+    os.makedirs(os.path.dirname(args.history) or ".", exist_ok=True)
+    with open(args.history, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=2)
+    if args.pin and args.baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    print(f"No regressions beyond {args.threshold:.0%} time / {args.memory_threshold:.0%} memory (history: {args.history})")
+
+
+if __name__ == "__main__":
+    main()
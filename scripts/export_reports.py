@@ -0,0 +1,35 @@
+# Export the report bundle (locator map, trend chart, predictions and anomaly flags) of
+# every region into one ZIP, rendering on all CPU cores:
+#
+#   python scripts/export_reports.py --out reports.zip --formats html png pdf
+#   python scripts/export_reports.py --out changes.zip --changed-only
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.reports import FORMATS, WORKERS, ExportJob
+
+
+def print_progress(job):
+    print(f"\r{job.finished:,}/{job.total:,} regions "
+          f"({job.rendered:,} rendered, {job.reused:,} reused, {job.skipped:,} unchanged)", end="", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export per-region SEDVT reports as a ZIP")
+    parser.add_argument("--out", default="sedvt_reports.zip")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=FORMATS)
+    parser.add_argument("--region", action="append", help="only export this region (repeatable)")
+    parser.add_argument("--changed-only", action="store_true", help="leave out regions unchanged since the last export")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="render processes")
+    args = parser.parse_args()
+
+    job = ExportJob(args.out, args.formats, args.region, args.changed_only, args.workers)
+    job.run(progress=print_progress)
+    print(f"\nWrote {args.out} in {job.seconds:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+# Generate a synthetic dataset with the schema of data/data.csv at district, sub-district
+# or village scale, streamed to CSV or Parquet in chunks. Point the app at it with
+# SEDVT_DATA_PATH:
+#
+#   python scripts/generate_dataset.py --level district --out data/synthetic/districts.parquet
+#   SEDVT_DATA_PATH=data/synthetic/districts.parquet streamlit run main.py
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.synthetic import CHUNK_ROWS, LEVELS, write_dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic SEDVT dataset")
+    size = parser.add_mutually_exclusive_group(required=True)
+    size.add_argument("--rows", type=int)
+    size.add_argument("--level", choices=list(LEVELS), help="use the row count of an administrative level")
+    parser.add_argument("--out", required=True, help="output .csv or .parquet file")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rows = args.rows if args.rows is not None else LEVELS[args.level]
+    start = time.perf_counter()
+    write_dataset(args.out, rows, chunk_rows=args.chunk_rows, seed=args.seed)
+    print(f"Wrote {rows:,} rows to {args.out} in {time.perf_counter() - start:.1f}s")
+    print(f"Use it with: SEDVT_DATA_PATH={args.out} streamlit run main.py")
+
+
+if __name__ == "__main__":
+    main()
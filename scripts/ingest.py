@@ -0,0 +1,36 @@
+# Ingest long-format census/survey files (region, indicator, vintage, value[, level, parent])
+# into the partitioned store and refresh the derived artifacts they affect:
+#
+#   python scripts/ingest.py vintage_2021.csv districts_2011.csv
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ingestion import CHUNK_ROWS, ingest_and_refresh
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest long-format data into the SEDVT store")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS, help="rows read per chunk")
+    args = parser.parse_args()
+
+    for path in args.files:
+        try:
+            report = ingest_and_refresh(path, chunksize=args.chunksize)
+        except ValueError as e:
+            print(f"{path}: rejected - {e}")
+            continue
+        if report.skipped:
+            print(f"{path}: skipped (empty or already ingested)")
+        else:
+            print(f"{path}: {report.rows:,} rows, vintages {', '.join(sorted(report.vintages))}, "
+                  f"{len(report.regions):,} regions")
+            for note in report.notes():
+                print(f"  note: {note}")
+
+
+if __name__ == "__main__":
+    main()
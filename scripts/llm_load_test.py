@@ -0,0 +1,64 @@
+# Simulate a spike of chat sessions against an LLM endpoint through the scheduler and report
+# how many users saw an error and how long they waited. With the local mock:
+#
+#   python scripts/mock_llm_server.py --port 8001 --rate-limit 60 --error-rate 0.05
+#   SEDVT_LLM_RATE_PER_MINUTE=60 python scripts/llm_load_test.py --url http://127.0.0.1:8001/v1/chat/completions
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from utils.chat_client import ChatClient, ChatClientError
+from utils.llm_scheduler import get_scheduler, scheduled_stream
+
+
+def run_session(client, session, turns, results, lock):
+    for turn in range(turns):
+        start = time.perf_counter()
+        first = None
+        try:
+            for _ in scheduled_stream([{"role": "user", "content": f"{session} turn {turn}"}], session=session,
+                                      client=client):
+                if first is None:
+                    first = time.perf_counter() - start
+            outcome = "ok"
+        except ChatClientError as e:
+            outcome = str(e)
+        with lock:
+            results.append((session, outcome, first, time.perf_counter() - start))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the LLM scheduler")
+    parser.add_argument("--url", default=os.environ.get("GROQ_API_URL"))
+    parser.add_argument("--sessions", type=int, default=40, help="concurrent chat sessions")
+    parser.add_argument("--turns", type=int, default=1, help="questions per session")
+    args = parser.parse_args()
+
+    client = ChatClient(api_key="mock", api_url=args.url)
+    results, lock = [], threading.Lock()
+    threads = [threading.Thread(target=run_session, args=(client, f"session-{i}", args.turns, results, lock))
+               for i in range(args.sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    errors = [outcome for _, outcome, _, _ in results if outcome != "ok"]
+    first = np.array([f for _, outcome, f, _ in results if outcome == "ok" and f is not None])
+    print(f"{len(results)} requests from {args.sessions} sessions in {time.perf_counter() - start:.1f}s")
+    print(f"errors shown to users: {len(errors)} {sorted(set(errors))}")
+    if len(first):
+        print(f"time to first token: p50 {np.percentile(first, 50):.2f}s, p95 {np.percentile(first, 95):.2f}s, "
+              f"max {first.max():.2f}s")
+    print(f"scheduler: {get_scheduler().stats()}")
+
+
+if __name__ == "__main__":
+    main()
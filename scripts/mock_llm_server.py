@@ -0,0 +1,119 @@
+# Local mock of an OpenAI-compatible chat completions endpoint, for trying the chatbot
+# without a Groq key and for load testing. Point the app at it with:
+#
+#   python scripts/mock_llm_server.py --port 8001 --latency 0.5 --error-rate 0.1
+#   python scripts/mock_llm_server.py --port 8001 --rate-limit 30   # 429 above 30 requests/minute
+#   GROQ_API_URL=http://127.0.0.1:8001/v1/chat/completions streamlit run main.py
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Provider-style quota: a token bucket of `per_minute` requests, refilled continuously
+class RateLimit:
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, per_minute / 60.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.accepted = 0
+        self.limited = 0
+
+    # Function to take a token, or return the seconds until one is available
+    def take(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.accepted += 1
+                return 0.0
+            self.limited += 1
+            return (1 - self.tokens) / self.rate
+
+
+def make_handler(latency, token_delay, error_rate, error_status, rate_limit=None):
+    class MockHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, body, headers=()):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if rate_limit is not None:
+                wait = rate_limit.take()
+                if wait > 0:
+                    self._send_json(429, {"error": {"message": "Rate limit exceeded"}}, [("Retry-After", str(math.ceil(wait)))])
+                    return
+            time.sleep(latency)
+
+            if random.random() < error_rate:
+                self._send_json(error_status, {"error": {"message": "Rate limit exceeded"}}, [("Retry-After", "1")])
+                return
+
+            prompt = request.get("messages", [{}])[-1].get("content", "")
+            reply = f"Mock reply to: {prompt}"
+            model = request.get("model", "mock")
+
+            if not request.get("stream"):
+                self._send_json(200, {
+                    "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+                })
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for word in reply.split(" "):
+                chunk = {"model": model, "choices": [{"index": 0, "delta": {"content": word + " "}}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                time.sleep(token_delay)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            self.close_connection = True
+
+    return MockHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before each response starts")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="seconds between streamed tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with an error")
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument("--rate-limit", type=float, default=None, help="requests per minute before answering 429")
+    args = parser.parse_args()
+
+    rate_limit = RateLimit(args.rate_limit) if args.rate_limit else None
+    handler = make_handler(args.latency, args.token_delay, args.error_rate, args.error_status, rate_limit)
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"Mock LLM endpoint on http://{args.host}:{args.port}/v1/chat/completions")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
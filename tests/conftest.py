@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# Keep artifact caches out of the working tree and skip the background warm-up
+os.environ.setdefault("SEDVT_CACHE_DIR", tempfile.mkdtemp(prefix="sedvt-tests-"))
+os.environ.setdefault("SEDVT_WARMUP", "0")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
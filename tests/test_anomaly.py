@@ -0,0 +1,57 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import anomaly
+from utils.anomaly import detect_anomalies, get_anomalies, indicator_matrix, robust_zscores
+from utils.data_loader import STATE_COLUMN, load_dataset
+
+
+@pytest.fixture
+def outlier_frame():
+    df = load_dataset().astype({STATE_COLUMN: str})
+    df.loc[df.index[5], "2011-LIT"] = df["2011-LIT"].median() + 40 * df["2011-LIT"].std()
+    return df, df.loc[df.index[5], STATE_COLUMN]
+
+
+def test_deltas_join_the_indicators():
+    df = load_dataset()
+    features = indicator_matrix(df)
+    np.testing.assert_allclose(features["Δ LIT"], df["2011-LIT"].astype(np.float64) - df["2001-LIT"])
+
+
+def test_robust_zscores_ignore_constant_columns():
+    z = robust_zscores(pd.DataFrame({"flat": [1.0] * 5, "x": [1.0, 2.0, 3.0, 4.0, 100.0]}))
+    assert (z["flat"] == 0).all()
+    assert z["x"].abs().idxmax() == 4
+
+
+def test_injected_outlier_is_flagged_first(outlier_frame):
+    df, state = outlier_frame
+    result = detect_anomalies(df)
+    top = result.iloc[0]
+    assert top[STATE_COLUMN] == state
+    assert top["Flagged"] and top["Max Robust Z"] > anomaly.Z_THRESHOLD
+    assert top["Most Unusual Indicator"] in ("2011-LIT", "Δ LIT")
+    assert len(result) == len(df) and result["Anomaly Score"].is_monotonic_decreasing
+
+
+def test_anomalies_are_detected_once_per_version(outlier_frame, monkeypatch):
+    df, state = outlier_frame
+    monkeypatch.setattr(anomaly, "_results", OrderedDict())
+    first = get_anomalies(df, "anomaly-test")
+    monkeypatch.setattr(anomaly, "detect_anomalies", lambda df: pytest.fail("detected twice"))
+    assert get_anomalies(df, "anomaly-test") is first
+    assert first.iloc[0][STATE_COLUMN] == state
+
+
+def test_only_recent_versions_stay_in_memory(outlier_frame, monkeypatch):
+    df, _ = outlier_frame
+    monkeypatch.setattr(anomaly, "_results", OrderedDict())
+    for i in range(anomaly.MAX_VERSIONS + 1):
+        get_anomalies(df, f"anomaly-bound-{i}")
+        get_anomalies(df, "anomaly-bound-0")
+    assert len(anomaly._results) == anomaly.MAX_VERSIONS
+    assert "anomaly-bound-0" in anomaly._results and "anomaly-bound-1" not in anomaly._results
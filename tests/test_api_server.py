@@ -0,0 +1,91 @@
+import json
+import socket
+import threading
+import time
+from http.client import HTTPConnection
+
+import pytest
+
+import api_server
+from api_server import ApiHandler, PooledHTTPServer
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(ApiHandler, "timeout", 0.5)
+    server = PooledHTTPServer(("127.0.0.1", 0), ApiHandler, 2)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post_predict(server, payload):
+    connection = HTTPConnection("127.0.0.1", server.server_port, timeout=30)
+    connection.request("POST", "/predict", json.dumps(payload), {"Content-Type": "application/json"})
+    response = connection.getresponse()
+    body = json.loads(response.read())
+    connection.close()
+    return response.status, body
+
+
+def test_small_grid_is_scored(server):
+    status, body = post_predict(server, {"grid": {"literacy": [60, 70], "unemployment": [5], "states": ["Bihar"]}})
+    assert status == 200
+    assert len(body["results"]) == 2
+
+
+def test_oversized_grid_is_rejected_before_expanding(server, monkeypatch):
+    monkeypatch.setattr(api_server, "MAX_SCENARIOS", 100)
+    status, body = post_predict(server, {"grid": {"literacy": list(range(10)), "unemployment": list(range(11))}})
+    assert status == 413
+    assert "at most 100" in body["error"]
+
+
+def test_idle_keep_alive_connections_are_closed(server):
+    connection = socket.create_connection(("127.0.0.1", server.server_port))
+    connection.settimeout(5)
+    start = time.monotonic()
+    assert connection.recv(1) == b""  # The server hangs up without a request
+    assert time.monotonic() - start < 3
+    connection.close()
+
+
+def raw_exchange(server, request):
+    connection = socket.create_connection(("127.0.0.1", server.server_port))
+    connection.settimeout(5)
+    connection.sendall(request)
+    chunks = []
+    while True:
+        chunk = connection.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    connection.close()
+    return b"".join(chunks)
+
+
+@pytest.mark.parametrize("path", ["/predict", "/unknown"])
+def test_error_before_reading_the_body_closes_the_connection(server, monkeypatch, path):
+    monkeypatch.setattr(api_server, "MAX_BODY_BYTES", 10)
+    body = b"GET /health HTTP/1.1\r\nHost: x\r\n\r\n"  # Must not be served as a second request
+    reply = raw_exchange(server, (f"POST {path} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(body)}\r\n\r\n").encode() + body)
+    assert b'"status": "ok"' not in reply
+    assert reply.startswith(b"HTTP/1.1 413" if path == "/predict" else b"HTTP/1.1 404")
+
+
+@pytest.mark.parametrize("length", ["-1", "abc"])
+def test_bad_content_length_is_a_client_error(server, length):
+    reply = raw_exchange(server, f"POST /predict HTTP/1.1\r\nHost: x\r\nContent-Length: {length}\r\n\r\n".encode())
+    assert reply.startswith(b"HTTP/1.1 400")
+    assert b"Invalid Content-Length" in reply
+
+
+def test_keep_alive_survives_a_handled_request(server):
+    connection = HTTPConnection("127.0.0.1", server.server_port, timeout=30)
+    for _ in range(2):
+        connection.request("POST", "/predict", "not json", {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        assert response.status == 400
+        response.read()
+    connection.close()
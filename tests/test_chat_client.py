@@ -0,0 +1,43 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from utils.chat_client import ChatClient
+
+CHUNKS = ["Garibi ", "गरीबी ", "₹1,000 ", "— done"]
+
+
+class SSEHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = "".join(
+            f"data: {json.dumps({'choices': [{'delta': {'content': chunk}}]}, ensure_ascii=False)}\n\n"
+            for chunk in CHUNKS
+        ) + "data: [DONE]\n\n"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")  # No charset, as many providers send it
+        self.send_header("Content-Length", str(len(body.encode("utf-8"))))
+        self.end_headers()
+        self.wfile.write(body.encode("utf-8"))
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def api_url():
+    server = HTTPServer(("127.0.0.1", 0), SSEHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/chat"
+    server.shutdown()
+    server.server_close()
+
+
+def test_stream_decodes_non_ascii_text(api_url):
+    client = ChatClient("key", api_url)
+    try:
+        assert list(client.stream([{"role": "user", "content": "hi"}])) == CHUNKS
+    finally:
+        client.close()
@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+from utils import data_loader
+from utils.data_loader import DATA_PATH, data_version
+
+
+@pytest.fixture
+def shared_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_loader, "SHARED_MEMORY", True)
+    monkeypatch.setattr(data_loader, "SHARED_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_current_version_removes_the_other_versions(shared_dir):
+    older = shared_dir / "data-older.arrow"
+    older.write_bytes(b"old")
+
+    df = data_loader._read_dataset(os.path.abspath(DATA_PATH), data_version())
+
+    assert not older.exists()
+    assert (shared_dir / f"data-{data_version()}.arrow").exists()
+    assert len(df) > 0
+
+
+def test_lagging_version_never_removes_the_current_file(shared_dir):
+    current = shared_dir / f"data-{data_version()}.arrow"
+    data_loader._read_dataset(os.path.abspath(DATA_PATH), data_version())
+
+    # A worker that still sees an older version re-creates that version's file last
+    df = data_loader._read_dataset(os.path.abspath(DATA_PATH), "stale-version")
+
+    assert current.exists()
+    assert (shared_dir / "data-stale-version.arrow").exists()
+    assert len(df) > 0
+
+
+def test_shared_file_removed_before_mapping_is_rewritten(shared_dir, monkeypatch):
+    version = data_version()
+    data_loader._read_dataset(os.path.abspath(DATA_PATH), version)
+    map_shared = data_loader._map_shared
+    calls = []
+
+    def vanish_once(shared_file):
+        calls.append(shared_file)
+        if len(calls) == 1:
+            os.remove(shared_file)  # Another process cleaned it up after our existence check
+        return map_shared(shared_file)
+
+    monkeypatch.setattr(data_loader, "_map_shared", vanish_once)
+    df = data_loader._read_dataset(os.path.abspath(DATA_PATH), version)
+
+    assert len(calls) == 2
+    assert len(df) > 0
@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+from utils.data_questions import DataIndex
+
+
+@pytest.fixture(scope="module")
+def index():
+    return DataIndex(pd.DataFrame({
+        "States_UnionTerritories": ["Bihar", "Goa", "Kerala"],
+        "2000-01-INC": [5000.0, 50000.0, 20000.0],
+        "2011-12-INC": [15000.0, 200000.0, 80000.0],
+        "2001-LIT": [47.0, 82.0, 90.0],
+        "2011-LIT": [61.8, 88.7, 94.0],
+        "2001-POP": [82998.0, 1348.0, 31841.0],
+        "2011-POP": [104099.0, 1459.0, 33406.0],
+        "2001-SEX_RATIO": [919.0, 961.0, 1058.0],
+        "2011-SEX_RATIO": [918.0, 973.0, 1084.0],
+        "2001-UNEMP": [18.0, 60.0, 90.0],
+        "2011-UNEMP": [20.0, 55.0, 70.0],
+        "2001-Poverty": [42.6, 25.1, 15.0],
+        "2011-Poverty": [33.7, 5.1, 7.1],
+    }))
+
+
+@pytest.mark.parametrize("question", [
+    "How do I donate to fight poverty in India?",
+    "How can people in Goa get jobs?",
+    "What unemployment schemes are there in Bihar?",
+    "income support programs in Kerala",
+    "What should Bihar do about poverty?",
+    "poverty in Bihar",
+])
+def test_advice_and_scheme_questions_go_to_the_llm(index, question):
+    assert index.answer(question) is None
+
+
+def test_region_fact(index):
+    assert index.answer("What was Bihar's poverty rate in 2011?") == "Bihar's poverty rate was 33.70% in 2011."
+
+
+def test_ranking(index):
+    answer = index.answer("Which state has the highest literacy rate?")
+    assert answer.splitlines()[-1] == "1. Kerala: 94.00%"
+
+
+def test_aggregate(index):
+    assert index.answer("What is the average literacy rate in India?").startswith("The average literacy rate across all 3")
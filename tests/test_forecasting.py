@@ -0,0 +1,72 @@
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+from utils import forecasting
+from utils.data_loader import STATE_COLUMN, load_dataset
+from utils.forecasting import REFERENCE_YEAR, fit_trends, forecast_trends, get_forecasts, vintage_year
+
+
+@pytest.fixture(autouse=True)
+def no_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(forecasting, "STORE_MANIFEST", str(tmp_path / "manifest.json"))
+
+
+def test_vintage_years():
+    assert vintage_year("2011") == 2011.0
+    assert vintage_year("2011-12") == 2011.5
+    with pytest.raises(ValueError):
+        vintage_year("census")
+
+
+def test_trends_match_polyfit_per_series():
+    rng = np.random.default_rng(0)
+    years = np.array([1991.0, 2001.0, 2011.0, 2011.5])
+    values = rng.normal(50, 10, (100, len(years)))
+    values[rng.random(values.shape) < 0.2] = np.nan
+    coefficients, counts = fit_trends(values, years)
+    for row, (level, slope), n in zip(values, coefficients, counts):
+        observed = ~np.isnan(row)
+        assert n == observed.sum()
+        if len(set(years[observed])) >= 2:
+            expected_slope, expected_level = np.polyfit(years[observed] - REFERENCE_YEAR, row[observed], 1)
+            assert slope == pytest.approx(expected_slope) and level == pytest.approx(expected_level)
+
+
+def test_single_vintage_is_flat_and_empty_is_nan():
+    coefficients, counts = fit_trends([[7.0, np.nan], [np.nan, np.nan]], [2001, 2011])
+    np.testing.assert_array_equal(coefficients[0], [7.0, 0.0])
+    assert np.isnan(coefficients[1]).all()
+    np.testing.assert_array_equal(counts, [1, 0])
+
+
+def test_forecasts_follow_the_dataset_and_clip_percentages():
+    df = load_dataset()
+    result = forecast_trends(df)
+    state = str(df[STATE_COLUMN].iloc[0])
+    row = result[(result["region"] == state) & (result["indicator"] == "LIT")].iloc[0]
+    old, new = float(df["2001-LIT"].iloc[0]), float(df["2011-LIT"].iloc[0])
+    assert row["vintages"] == 2
+    assert row["slope_per_year"] == pytest.approx((new - old) / 10, rel=1e-5)
+    assert row["forecast_2021"] == pytest.approx(min(new + (new - old), 100), rel=1e-5)
+    assert result.filter(like="forecast_").min().min() >= 0
+    assert (result.loc[result["indicator"].isin(["LIT", "Poverty"]), "forecast_2031"] <= 100).all()
+
+
+def test_forecasts_are_fitted_once_per_version(monkeypatch):
+    monkeypatch.setattr(forecasting, "_results", OrderedDict())
+    df = load_dataset()
+    first = get_forecasts(df, "forecast-test")
+    monkeypatch.setattr(forecasting, "forecast_trends", lambda df: pytest.fail("fitted twice"))
+    assert get_forecasts(df, "forecast-test") is first
+
+
+def test_only_recent_versions_stay_in_memory(monkeypatch):
+    df = load_dataset()
+    monkeypatch.setattr(forecasting, "_results", OrderedDict())
+    for i in range(forecasting.MAX_VERSIONS + 1):
+        get_forecasts(df, f"forecasting-bound-{i}")
+        get_forecasts(df, "forecasting-bound-0")
+    assert len(forecasting._results) == forecasting.MAX_VERSIONS
+    assert "forecasting-bound-0" in forecasting._results and "forecasting-bound-1" not in forecasting._results
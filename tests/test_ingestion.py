@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from utils import data_loader, forecasting, ingestion
+from utils.data_loader import STATE_COLUMN, load_dataset
+from utils.ingestion import ingest_and_refresh, load_store
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store_dir = str(tmp_path / "store")
+    manifest = os.path.join(store_dir, "manifest.json")
+    for module in (data_loader, ingestion):
+        monkeypatch.setattr(module, "STORE_DIR", store_dir)
+    for module in (data_loader, ingestion, forecasting):
+        monkeypatch.setattr(module, "STORE_MANIFEST", manifest)
+    return tmp_path
+
+
+def write_csv(path, rows):
+    path.write_text("region,indicator,vintage,value\n" + "".join(f"{row}\n" for row in rows))
+    return str(path)
+
+
+def test_decimal_values_after_an_integer_file(store):
+    ingest_and_refresh(write_csv(store / "whole.csv", ["Bihar,Poverty,2011,30", "Goa,Poverty,2021,5"]))
+    ingest_and_refresh(write_csv(store / "decimal.csv", ["Bihar,Poverty,2011,35.5"]))
+
+    stored = load_store()
+    assert str(stored["value"].dtype) == "float64"
+    assert sorted(stored["value"]) == [5.0, 30.0, 35.5]
+
+    df = load_dataset()
+    assert df.loc[df[STATE_COLUMN] == "Bihar", "2011-Poverty"].item() == pytest.approx(35.5)
+    forecasting.build_panel(df)  # Reads the stored vintages too
+
+
+def test_district_rows_and_new_vintages_stay_out_of_the_dataset(store):
+    before = load_dataset()
+    path = store / "districts.csv"
+    path.write_text("region,indicator,vintage,value,level,parent\n"
+                    "Patna,Poverty,2011,20,district,Bihar\n"
+                    "Bihar,Poverty,2021,25,state,\n")
+    report = ingest_and_refresh(str(path))
+
+    df = load_dataset()
+    assert len(df) == len(before)
+    assert "Patna" not in set(df[STATE_COLUMN].astype(str))
+    assert report.columns == set()
+    notes = " ".join(report.notes())
+    assert "2021" in notes and "1 district-level rows" in notes
+
+
+def test_incremental_refresh_matches_a_full_rebuild(store, monkeypatch):
+    ingest_and_refresh(write_csv(store / "first.csv", ["Bihar,LIT,2011,70.5", "Goa,Poverty,2001,20"]))
+    new_region = [f"Atlantis,{column.rsplit('-', 1)[1]},{column.rsplit('-', 1)[0]},{i + 1}"
+                  for i, column in enumerate(data_loader.SCHEMA)]
+    ingest_and_refresh(write_csv(store / "second.csv", ["Kerala,UNEMP,2011,12"] + new_region[:6]))
+    with monkeypatch.context() as patched:
+        patched.setattr(data_loader, "_read_source", lambda *args, **kwargs: pytest.fail("CSV reread"))
+        ingest_and_refresh(write_csv(store / "third.csv", new_region[6:]))  # Completes the new region
+
+    with monkeypatch.context() as patched:
+        patched.setattr(ingestion, "load_store", lambda *args, **kwargs: pytest.fail("store rescanned"))
+        incremental = load_dataset()  # Primed by the last ingest
+
+    full = data_loader._parse_dataset(os.path.abspath(data_loader.DATA_PATH), "full-rebuild")
+    assert "Atlantis" in set(incremental[STATE_COLUMN].astype(str))
+    assert incremental.astype({STATE_COLUMN: str}).equals(full.astype({STATE_COLUMN: str}))
@@ -0,0 +1,15 @@
+import socket
+
+from utils import instrumentation
+
+
+def test_metrics_server_port_in_use_is_logged_once(monkeypatch, caplog):
+    monkeypatch.setattr(instrumentation, "_server", None)
+    monkeypatch.setattr(instrumentation, "_server_started", False)
+    with socket.socket() as taken:
+        taken.bind(("127.0.0.1", 0))
+        taken.listen()
+        port = taken.getsockname()[1]
+        assert instrumentation.start_metrics_server(port, "127.0.0.1") is None
+        assert instrumentation.start_metrics_server(port, "127.0.0.1") is None
+    assert len([r for r in caplog.records if "Metrics server not started" in r.message]) == 1
@@ -0,0 +1,143 @@
+import threading
+import time
+
+import pytest
+
+from utils import llm_scheduler
+from utils.chat_client import ChatClientError
+from utils.llm_scheduler import (
+    BACKGROUND,
+    AdmissionError,
+    LLMScheduler,
+    RequestCancelled,
+    scheduled_complete,
+    scheduled_stream,
+)
+
+
+def scheduler(**kwargs):
+    return LLMScheduler(**{"concurrency": 1, "rate_per_minute": 60_000, "burst": 100, "queue_timeout": 10, **kwargs})
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+# Function to start a request in the background that records when it is admitted
+def enqueue(s, session, admitted, priority=llm_scheduler.INTERACTIVE, positions=None):
+    queued = s.stats()["queued"]
+    on_wait = positions.append if positions is not None else None
+    thread = threading.Thread(target=lambda: (s.acquire(session, priority, on_wait), admitted.append(session)),
+                              daemon=True)
+    thread.start()
+    wait_for(lambda: s.stats()["queued"] == queued + 1)
+    return thread
+
+
+def test_concurrency_limit():
+    s = scheduler(concurrency=2)
+    s.acquire("a")
+    s.acquire("b")
+    admitted = []
+    enqueue(s, "c", admitted)
+    time.sleep(0.3)
+    assert admitted == [] and s.stats()["active"] == 2
+    s.release()
+    wait_for(lambda: admitted == ["c"])
+    assert s.stats()["active"] == 2
+
+
+def test_sessions_are_served_round_robin_by_priority():
+    s = scheduler()
+    s.acquire("holder")
+    admitted, positions = [], {}
+    for session, priority in [("a", 0), ("a", 0), ("c", BACKGROUND), ("b", 0)]:
+        positions[len(positions)] = []
+        enqueue(s, session, admitted, priority, positions[len(positions) - 1])
+    # Positions are reported as they change, so the latest one of each request is its current place
+    wait_for(lambda: [queue[-1] if queue else None for queue in positions.values()] == [0, 2, 3, 1])
+
+    for expected in (["a"], ["a", "b"], ["a", "b", "a"], ["a", "b", "a", "c"]):
+        s.release()
+        wait_for(lambda: admitted == expected)
+
+
+def test_one_session_cannot_queue_more_than_its_share():
+    s = scheduler(max_queued_per_session=1)
+    s.acquire("holder")
+    enqueue(s, "a", [])
+    with pytest.raises(AdmissionError):
+        s.acquire("a")
+    assert s.stats()["rejected"] == 1
+    enqueue(s, "b", [])
+
+
+def test_cancelled_and_timed_out_requests_leave_the_queue():
+    s = scheduler(queue_timeout=0.3)
+    s.acquire("holder")
+    with pytest.raises(RequestCancelled):
+        s.acquire("a", cancelled=lambda: True)
+    with pytest.raises(AdmissionError):
+        s.acquire("a")
+    assert s.stats() == {"active": 1, "queued": 0, "admitted": 1, "rejected": 0, "cancelled": 1, "timed_out": 1}
+
+
+class FakeClient:
+    def __init__(self, failures, status_code=429):
+        self.failures = failures
+        self.status_code = status_code
+        self.calls = 0
+
+    def complete(self, messages, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ChatClientError("Too many requests", status_code=self.status_code, retry_after=0)
+        return "answer"
+
+    def stream(self, messages, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ChatClientError("Too many requests", status_code=self.status_code, retry_after=0)
+        yield from ["an", "swer"]
+
+
+@pytest.fixture
+def fresh_scheduler(monkeypatch):
+    s = scheduler(concurrency=2)
+    monkeypatch.setattr(llm_scheduler, "_scheduler", s)
+    return s
+
+
+def test_rate_limited_requests_are_retried(fresh_scheduler):
+    client = FakeClient(failures=2)
+    assert scheduled_complete([], client=client) == "answer"
+    assert client.calls == 3
+
+    client = FakeClient(failures=1)
+    assert "".join(scheduled_stream([], client=client)) == "answer"
+    assert client.calls == 2
+    assert fresh_scheduler.stats()["active"] == 0 and fresh_scheduler.stats()["admitted"] == 5
+
+
+def test_other_errors_and_exhausted_retries_are_raised(fresh_scheduler):
+    client = FakeClient(failures=1, status_code=500)
+    with pytest.raises(ChatClientError):
+        scheduled_complete([], client=client)
+    assert client.calls == 1
+
+    client = FakeClient(failures=llm_scheduler.RATE_LIMIT_RETRIES + 1)
+    with pytest.raises(ChatClientError):
+        scheduled_complete([], client=client)
+    assert client.calls == llm_scheduler.RATE_LIMIT_RETRIES + 1
+    assert fresh_scheduler.stats()["active"] == 0
+
+
+def test_cancelled_stream_frees_its_slot(fresh_scheduler):
+    chunks = []
+    for chunk in scheduled_stream([], client=FakeClient(failures=0), cancelled=lambda: bool(chunks)):
+        chunks.append(chunk)
+    assert chunks == ["an"]
+    assert fresh_scheduler.stats()["active"] == 0
@@ -0,0 +1,38 @@
+from collections import OrderedDict
+
+from utils import map_engine, spatial_index
+from utils.data_loader import data_version, load_dataset
+from utils.map_engine import viewport_layer
+from utils.spatial_index import INDIA_BOUNDS, MAX_INDEXES, get_spatial_index, snap_bounds
+
+
+def test_snap_bounds_widens_to_grid_cells():
+    assert snap_bounds((10.1, 70.3, 20.6, 80.0)) == (10.0, 70.25, 20.75, 80.0)
+
+
+def test_nearby_viewports_share_a_cached_layer(monkeypatch):
+    df, version = load_dataset(), data_version()
+    calls = []
+    build = map_engine.viewport_features
+    monkeypatch.setattr(map_engine, "viewport_features", lambda *args: calls.append(args) or build(*args))
+    map_engine._viewports.clear()
+
+    south, west, north, east = INDIA_BOUNDS
+    first, shown = viewport_layer(df, version, "2011-LIT", (south + 0.01, west, north, east), 5)
+    second, _ = viewport_layer(df, version, "2011-LIT", (south + 0.02, west, north - 0.01, east), 5)
+    viewport_layer(df, version, "2011-LIT", INDIA_BOUNDS, 6)
+
+    assert len(calls) == 2  # The small pan is served from the cache, the new zoom is not
+    assert shown["regions"] == len(df)
+    assert first is not second  # Folium elements are never shared between reruns
+
+
+def test_only_recent_spatial_indexes_stay_in_memory(monkeypatch):
+    monkeypatch.setattr(spatial_index, "_indexes", OrderedDict())
+    df = load_dataset()
+    current = get_spatial_index(df, "v0")
+    for i in range(1, MAX_INDEXES + 1):
+        get_spatial_index(df, f"v{i}")
+        assert get_spatial_index(df, "v0") is current
+    assert len(spatial_index._indexes) == MAX_INDEXES
+    assert ("v1", False) not in spatial_index._indexes
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from utils import model_selection
+from utils.data_loader import load_dataset
+from utils.model_selection import TASKS, SelectionJob, get_job, start_selection, task_data, task_features
+
+
+@pytest.mark.parametrize("target_column", TASKS.values())
+def test_target_is_never_a_feature(target_column):
+    df = load_dataset()
+    derived = df.assign(**{f"Predicted {target_column}": df[target_column]})
+    features = task_features(derived, target_column)
+    assert features
+    assert not [column for column in features if target_column in column]
+    X, y = task_data(derived, target_column)
+    assert X.shape == (len(df), len(features))
+    assert not any(np.array_equal(X[:, i], y) for i in range(X.shape[1]))
+
+
+def test_selection_runs_on_spawned_workers(monkeypatch):
+    names = ["Linear", "Ridge (alpha=1)"]
+    monkeypatch.setattr(model_selection, "CANDIDATES", {name: model_selection.CANDIDATES[name] for name in names})
+    X, y = task_data(load_dataset(), "2011-12-INC")
+    job = SelectionJob("test", "2011-12-INC", ["features"])
+    job.run(X, y)
+    assert job.error is None
+    assert sorted(job.leaderboard()["Model"]) == sorted(names)
+
+
+def test_finished_jobs_are_dropped_oldest_first(monkeypatch):
+    monkeypatch.setattr(model_selection, "_jobs", {})
+    monkeypatch.setattr(SelectionJob, "run", lambda self, X, y: None)
+    df = load_dataset()
+    running = start_selection(df, "v0", "2011-12-INC")
+    for i in range(1, model_selection.MAX_JOBS + 2):
+        start_selection(df, f"v{i}", "2011-12-INC").done = True
+    assert len(model_selection._jobs) == model_selection.MAX_JOBS
+    assert get_job("v0", "2011-12-INC") is running
+    assert get_job("v1", "2011-12-INC") is None and get_job("v2", "2011-12-INC") is None
+    assert get_job(f"v{model_selection.MAX_JOBS + 1}", "2011-12-INC") is not None
@@ -0,0 +1,89 @@
+import json
+import os
+import zipfile
+
+from utils import reports
+from utils.reports import ExportJob, ReportInputs, get_export, payload_digest, start_export
+
+
+def test_exports_are_keyed_by_what_they_export(monkeypatch):
+    monkeypatch.setattr(reports, "_run_quietly", lambda job: None)
+    monkeypatch.setattr(reports, "_jobs", {})
+
+    everything = start_export(["html"])
+    bihar = start_export(["html"], ["Bihar"])
+    assert start_export(["html"]) == everything
+    assert get_export(everything) is not get_export(bihar)
+    assert get_export(everything).path != get_export(bihar).path
+
+    first, second = start_export(["html"], changed_only=True), start_export(["html"], changed_only=True)
+    assert get_export(first) is not get_export(second)
+    assert get_export(first).path != get_export(second).path
+    assert get_export(None) is None
+
+
+def test_payload_digest_tracks_what_is_rendered():
+    payload = {"name": "Bihar", "values": {"2011-LIT": 61.8}}
+    digest = payload_digest(payload, ["html", "pdf"], "background")
+    assert payload_digest(dict(payload), ["pdf", "html"], "background") == digest
+    assert payload_digest(payload, ["html"], "background") != digest
+    assert payload_digest(payload, ["html", "pdf"], "other background") != digest
+    assert payload_digest({**payload, "values": {"2011-LIT": 61.9}}, ["html", "pdf"], "background") != digest
+
+
+def test_changed_only_skips_unchanged_regions(tmp_path, monkeypatch):
+    monkeypatch.setattr(reports, "REPORT_DIR", str(tmp_path))
+    monkeypatch.setattr(reports, "BUNDLE_DIR", str(tmp_path / "bundles"))
+    monkeypatch.setattr(reports, "LAST_EXPORT", str(tmp_path / "last_export.json"))
+    regions = ["Bihar", "Kerala"]
+
+    def export(name, changed_only=False):
+        job = ExportJob(str(tmp_path / f"{name}.zip"), ["html"], regions, changed_only, workers=1).run()
+        with zipfile.ZipFile(job.path) as archive:
+            names = archive.namelist()
+            manifest = json.loads(archive.read("manifest.json"))
+        return job, names, manifest
+
+    job, names, manifest = export("first")
+    assert (job.rendered, job.reused, job.skipped) == (2, 0, 0)
+    assert {"regions/bihar/report.html", "regions/kerala/report.html"} <= set(names)
+    assert sorted(manifest["regions"]) == regions
+
+    job, names, manifest = export("unchanged", changed_only=True)
+    assert (job.total, job.rendered, job.reused, job.skipped) == (2, 0, 0, 2)
+    assert not [name for name in names if name.startswith("regions/")] and manifest["regions"] == {}
+
+    job, _, _ = export("again")
+    assert (job.rendered, job.reused, job.skipped) == (0, 2, 0)
+
+    payload = ReportInputs.payload
+
+    def changed_payload(self, i):
+        result = payload(self, i)
+        if result["name"] == "Kerala":
+            result["values"]["2011-LIT"] += 1
+        return result
+
+    monkeypatch.setattr(ReportInputs, "payload", changed_payload)
+    job, names, manifest = export("changed", changed_only=True)
+    assert (job.rendered, job.reused, job.skipped) == (1, 0, 1)
+    assert list(manifest["regions"]) == ["Kerala"]
+    assert "regions/kerala/report.html" in names and "regions/bihar/report.html" not in names
+
+
+def test_finished_exports_are_dropped_with_their_zips(tmp_path, monkeypatch):
+    monkeypatch.setattr(reports, "REPORT_DIR", str(tmp_path))
+    monkeypatch.setattr(reports, "_run_quietly", lambda job: None)
+    monkeypatch.setattr(reports, "_jobs", {})
+
+    running = start_export(["html"])
+    keys = []
+    for _ in range(reports.MAX_JOBS + 1):
+        keys.append(start_export(["html"], changed_only=True))
+        job = get_export(keys[-1])
+        open(job.path, "wb").close()
+        job.done = True
+    assert len(reports._jobs) == reports.MAX_JOBS
+    assert get_export(running) is not None
+    assert get_export(keys[0]) is None and get_export(keys[1]) is None
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(get_export(key).path) for key in keys[2:])
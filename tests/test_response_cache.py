@@ -0,0 +1,47 @@
+from utils.data_questions import normalize
+from utils.response_cache import ResponseCache
+
+STATES = ("bihar", "kerala", "goa")
+
+
+def entities(prompt):
+    return ",".join(state for state in STATES if state in normalize(prompt).split())
+
+
+def make_cache(tmp_path, **kwargs):
+    return ResponseCache(str(tmp_path / "responses.sqlite3"), threshold=0.7, entities=entities, **kwargs)
+
+
+def test_exact_and_similar_hits(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.store("How can we reduce poverty in Bihar?", "answer")
+    assert cache.lookup("how can we reduce poverty in bihar") == "answer"
+    assert cache.lookup("How can we reduce the poverty in Bihar??") == "answer"
+    assert cache.stats()["exact_hits"] == 1 and cache.stats()["similar_hits"] == 1
+
+
+def test_different_states_never_share_an_answer(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.store("How can we reduce poverty in Bihar?", "bihar answer")
+    assert cache.lookup("How can we reduce poverty in Kerala?") is None
+    assert cache.lookup("How can we reduce poverty?") is None
+
+
+def test_store_updates_the_index_without_refitting(tmp_path):
+    cache = make_cache(tmp_path)
+    for i in range(8):
+        cache.store(f"Question number {i} about literacy in Goa", f"answer {i}")
+    assert cache.lookup("unrelated question about Goa") is None  # Fits the index
+    index = cache._index
+    cache.store("Which programs help unemployed people in Kerala?", "kerala answer")
+    assert cache.lookup("Which programs help the unemployed people in Kerala?") == "kerala answer"
+    assert cache._index is index
+
+
+def test_evicted_entries_are_not_served(tmp_path):
+    cache = make_cache(tmp_path, max_entries=1)
+    cache.store("How can we reduce poverty in Bihar?", "old")
+    assert cache.lookup("unrelated question") is None  # Fits the index
+    cache.store("Tell me about literacy in Goa", "new")
+    assert cache.lookup("How can we reduce the poverty in Bihar??") is None
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,16 @@
+from utils import data_loader, startup
+
+
+def test_warmup_stops_quietly_without_a_dataset(monkeypatch, caplog):
+    def missing(*args, **kwargs):
+        raise FileNotFoundError("data/data.csv")
+
+    monkeypatch.setattr(startup, "WARMUP_MODULES", [])
+    monkeypatch.setattr(data_loader, "load_dataset", missing)
+    monkeypatch.setattr(data_loader, "data_version", missing)
+
+    startup._warmup()  # Must not raise in the warm-up thread
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert "Warm-up step dataset failed" in messages
+    assert "Warm-up stopped: the dataset could not be loaded" in messages
@@ -0,0 +1,64 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import statistics
+from utils.statistics import HIST_BINS, MAX_VERSIONS, DatasetStats, append_stats, get_stats
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "State": [f"S{i}" for i in range(200)],
+        "a": rng.normal(10, 2, 200),
+        "b": rng.integers(0, 100, 200),
+    })
+
+
+@pytest.fixture(autouse=True)
+def empty_stats(monkeypatch):
+    monkeypatch.setattr(statistics, "_stats", OrderedDict())
+
+
+def test_statistics_match_pandas(frame):
+    stats = DatasetStats.from_frame(frame)
+    numeric = frame[["a", "b"]].astype(np.float64)
+    pd.testing.assert_frame_equal(stats.describe(), numeric.describe())
+    pd.testing.assert_frame_equal(stats.corr(), numeric.corr())
+    edges, counts = stats.histogram("a")
+    assert counts.sum() == len(frame) and len(edges) == HIST_BINS + 1
+
+
+@pytest.mark.parametrize("scale", [1.0, 10.0])
+def test_appended_rows_match_a_full_recompute(frame, scale):
+    old, new = frame.iloc[:150], frame.iloc[150:].assign(a=lambda d: d["a"] * scale)
+    appended = DatasetStats.from_frame(old).append(new)
+    full = DatasetStats.from_frame(pd.concat([old, new]))
+    pd.testing.assert_frame_equal(appended.describe(), full.describe())
+    pd.testing.assert_frame_equal(appended.corr(), full.corr())
+    assert appended.histogram("a")[1].sum() == len(frame)
+    if scale > 1:  # New rows outside the old range rebin from scratch
+        np.testing.assert_allclose(appended.histogram("a")[0], full.histogram("a")[0])
+        np.testing.assert_array_equal(appended.histogram("a")[1], full.histogram("a")[1])
+
+
+def test_stats_are_built_once_per_version(frame, monkeypatch):
+    stats = get_stats(frame, "v1")
+    monkeypatch.setattr(DatasetStats, "from_frame", classmethod(lambda cls, df: pytest.fail("rebuilt")))
+    assert get_stats(frame.iloc[:10], "v1") is stats
+
+    appended = append_stats("v1", frame.iloc[:10], "v2")
+    assert get_stats(frame, "v2") is appended
+    assert appended.n == len(frame) + 10
+
+
+def test_only_recent_versions_stay_in_memory(frame):
+    get_stats(frame, "v0")
+    for i in range(1, MAX_VERSIONS + 2):
+        get_stats(frame, "v0")
+        append_stats("v0", frame.iloc[:i], f"v{i}")
+    assert len(statistics._stats) == MAX_VERSIONS
+    assert "v0" in statistics._stats and "v1" not in statistics._stats
@@ -0,0 +1,131 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.artifact_cache import ArtifactCache
+from utils.data_loader import STATE_COLUMN
+from utils.instrumentation import span
+
+# Paired indicators whose 2001 -> 2011 change is also checked
+DELTA_PAIRS = {
+    "Δ INC": ("2000-01-INC", "2011-12-INC"),
+    "Δ LIT": ("2001-LIT", "2011-LIT"),
+    "Δ POP": ("2001-POP", "2011-POP"),
+    "Δ SEX_RATIO": ("2001-SEX_RATIO", "2011-SEX_RATIO"),
+    "Δ UNEMP": ("2001-UNEMP", "2011-UNEMP"),
+    "Δ Poverty": ("2001-Poverty", "2011-Poverty"),
+}
+
+Z_THRESHOLD = float(os.environ.get("SEDVT_ANOMALY_Z", "3.5"))
+CONTAMINATION = float(os.environ.get("SEDVT_ANOMALY_CONTAMINATION", "0.1"))
+CHUNK_ROWS = 100_000
+LOF_SAMPLE_ROWS = 20_000
+MAX_VERSIONS = 4  # Dataset versions whose rankings stay in memory (older ones reload from disk)
+
+anomaly_cache = ArtifactCache("anomalies", max_items=8)
+_results = OrderedDict()
+_lock = threading.Lock()
+
+
+# Function to build the indicator matrix: every numeric column plus the 2001 -> 2011 deltas
+def indicator_matrix(df):
+    numeric = df.select_dtypes(include=[np.number]).astype(np.float64)
+    deltas = pd.DataFrame(
+        {name: numeric[new] - numeric[old] for name, (old, new) in DELTA_PAIRS.items() if old in numeric and new in numeric},
+        index=df.index,
+    )
+    return pd.concat([numeric, deltas], axis=1)
+
+
+# Function to get robust z-scores (median / MAD) for every cell, vectorized over columns
+def robust_zscores(features):
+    values = features.to_numpy(dtype=np.float64)
+    median = np.median(values, axis=0)
+    mad = np.median(np.abs(values - median), axis=0) * 1.4826
+    mad[mad == 0] = np.nan
+    return pd.DataFrame((values - median) / mad, index=features.index, columns=features.columns).fillna(0.0)
+
+
+def _chunks(n_rows, size=CHUNK_ROWS):
+    return [slice(start, min(start + size, n_rows)) for start in range(0, n_rows, size)]
+
+
+# Function to score rows with Isolation Forest and Local Outlier Factor. Both models are
+# fitted on (a sample of) the scaled data and then score the rows chunk by chunk on all cores.
+def model_scores(scaled, random_state=42):
+    from joblib import Parallel, delayed
+    from sklearn.ensemble import IsolationForest
+    from sklearn.neighbors import LocalOutlierFactor
+
+    n_rows = len(scaled)
+    rng = np.random.default_rng(random_state)
+
+    forest = IsolationForest(contamination=CONTAMINATION, random_state=random_state, n_jobs=-1)
+    forest.fit(scaled)
+
+    sample = scaled if n_rows <= LOF_SAMPLE_ROWS else scaled[rng.choice(n_rows, LOF_SAMPLE_ROWS, replace=False)]
+    lof = LocalOutlierFactor(n_neighbors=max(1, min(20, len(sample) - 1)), novelty=True)
+    lof.fit(sample)
+
+    chunks = _chunks(n_rows)
+    parallel = Parallel(n_jobs=-1 if len(chunks) > 1 else 1)
+    forest_scores = np.concatenate(parallel(delayed(forest.score_samples)(scaled[c]) for c in chunks))
+    lof_scores = np.concatenate(parallel(delayed(lof.score_samples)(scaled[c]) for c in chunks))
+    # score_samples is higher for normal rows; flip so that higher means more anomalous
+    return -forest_scores, -lof_scores
+
+
+def _percentile_rank(values):
+    return pd.Series(values).rank(pct=True).to_numpy()
+
+
+# Function to rank every record by how anomalous it is across all indicators
+def detect_anomalies(df):
+    features = indicator_matrix(df)
+    z = robust_zscores(features)
+    abs_z = z.abs().to_numpy()
+    top = abs_z.argmax(axis=1)
+    max_z = abs_z[np.arange(len(abs_z)), top]
+
+    median = features.median().to_numpy()
+    iqr = (features.quantile(0.75) - features.quantile(0.25)).replace(0, 1.0).to_numpy()
+    scaled = np.nan_to_num((features.to_numpy() - median) / iqr)
+    forest_scores, lof_scores = model_scores(scaled)
+
+    combined = (_percentile_rank(max_z) + _percentile_rank(forest_scores) + _percentile_rank(lof_scores)) / 3
+    threshold = np.quantile(combined, 1 - CONTAMINATION)
+    result = pd.DataFrame({
+        STATE_COLUMN: df[STATE_COLUMN].astype(str).to_numpy(),
+        "Anomaly Score": combined,
+        "Max Robust Z": max_z,
+        "Most Unusual Indicator": features.columns.to_numpy()[top],
+        "Isolation Forest": forest_scores,
+        "Local Outlier Factor": lof_scores,
+        "Flagged": (max_z > Z_THRESHOLD) | (combined >= threshold),
+    })
+    return result.sort_values("Anomaly Score", ascending=False).reset_index(drop=True)
+
+
+# Function to get the anomaly ranking for a dataset version, computing it at most once
+def get_anomalies(df, version):
+    with _lock:
+        if version in _results:
+            _results.move_to_end(version)
+            return _results[version]
+
+        def build():
+            buf = io.BytesIO()
+            with span("anomaly.detect"):
+                detect_anomalies(df).to_parquet(buf, index=False)
+            return buf.getvalue()
+
+        key = ("anomalies", version, Z_THRESHOLD, CONTAMINATION)
+        result = pd.read_parquet(io.BytesIO(anomaly_cache.get_or_create(key, build)))
+        _results[version] = result
+        while len(_results) > MAX_VERSIONS:
+            _results.popitem(last=False)
+        return result
@@ -0,0 +1,41 @@
+import pandas as pd
+
+# Sample data for the Assistance page, built once per process instead of on every rerun
+STATES = ["Andhra Pradesh", "Maharashtra", "Uttar Pradesh", "Karnataka", "Tamil Nadu", "Rajasthan", "Gujarat", "Odisha", "West Bengal", "Kerala"]
+
+LOCATIONS = {
+    "Andhra Pradesh": [(15.9129, 79.7400)],
+    "Maharashtra": [(19.7515, 75.7139)],
+    "Uttar Pradesh": [(26.8467, 80.9462)],
+    "Karnataka": [(15.3173, 75.7139)],
+    "Tamil Nadu": [(11.1271, 78.6569)],
+    "Rajasthan": [(27.0238, 74.2179)],
+    "Gujarat": [(22.2587, 71.1924)],
+    "Odisha": [(20.9517, 85.0985)],
+    "West Bengal": [(22.9868, 87.8550)],
+    "Kerala": [(10.8505, 76.2711)]
+}
+
+RESOURCE_DATA = pd.DataFrame({
+    'State': STATES,
+    'Population Density': [303, 365, 828, 319, 555, 200, 308, 269, 1029, 859],
+    'Literacy Rate': [67, 82, 67, 75, 80, 66, 78, 73, 77, 94],
+    'Average Income': [140000, 180000, 57000, 150000, 160000, 82000, 150000, 73000, 88000, 135000],
+    'Urbanization Rate': [35, 45, 28, 40, 48, 24, 42, 29, 31, 47],
+    'Unemployment Rate': [5, 4, 6, 5, 4, 5, 4, 6, 5, 3]
+})
+
+AID_DATA = pd.DataFrame({
+    'Organization': ['NGO A', 'Government Program B', 'Charity C', 'NGO D', 'Charity E', 'Government Program F'],
+    'Contact': ['contact@ngoa.org', 'contact@govb.org', 'contact@charityc.org', 'contact@ngod.org', 'contact@charitye.org', 'contact@govf.org'],
+    'Programs Offered': [2, 3, 1, 2, 3, 2]
+})
+
+VOLUNTEER_DATA = pd.DataFrame({
+    'Opportunity': ['Teach children', 'Distribute food', 'Provide medical assistance', 'Clean-up drives', 'Skill development workshops', 'Agricultural assistance'],
+    'Location': ['Andhra Pradesh', 'Maharashtra', 'Uttar Pradesh', 'Karnataka', 'Tamil Nadu', 'Rajasthan'],
+    'Details': ['Teach subjects like Math, Science', 'Distribute food packets', 'Provide basic medical checkups', 'Organize community clean-up', 'Provide vocational training', 'Help with farming techniques']
+})
+
+# Opportunities per state, for the volunteer chart
+VOLUNTEER_COUNTS = VOLUNTEER_DATA['Location'].value_counts().rename_axis('Location').reset_index()
@@ -0,0 +1,110 @@
+import hashlib
+import io
+import os
+
+import pandas as pd
+import streamlit as st
+
+from utils.artifact_cache import ArtifactCache
+from utils.instrumentation import span
+
+# "matplotlib" renders PNGs on the server, "vega" sends Vega-Lite specs to the browser
+# for the charts that provide one (the rest are still rendered on the server)
+CHART_BACKEND = os.environ.get("SEDVT_CHART_BACKEND", "matplotlib")
+CHART_DPI = 200
+
+chart_cache = ArtifactCache("charts", max_items=128)
+
+
+# Function to get a stable hash of the data a chart is drawn from
+def frame_hash(data):
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        hashed = pd.util.hash_pandas_object(data, index=True).to_numpy()
+        digest = hashlib.sha1(hashed.tobytes())
+        names = list(data.columns) if isinstance(data, pd.DataFrame) else [data.name]
+        digest.update(repr(names).encode("utf-8"))
+    else:
+        digest = hashlib.sha1(repr(data).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _chart_name(spec):
+    return spec[0] if isinstance(spec, tuple) else spec
+
+
+# Function to render a chart to image bytes, drawing it only on a cache miss.
+# Figures are created without pyplot, so no global state or lock is involved and
+# nothing is left open once the bytes are written.
+def render_figure(spec, data_hash, draw, figsize=(8, 5), fmt="png"):
+    def build():
+        from matplotlib.figure import Figure  # Deferred: only needed on a cache miss
+
+        with span("chart.render", chart=_chart_name(spec)):
+            fig = Figure(figsize=figsize)
+            ax = fig.subplots()
+            draw(ax)
+            buf = io.BytesIO()
+            fig.savefig(buf, format=fmt, dpi=CHART_DPI, bbox_inches="tight")
+            fig.clear()
+            return buf.getvalue()
+
+    return chart_cache.get_or_create((spec, data_hash, figsize, fmt), build)
+
+
+# Function to display a chart with the configured backend
+def show_figure(spec, data, draw, figsize=(8, 5), vega_spec=None):
+    with span("chart.show", chart=_chart_name(spec)):
+        if CHART_BACKEND == "vega" and vega_spec is not None:
+            st.vega_lite_chart(data, vega_spec, use_container_width=True)
+            return
+        st.image(render_figure(spec, frame_hash(data), draw, figsize), use_container_width=True)
+
+
+# Vega-Lite spec for a (grouped) bar chart of one or more value columns
+def vega_bar(category, values, title=None, horizontal=False):
+    value_axis = {"field": "value", "type": "quantitative", "title": title}
+    category_axis = {"field": category, "type": "nominal", "sort": None}
+    spec = {
+        "transform": [{"fold": list(values), "as": ["series", "value"]}],
+        "mark": "bar",
+        "encoding": {
+            "x": value_axis if horizontal else category_axis,
+            "y": category_axis if horizontal else value_axis,
+            "color": {"field": "series", "type": "nominal"},
+        },
+    }
+    if len(values) > 1:
+        spec["encoding"]["xOffset" if not horizontal else "yOffset"] = {"field": "series"}
+    return spec
+
+
+# Vega-Lite spec for a scatter plot
+def vega_scatter(x, y, color="teal", title=None):
+    return {
+        "title": title,
+        "mark": {"type": "circle", "color": color, "opacity": 0.7},
+        "encoding": {
+            "x": {"field": x, "type": "quantitative", "scale": {"zero": False}},
+            "y": {"field": y, "type": "quantitative", "scale": {"zero": False}},
+        },
+    }
+
+
+# Vega-Lite spec for a box plot of one column
+def vega_box(column, color="red", title=None):
+    return {
+        "title": title,
+        "mark": {"type": "boxplot", "color": color},
+        "encoding": {"x": {"field": column, "type": "quantitative"}},
+    }
+
+
+# Vega-Lite spec for a pie chart
+def vega_pie(category, value):
+    return {
+        "mark": "arc",
+        "encoding": {
+            "theta": {"field": value, "type": "quantitative"},
+            "color": {"field": category, "type": "nominal"},
+        },
+    }
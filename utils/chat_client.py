@@ -0,0 +1,137 @@
+import json
+import os
+import threading
+import time
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.instrumentation import count, record_timing, span
+
+load_dotenv()
+
+DEFAULT_MODEL = os.environ.get("GROQ_MODEL", "mixtral-8x7b-32768")
+CONNECT_TIMEOUT = float(os.environ.get("GROQ_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.environ.get("GROQ_READ_TIMEOUT", "60"))
+MAX_RETRIES = int(os.environ.get("GROQ_MAX_RETRIES", "3"))
+BACKOFF_FACTOR = float(os.environ.get("GROQ_BACKOFF_FACTOR", "0.5"))
+POOL_SIZE = int(os.environ.get("GROQ_POOL_SIZE", "32"))
+# Transient server errors are retried here; 429s are left to the LLM scheduler, which
+# slows down every request in the process instead of retrying just this one
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+class ChatClientError(Exception):
+    def __init__(self, message, status_code=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def _retry_after(value):
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+# Client for an OpenAI-compatible chat completions endpoint (Groq by default).
+# One instance holds a pooled keep-alive session and is safe to share between the
+# script threads of all Streamlit sessions.
+class ChatClient:
+    def __init__(self, api_key=None, api_url=None, model=DEFAULT_MODEL,
+                 timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), max_retries=MAX_RETRIES,
+                 backoff_factor=BACKOFF_FACTOR, pool_size=POOL_SIZE):
+        self.api_key = api_key or os.environ.get("GROQ_API_KEY")
+        self.api_url = api_url or os.environ.get("GROQ_API_URL")
+        self.model = model
+        self.timeout = timeout
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["POST"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        })
+
+    def _post(self, messages, stream, temperature, model):
+        if not self.api_url:
+            raise ChatClientError("GROQ_API_URL is not configured")
+        data = {
+            "model": model or self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "stream": stream,
+        }
+        try:
+            with span("llm.request", stream=stream):
+                response = self.session.post(self.api_url, json=data, timeout=self.timeout, stream=stream)
+        except requests.RequestException as e:
+            count("llm.error", kind="request")
+            raise ChatClientError(f"Request failed: {e}") from e
+        if response.status_code != 200:
+            response.close()
+            count("llm.error", kind=str(response.status_code))
+            raise ChatClientError(f"Error: {response.status_code}", response.status_code,
+                                  _retry_after(response.headers.get("Retry-After")))
+        return response
+
+    # Function to get the whole completion for a list of chat messages
+    def complete(self, messages, temperature=0.7, model=None):
+        response = self._post(messages, False, temperature, model)
+        return response.json()["choices"][0]["message"]["content"]
+
+    # Function to yield completion text incrementally from a server-sent-event stream
+    def stream(self, messages, temperature=0.7, model=None):
+        start = time.perf_counter()
+        response = self._post(messages, True, temperature, model)
+        # Server-sent events are always UTF-8, but without a charset in the content type
+        # requests would decode them as ISO-8859-1
+        response.encoding = "utf-8"
+        first_token = True
+        with response:
+            try:
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    payload = line[len("data:"):].strip()
+                    if payload == "[DONE]":
+                        break
+                    delta = json.loads(payload)["choices"][0].get("delta", {})
+                    if delta.get("content"):
+                        if first_token:
+                            record_timing("llm.first_token", time.perf_counter() - start)
+                            first_token = False
+                        yield delta["content"]
+            except requests.RequestException as e:
+                count("llm.error", kind="stream")
+                raise ChatClientError(f"Stream interrupted: {e}") from e
+        record_timing("llm.stream", time.perf_counter() - start)
+
+    def close(self):
+        self.session.close()
+
+
+_default_client = None
+_client_lock = threading.Lock()
+
+
+# Function to get the process-wide client built from the environment
+def get_client():
+    global _default_client
+    with _client_lock:
+        if _default_client is None:
+            _default_client = ChatClient()
+        return _default_client
@@ -0,0 +1,86 @@
+import os
+import re
+from collections import deque
+
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("SEDVT_CHAT_CONTEXT_TOKENS", "3000"))
+SUMMARY_TOKEN_BUDGET = int(os.environ.get("SEDVT_CHAT_SUMMARY_TOKENS", "400"))
+MAX_RECENT_TURNS = int(os.environ.get("SEDVT_CHAT_RECENT_TURNS", "12"))
+MAX_DISPLAY_MESSAGES = int(os.environ.get("SEDVT_CHAT_DISPLAY_MESSAGES", "100"))
+
+
+# Function to roughly estimate the token count of a text (about 4 characters per token)
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+# Function to drop the oldest lines of a text until it fits in `budget` tokens
+def _truncate_tokens(text, budget):
+    lines = text.split("\n")
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > budget:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+# Function to compress one message into a single summary line
+def summarize_message(message, max_chars=200):
+    text = " ".join(message["content"].split())
+    first_sentence = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0]
+    if len(first_sentence) > max_chars:
+        first_sentence = first_sentence[:max_chars].rstrip() + "…"
+    speaker = "User asked" if message["role"] == "user" else "Assistant answered"
+    return f"{speaker}: {first_sentence}"
+
+
+# Chat history for one session. Recent turns are kept verbatim, older ones are folded
+# into a rolling summary, and everything held in memory is bounded so a session that
+# stays open all day does not grow.
+class Conversation:
+    def __init__(self, context_budget=CONTEXT_TOKEN_BUDGET, summary_budget=SUMMARY_TOKEN_BUDGET,
+                 max_recent=MAX_RECENT_TURNS, max_display=MAX_DISPLAY_MESSAGES, summarizer=summarize_message):
+        self.context_budget = context_budget
+        self.summary_budget = summary_budget
+        self.max_recent = max_recent
+        self.summarizer = summarizer
+        self.summary = ""
+        self.recent = deque()
+        self.display = deque(maxlen=max_display)
+        self.total_messages = 0
+
+    def __len__(self):
+        return self.total_messages
+
+    # Function to record a message and compact the history if needed
+    def add(self, role, content):
+        message = {"role": role, "content": content}
+        self.recent.append(message)
+        self.display.append(message)
+        self.total_messages += 1
+        while len(self.recent) > self.max_recent:
+            self._compact(self.recent.popleft())
+
+    def _compact(self, message):
+        line = self.summarizer(message)
+        self.summary = _truncate_tokens(f"{self.summary}\n{line}".strip(), self.summary_budget)
+
+    # Function to build the messages sent to the model for a new prompt: a summary of
+    # older turns plus as many recent turns as fit in the token budget
+    def context_messages(self, prompt):
+        budget = self.context_budget - estimate_tokens(prompt)
+        messages = []
+        if self.summary:
+            summary = {"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"}
+            budget -= estimate_tokens(summary["content"])
+
+        history = []
+        for message in reversed(self.recent):
+            cost = estimate_tokens(message["content"])
+            if cost > budget:
+                break
+            history.append(message)
+            budget -= cost
+
+        if self.summary:
+            messages.append(summary)
+        messages.extend(reversed(history))
+        messages.append({"role": "user", "content": prompt})
+        return messages
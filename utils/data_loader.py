@@ -0,0 +1,204 @@
+import hashlib
+import os
+import threading
+from functools import lru_cache
+
+import pandas as pd
+
+from utils.instrumentation import count, span
+
+# Location of the dataset (.csv or .parquet) and of the on-disk artifact cache
+DATA_PATH = os.environ.get("SEDVT_DATA_PATH", "data/data.csv")
+CACHE_DIR = os.environ.get("SEDVT_CACHE_DIR", ".cache")
+STORE_DIR = os.environ.get("SEDVT_STORE_DIR", "data/store")
+STORE_MANIFEST = os.path.join(STORE_DIR, "manifest.json")
+# Set SEDVT_SHARED_MEMORY=1 when several worker processes serve the app: the dataset is then
+# materialized once per version as an Arrow file that every process memory-maps read-only,
+# so the numeric columns are shared through the page cache instead of copied per process
+SHARED_MEMORY = os.environ.get("SEDVT_SHARED_MEMORY") == "1"
+SHARED_DIR = os.path.join(CACHE_DIR, "shared")
+
+STATE_COLUMN = "States_UnionTerritories"
+# Optional per-region coordinates (e.g. in generated district/village-level datasets)
+COORDINATE_COLUMNS = ["Latitude", "Longitude"]
+
+# Expected columns of data/data.csv and the compact dtype each one is stored as
+SCHEMA = {
+    "2000-01-INC": "int32",
+    "2011-12-INC": "int32",
+    "2001-LIT": "float32",
+    "2011-LIT": "float32",
+    "2001-POP": "int32",
+    "2011-POP": "int32",
+    "2001-SEX_RATIO": "int32",
+    "2011-SEX_RATIO": "int32",
+    "2001-UNEMP": "int32",
+    "2011-UNEMP": "int32",
+    "2001-Poverty": "float32",
+    "2011-Poverty": "float32",
+}
+
+_version_memo = {}
+_load_lock = threading.Lock()
+
+
+# Function to get a short content hash of a file (memoized on its mtime and size)
+def file_version(path):
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    version = _version_memo.get(key)
+    if version is None:
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        version = digest.hexdigest()[:16]
+        _version_memo[key] = version
+    return version
+
+
+# Function to get a short hash identifying the current dataset version: the CSV plus
+# any vintages ingested into the columnar store
+def data_version(path=DATA_PATH):
+    version = file_version(path)
+    if os.path.exists(STORE_MANIFEST):
+        version = hashlib.sha1(f"{version}:{file_version(STORE_MANIFEST)}".encode("utf-8")).hexdigest()[:16]
+    return version
+
+
+# Function to check the columns of a raw frame and cast it to the compact schema
+def apply_schema(df):
+    missing = [col for col in [STATE_COLUMN, *SCHEMA] if col not in df.columns]
+    if missing:
+        raise ValueError(f"Dataset is missing required columns: {', '.join(missing)}")
+
+    df = df[[STATE_COLUMN, *SCHEMA]].dropna()  # Drop rows has no value
+    df = df.astype(SCHEMA)
+    df[STATE_COLUMN] = df[STATE_COLUMN].astype("category")
+    return df.reset_index(drop=True)
+
+
+def _read_source(path, columns=None):
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, encoding="utf-8-sig", usecols=columns)
+
+
+def _source_columns(path):
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        return pq.read_schema(path).names
+    return list(pd.read_csv(path, encoding="utf-8-sig", nrows=0).columns)
+
+
+# Function to parse the dataset, going through the Parquet cache when it is up to date
+def _parse_dataset(path, version):
+    cache_file = os.path.join(CACHE_DIR, f"data-{version}.parquet")
+    if os.path.exists(cache_file):
+        count("dataset.parquet_cache_hit")
+        with span("dataset.read_parquet"):
+            return pd.read_parquet(cache_file)
+
+    count("dataset.parquet_cache_miss")
+    with span("dataset.parse", format="parquet" if path.endswith(".parquet") else "csv"):
+        raw = _read_source(path)
+    if os.path.exists(STORE_MANIFEST):
+        from utils.ingestion import overlay_store  # Deferred: only needed once data was ingested
+
+        with span("dataset.overlay_store"):
+            raw = overlay_store(raw)
+    df = apply_schema(raw)
+    _write_cache(df, cache_file)
+    return df
+
+
+def _write_cache(df, cache_file):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    df.to_parquet(tmp_file, index=False)
+    os.replace(tmp_file, cache_file)
+
+
+# Function to record a frame built elsewhere (e.g. incrementally by an ingest) as the parsed
+# dataset of a version, so loading that version does not parse the sources again
+def prime_dataset(df, version):
+    _write_cache(df, os.path.join(CACHE_DIR, f"data-{version}.parquet"))
+
+
+# Function to write a dataset version as an uncompressed Arrow IPC file, which can be mapped
+# without any decoding. Files are immutable and named by version, so a new version is
+# picked up atomically and processes still holding an older mapping keep a consistent frame.
+def _write_shared(df, shared_file, path, version):
+    import pyarrow as pa
+
+    os.makedirs(SHARED_DIR, exist_ok=True)
+    # Region names are stored as plain strings, so they can be mapped too
+    table = pa.Table.from_pandas(df.astype({STATE_COLUMN: str}), preserve_index=False)
+    tmp_file = f"{shared_file}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_file, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_file, shared_file)
+
+    # Other versions are no longer loaded once this one is current; processes that still map
+    # one keep it until they let go. A process that lags behind (it wrote a version that is no
+    # longer current) leaves the files alone, so it cannot remove the current version's file.
+    if version != data_version(path):
+        return
+    for entry in os.scandir(SHARED_DIR):
+        if entry.name.startswith("data-") and entry.name.endswith(".arrow") and entry.path != shared_file:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+# Function to map a shared dataset file read-only. Every column points straight into the
+# mapping (zero-copy): numbers as NumPy arrays, region names as Arrow-backed strings.
+def _map_shared(shared_file):
+    import pyarrow as pa
+
+    with span("dataset.map_shared"):
+        table = pa.ipc.open_file(pa.memory_map(shared_file, "r")).read_all()
+        return table.to_pandas(split_blocks=True, self_destruct=False,
+                               types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
+
+
+def _read_dataset(path, version):
+    if not SHARED_MEMORY:
+        return _parse_dataset(path, version)
+    shared_file = os.path.join(SHARED_DIR, f"data-{version}.arrow")
+    if os.path.exists(shared_file):
+        try:
+            return _map_shared(shared_file)
+        except FileNotFoundError:
+            pass  # Removed by another process between the check and the mapping
+    count("dataset.shared_materialize")
+    _write_shared(_parse_dataset(path, version), shared_file, path, version)
+    return _map_shared(shared_file)
+
+
+@lru_cache(maxsize=4)
+def _cached_dataset(path, version):
+    return _read_dataset(path, version)
+
+
+# Function to get the shared, read-only dataset frame (loaded once per process)
+def load_dataset(path=DATA_PATH):
+    version = data_version(path)
+    with _load_lock:
+        return _cached_dataset(os.path.abspath(path), version)
+
+
+@lru_cache(maxsize=4)
+def _cached_coordinates(path, version):
+    if not all(col in _source_columns(path) for col in COORDINATE_COLUMNS):
+        return {}
+    frame = _read_source(path, columns=[STATE_COLUMN, *COORDINATE_COLUMNS]).dropna()
+    return dict(zip(frame[STATE_COLUMN].astype(str), zip(*(frame[col].tolist() for col in COORDINATE_COLUMNS))))
+
+
+# Function to get {region: (lat, lon)} for datasets that carry their own coordinates
+def load_coordinates(path=DATA_PATH):
+    return _cached_coordinates(os.path.abspath(path), file_version(path))
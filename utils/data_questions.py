@@ -0,0 +1,290 @@
+import re
+import threading
+
+import numpy as np
+
+from utils.data_loader import STATE_COLUMN, data_version, load_dataset
+from utils.instrumentation import span
+
+# Indicators the router understands: words that name them, their columns by census year,
+# and how their values read in an answer
+INDICATORS = {
+    "poverty": {
+        "label": "poverty rate",
+        "aliases": ["poverty", "poor", "bpl"],
+        "columns": {"2001": "2001-Poverty", "2011": "2011-Poverty"},
+        "format": "{:.2f}%",
+        "change": "{:+.2f} percentage points",
+    },
+    "literacy": {
+        "label": "literacy rate",
+        "aliases": ["literacy", "literate", "lit"],
+        "columns": {"2001": "2001-LIT", "2011": "2011-LIT"},
+        "format": "{:.2f}%",
+        "change": "{:+.2f} percentage points",
+    },
+    "income": {
+        "label": "per-capita income",
+        "aliases": ["income", "earnings", "inc"],
+        "columns": {"2001": "2000-01-INC", "2011": "2011-12-INC"},
+        "years": {"2001": "2000-01", "2011": "2011-12"},
+        "format": "₹{:,.0f}",
+        "change": "{:+,.0f} ₹",
+    },
+    "population": {
+        "label": "population",
+        "aliases": ["population", "populous", "pop", "people"],
+        "columns": {"2001": "2001-POP", "2011": "2011-POP"},
+        "format": "{:,.0f} thousand",
+        "change": "{:+,.0f} thousand",
+    },
+    "sex_ratio": {
+        "label": "sex ratio",
+        "aliases": ["sex ratio", "gender ratio", "sex_ratio"],
+        "columns": {"2001": "2001-SEX_RATIO", "2011": "2011-SEX_RATIO"},
+        "format": "{:,.0f} females per 1,000 males",
+        "change": "{:+,.0f}",
+    },
+    "unemployment": {
+        "label": "unemployment rate",
+        "aliases": ["unemployment", "unemployed", "jobless", "unemp"],
+        "columns": {"2001": "2001-UNEMP", "2011": "2011-UNEMP"},
+        "format": "{:,.0f} per 1,000",
+        "change": "{:+,.0f} per 1,000",
+    },
+}
+
+STATE_ALIASES = {
+    "j&k": "Jammu and Kashmir",
+    "j & k": "Jammu and Kashmir",
+    "orissa": "Odisha",
+    "pondicherry": "Puducherry",
+    "new delhi": "Delhi",
+    "nct of delhi": "Delhi",
+    "bengal": "West Bengal",
+    "andaman": "Andaman and Nicobar Islands",
+}
+
+YEAR_PATTERN = re.compile(r"\b(2000-01|2011-12|2001|2011)\b")
+RANK_DESC = re.compile(r"\b(top|highest|most|largest|biggest|greatest|maximum)\b")
+RANK_ASC = re.compile(r"\b(bottom|lowest|least|smallest|fewest|minimum)\b")
+RANK_COUNT = re.compile(r"\b(?:top|bottom|first|last)\s+(\d{1,3})\b|\b(\d{1,3})\s+(?:states|regions|uts|districts)\b")
+REGION_WORDS = re.compile(r"\b(states?|regions?|uts?|districts?|territor(?:y|ies)|rank(?:ing|ed)?)\b")
+PLURAL_REGIONS = re.compile(r"\b(states|regions|uts|districts|territories)\b")
+GROWTH_WORDS = re.compile(
+    r"\b(growth|grow|grew|change|changed|increase|increased|decrease|decreased|decline|declined|"
+    r"rise|rose|fall|fell|drop|dropped|improve|improved|improvement|reduction|reduced)\b"
+)
+AGGREGATE_WORDS = re.compile(r"\b(average|mean|overall|national|nationwide|india|country)\b")
+# Only questions that ask for a figure, a comparison or a ranking are answered from the data;
+# advice, how-to and scheme questions that merely mention an indicator go to the LLM
+FACT_WORDS = re.compile(
+    r"\b(what|which|how (?:many|much|high|low|has|have|did|does)|compare|compared|comparison|versus|vs|"
+    r"rank|ranking|ranked|list|average|mean)\b"
+)
+ADVICE_WORDS = re.compile(
+    r"\b(how (?:do|can|could|should|would|to)|should|could|donate|donation|help|jobs?|schemes?|"
+    r"programs?|programmes?|support|ways?|policy|policies|apply|eligible|eligibility|benefits?|tips?)\b"
+)
+MAX_NAME_WORDS = 8
+MAX_LISTED = 20
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+# Function to normalize text for matching: lowercase words, keeping "#" and "&"
+def normalize(text):
+    return " ".join(re.sub(r"[^\w#&]+", " ", text.lower()).split())
+
+
+# Function to find the indicators named in normalized text, with where each is first mentioned
+def indicator_positions(text):
+    positions = {}
+    for key, spec in INDICATORS.items():
+        for alias in spec["aliases"]:
+            match = re.search(rf"\b{re.escape(alias)}\b", text)
+            if match:
+                positions[key] = min(positions.get(key, match.start()), match.start())
+    return positions
+
+
+# Dataset answers for one dataset version: the indicator columns, the 2001 -> 2011 changes
+# and a lookup from every normalized region name (and common alias) to its row
+class DataIndex:
+    def __init__(self, df):
+        self.names = df[STATE_COLUMN].astype(str).to_numpy()
+        self.values = {}
+        for key, spec in INDICATORS.items():
+            for year, column in spec["columns"].items():
+                self.values[key, year] = df[column].to_numpy(dtype=np.float64)
+            self.values[key, "change"] = self.values[key, "2011"] - self.values[key, "2001"]
+
+        self.lookup = {normalize(name): i for i, name in enumerate(self.names)}
+        for alias, name in STATE_ALIASES.items():
+            if normalize(name) in self.lookup:
+                self.lookup.setdefault(normalize(alias), self.lookup[normalize(name)])
+        self.max_words = min(MAX_NAME_WORDS, max(len(name.split()) for name in self.lookup))
+        self.region_label = "states/UTs" if len(self.names) <= 40 else "regions"
+        self.region_singular = "state/UT" if len(self.names) <= 40 else "region"
+        self._context = None
+
+    # Function to find the regions named in a question by looking up its word n-grams,
+    # longest first, so the cost does not depend on how many regions there are
+    def find_regions(self, text):
+        words = text.split()
+        found, used = [], set()
+        for size in range(self.max_words, 0, -1):
+            for start in range(len(words) - size + 1):
+                if any(i in used for i in range(start, start + size)):
+                    continue
+                row = self.lookup.get(" ".join(words[start:start + size]))
+                if row is not None and row not in found:
+                    found.append(row)
+                    used.update(range(start, start + size))
+        return found
+
+    def _format(self, key, value, kind="format"):
+        return INDICATORS[key][kind].format(value)
+
+    def _year_label(self, key, year):
+        return INDICATORS[key].get("years", {}).get(year, year)
+
+    # Function to answer "what was Bihar's 2011 poverty rate"-style questions
+    def region_answer(self, key, rows, years, growth):
+        spec = INDICATORS[key]
+        lines = []
+        for row in rows[:MAX_LISTED]:
+            name = self.names[row]
+            old, new = self.values[key, "2001"][row], self.values[key, "2011"][row]
+            if growth or not years:
+                lines.append(
+                    f"{name}'s {spec['label']} went from {self._format(key, old)} in {self._year_label(key, '2001')} "
+                    f"to {self._format(key, new)} in {self._year_label(key, '2011')} "
+                    f"({self._format(key, new - old, 'change')})."
+                )
+            else:
+                values = [f"{self._format(key, self.values[key, year][row])} in {self._year_label(key, year)}" for year in years]
+                lines.append(f"{name}'s {spec['label']} was {' and '.join(values)}.")
+        return "\n\n".join(lines)
+
+    # Function to answer "top 5 states by literacy growth"-style questions
+    def ranking_answer(self, key, year, descending, count):
+        spec = INDICATORS[key]
+        column = self.values[key, year]
+        keyed = -column if descending else column
+        top = np.argpartition(keyed, count - 1)[:count] if count < len(column) else np.arange(len(column))
+        ranked = top[np.argsort(keyed[top], kind="stable")]
+        kind = "change" if year == "change" else "format"
+        if year == "change":
+            what = f"change in {spec['label']} from {self._year_label(key, '2001')} to {self._year_label(key, '2011')}"
+        else:
+            what = f"{spec['label']} in {self._year_label(key, year)}"
+        order = "highest" if descending else "lowest"
+        title = (f"The {self.region_singular} with the {order} {what}:" if count == 1
+                 else f"The {count} {self.region_label} with the {order} {what}:")
+        lines = [f"{i}. {self.names[row]}: {self._format(key, column[row], kind)}" for i, row in enumerate(ranked, 1)]
+        return "\n".join([title, "", *lines])
+
+    # Function to answer "average literacy rate"-style questions
+    def aggregate_answer(self, key, years, growth):
+        spec = INDICATORS[key]
+        if growth:
+            mean = self.values[key, "change"].mean()
+            return (f"Across all {len(self.names):,} {self.region_label}, the {spec['label']} changed by "
+                    f"{self._format(key, mean, 'change')} on average from {self._year_label(key, '2001')} to "
+                    f"{self._year_label(key, '2011')}.")
+        parts = [f"{self._format(key, self.values[key, year].mean())} in {self._year_label(key, year)}" for year in (years or ["2001", "2011"])]
+        return f"The average {spec['label']} across all {len(self.names):,} {self.region_label} was {' and '.join(parts)}."
+
+    # Function to answer a question from the data, or return None when it is not a data question
+    def answer(self, question):
+        text = normalize(question)
+        if ADVICE_WORDS.search(text) or not (FACT_WORDS.search(text) or RANK_DESC.search(text) or RANK_ASC.search(text)):
+            return None
+        positions = indicator_positions(text)
+        if not positions:
+            return None
+        key = min(positions, key=positions.get)  # The first indicator mentioned
+        years = sorted({"2001" if year.startswith("2000") or year == "2001" else "2011" for year in YEAR_PATTERN.findall(question)})
+        growth = bool(GROWTH_WORDS.search(text))
+        rows = self.find_regions(text)
+
+        descending = bool(RANK_DESC.search(text))
+        ascending = bool(RANK_ASC.search(text))
+        if (descending or ascending) and REGION_WORDS.search(text) and len(rows) != 1:
+            match = RANK_COUNT.search(text)
+            if match:
+                count = int(match.group(1) or match.group(2))
+            else:
+                count = 5 if PLURAL_REGIONS.search(text) else 1
+            year = "change" if growth else (years[-1] if years else "2011")
+            return self.ranking_answer(key, year, descending or not ascending, max(1, min(count, MAX_LISTED)))
+        if rows:
+            return self.region_answer(key, rows, years, growth)
+        if AGGREGATE_WORDS.search(text):
+            return self.aggregate_answer(key, years, growth)
+        return None
+
+    # Function to get a compact summary of the dataset for grounding LLM answers
+    def context(self):
+        if self._context is None:
+            lines = [f"Dataset: {len(self.names):,} Indian {self.region_label}, census years 2001 and 2011."]
+            for key, spec in INDICATORS.items():
+                latest = self.values[key, "2011"]
+                high, low = latest.argmax(), latest.argmin()
+                lines.append(
+                    f"{spec['label']} 2011: average {self._format(key, latest.mean())}, "
+                    f"highest {self.names[high]} ({self._format(key, latest[high])}), "
+                    f"lowest {self.names[low]} ({self._format(key, latest[low])}); "
+                    f"average change since 2001 {self._format(key, self.values[key, 'change'].mean(), 'change')}."
+                )
+            self._context = "\n".join(lines)
+        return self._context
+
+    # Function to describe the regions a question mentions, one line each
+    def region_context(self, question):
+        lines = []
+        for row in self.find_regions(normalize(question))[:5]:
+            values = ", ".join(
+                f"{spec['label']} {self._format(key, self.values[key, '2001'][row])} -> {self._format(key, self.values[key, '2011'][row])}"
+                for key, spec in INDICATORS.items()
+            )
+            lines.append(f"{self.names[row]} (2001 -> 2011): {values}.")
+        return "\n".join(lines)
+
+
+# Function to get the question index for the current dataset version, building it at most once
+def get_data_index():
+    version = data_version()
+    with _lock:
+        if version not in _indexes:
+            _indexes.clear()
+            _indexes[version] = DataIndex(load_dataset())
+        return _indexes[version]
+
+
+# Function to answer a chat question straight from the dataset (None if it is not one)
+def answer_question(question):
+    with span("chat.data_answer"):
+        return get_data_index().answer(question)
+
+
+# Function to get the regions, indicators and years a question names, as one string: two
+# questions about different regions or indicators never share a cached answer
+def question_entities(question):
+    text = normalize(question)
+    index = get_data_index()
+    regions = sorted(index.names[row] for row in index.find_regions(text))
+    years = sorted(set(re.findall(r"\b(?:19|20)\d\d\b", text)))
+    return "|".join([",".join(regions), ",".join(sorted(indicator_positions(text))), ",".join(years)])
+
+
+# Function to build the system message that grounds an LLM answer in the dataset
+def context_message(question):
+    index = get_data_index()
+    content = "Answer using these facts from the SEDVT socio-economic dataset when relevant.\n" + index.context()
+    regions = index.region_context(question)
+    if regions:
+        content += "\n" + regions
+    return {"role": "system", "content": content}
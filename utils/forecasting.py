@@ -0,0 +1,149 @@
+import io
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.artifact_cache import ArtifactCache
+from utils.data_loader import SCHEMA, STATE_COLUMN, STORE_MANIFEST
+from utils.instrumentation import span
+
+FORECAST_YEARS = [2021, 2031]
+REFERENCE_YEAR = 2011  # Years are centred here to keep the normal equations well conditioned
+PERCENT_INDICATORS = {"LIT", "Poverty"}
+CHUNK_GROUPS = 500_000  # (region, indicator) series solved per batch, to bound memory
+DET_TOLERANCE = 1e-9  # Below this a series has fewer than two distinct years
+MAX_VERSIONS = 4  # Dataset versions whose forecasts stay in memory (older ones reload from disk)
+
+forecast_cache = ArtifactCache("forecasts", max_items=8)
+_results = OrderedDict()
+_lock = threading.Lock()
+
+
+# Function to turn a vintage label into a (fractional) year: "2011" -> 2011, "2011-12" -> 2011.5
+def vintage_year(vintage):
+    match = re.fullmatch(r"(\d{4})(?:-(\d{2}))?", str(vintage))
+    if match is None:
+        raise ValueError(f"Unrecognized vintage: {vintage}")
+    return int(match.group(1)) + (0.5 if match.group(2) else 0.0)
+
+
+# Function to split a dataset column such as "2011-12-INC" into its vintage and indicator
+def split_column(column):
+    vintage, indicator = column.rsplit("-", 1)
+    return vintage, indicator
+
+
+# Function to build the (region, indicator, year) panel as one array: the dataset's own
+# vintages plus any other vintages ingested into the columnar store
+def build_panel(df):
+    regions = pd.Index(df[STATE_COLUMN].astype(str))
+    columns = {column: split_column(column) for column in SCHEMA}
+    stored = None
+    if os.path.exists(STORE_MANIFEST):
+        from utils.ingestion import load_store
+
+        dataset_vintages = {vintage for vintage, _ in columns.values()}
+        stored = load_store()
+        stored = stored[~stored["vintage"].isin(dataset_vintages) & (stored["level"] == "state")
+                        & stored["region"].isin(regions)]
+        stored = stored.sort_values("seq") if not stored.empty else None
+
+    indicators = sorted({indicator for _, indicator in columns.values()}
+                        | (set(stored["indicator"]) if stored is not None else set()))
+    years = sorted({vintage_year(vintage) for vintage, _ in columns.values()}
+                   | (set(stored["vintage"].map(vintage_year)) if stored is not None else set()))
+    indicator_index = {indicator: i for i, indicator in enumerate(indicators)}
+    year_index = {year: i for i, year in enumerate(years)}
+
+    panel = np.full((len(regions), len(indicators), len(years)), np.nan)
+    for column, (vintage, indicator) in columns.items():
+        panel[:, indicator_index[indicator], year_index[vintage_year(vintage)]] = df[column].to_numpy(dtype=np.float64)
+    if stored is not None:
+        # Rows are in ingestion order, so a later upload of the same value wins
+        panel[
+            regions.get_indexer(stored["region"]),
+            stored["indicator"].map(indicator_index).to_numpy(),
+            stored["vintage"].map(vintage_year).map(year_index).to_numpy(),
+        ] = stored["value"].to_numpy(dtype=np.float64)
+    return panel, regions.to_numpy(), np.array(indicators, dtype=object), np.array(years)
+
+
+# Function to fit y = a + b * (year - REFERENCE_YEAR) for every row of `values` (one series
+# per row, NaN where a vintage is missing) in one pass. The 2x2 normal equations of all
+# series are built from matrix-vector products and solved in closed form; series with a
+# single vintage get a flat trend.
+def fit_trends(values, years):
+    values = np.asarray(values, dtype=np.float64)
+    t = np.asarray(years, dtype=np.float64) - REFERENCE_YEAR
+
+    observed = ~np.isnan(values)
+    weights = observed.astype(np.float64)
+    y = np.where(observed, values, 0.0)
+
+    n = weights.sum(axis=1)
+    sum_t, sum_tt = weights @ t, weights @ (t * t)
+    sum_y, sum_ty = y.sum(axis=1), y @ t
+    det = n * sum_tt - sum_t * sum_t
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(det > DET_TOLERANCE, (n * sum_ty - sum_t * sum_y) / det, 0.0)
+        level = np.where(n > 0, (sum_y - slope * sum_t) / n, np.nan)
+    return np.stack([level, np.where(n > 0, slope, np.nan)], axis=1), n.astype(np.int64)
+
+
+# Function to fit a trend per (region, indicator) over all vintages and project it forward
+def forecast_trends(df, years=FORECAST_YEARS):
+    with span("forecast.fit"):
+        panel, regions, indicators, vintages = build_panel(df)
+        values = panel.reshape(-1, len(vintages))  # One series per (region, indicator)
+        coefficients = np.empty((len(values), 2))
+        counts = np.empty(len(values), dtype=np.int64)
+        for start in range(0, len(values), CHUNK_GROUPS):
+            chunk = slice(start, start + CHUNK_GROUPS)
+            coefficients[chunk], counts[chunk] = fit_trends(values[chunk], vintages)
+
+    regions = np.repeat(regions, len(indicators))
+    indicators = np.tile(indicators, len(panel))
+    result = pd.DataFrame({
+        "region": regions,
+        "indicator": indicators,
+        "vintages": counts,
+        "slope_per_year": coefficients[:, 1],
+        f"level_{REFERENCE_YEAR}": coefficients[:, 0],
+    })
+    percent = np.isin(indicators, list(PERCENT_INDICATORS))
+    for year in years:
+        projected = coefficients[:, 0] + coefficients[:, 1] * (year - REFERENCE_YEAR)
+        projected = np.where(percent, np.clip(projected, 0, 100), np.clip(projected, 0, None))
+        result[f"forecast_{year}"] = projected
+    return result
+
+
+# Function to get the per-region trend forecasts for a dataset version, fitting them at most once
+def get_forecasts(df, version):
+    with _lock:
+        if version in _results:
+            _results.move_to_end(version)
+            return _results[version]
+
+        def build():
+            buf = io.BytesIO()
+            forecast_trends(df).to_parquet(buf, index=False)
+            return buf.getvalue()
+
+        key = ("forecasts", version, tuple(FORECAST_YEARS))
+        result = pd.read_parquet(io.BytesIO(forecast_cache.get_or_create(key, build)))
+        _results[version] = result
+        while len(_results) > MAX_VERSIONS:
+            _results.popitem(last=False)
+        return result
+
+
+# Function to get the forecasts of one indicator as one row per region
+def indicator_forecasts(forecasts, indicator):
+    rows = forecasts[forecasts["indicator"] == indicator].drop(columns="indicator")
+    return rows.rename(columns={"region": STATE_COLUMN}).reset_index(drop=True)
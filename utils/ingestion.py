@@ -0,0 +1,292 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import (
+    SCHEMA, STATE_COLUMN, STORE_DIR, STORE_MANIFEST, apply_schema, data_version, load_dataset, prime_dataset,
+)
+from utils.instrumentation import span
+
+# Long-format input: one row per (region, indicator, vintage)
+LONG_COLUMNS = ["region", "indicator", "vintage", "value"]
+STATE_LEVEL = "state"
+OPTIONAL_COLUMNS = {"level": STATE_LEVEL, "parent": ""}
+# Vintages with columns in the dataset; others only feed the per-region trend forecasts
+DATASET_VINTAGES = {column.rsplit("-", 1)[0] for column in SCHEMA}
+INDICATORS = {"INC", "LIT", "POP", "SEX_RATIO", "UNEMP", "Poverty"}
+PERCENT_INDICATORS = {"LIT", "Poverty"}
+VINTAGE_PATTERN = re.compile(r"^\d{4}(-\d{2})?$")
+CHUNK_ROWS = 100_000
+
+
+# Function to get the Arrow schema of the stored rows. It is fixed rather than inferred from
+# the first file, so an all-integer upload cannot make later decimal values unreadable.
+def store_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("region", pa.string()),
+        ("indicator", pa.string()),
+        ("value", pa.float64()),
+        ("level", pa.string()),
+        ("parent", pa.string()),
+        ("seq", pa.int64()),
+        ("vintage", pa.string()),
+    ])
+
+_ingest_lock = threading.Lock()
+
+
+# Summary of one ingested file and of what it changed
+class IngestReport:
+    def __init__(self, file_hash):
+        self.file_hash = file_hash
+        self.rows = 0
+        self.vintages = set()
+        self.regions = set()
+        self.columns = set()  # Dataset columns given state-level values
+        self.levels = {}  # level -> rows
+        self.parts = []  # (vintage, path) of every part file this ingest published
+        self.skipped = False
+
+    # Function to list what was stored but will not show up in the dataset pages
+    def notes(self):
+        notes = []
+        extra = sorted(self.vintages - DATASET_VINTAGES)
+        if extra:
+            notes.append(f"Vintages {', '.join(extra)} are not dataset columns: "
+                         "they are only used by the per-region trend forecasts.")
+        for level, rows in sorted(self.levels.items()):
+            if level != STATE_LEVEL:
+                notes.append(f"{rows:,} {level}-level rows were stored but are not shown: "
+                             "the app displays state-level data only.")
+        return notes
+
+    def to_dict(self):
+        return {
+            "file_hash": self.file_hash,
+            "rows": self.rows,
+            "vintages": sorted(self.vintages),
+            "regions": len(self.regions),
+            "columns": sorted(self.columns),
+            "levels": self.levels,
+            "ingested_at": time.time(),
+        }
+
+
+# Function to read the list of ingested files
+def read_manifest():
+    if not os.path.exists(STORE_MANIFEST):
+        return []
+    with open(STORE_MANIFEST, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_manifest(entries):
+    tmp_path = f"{STORE_MANIFEST}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=2)
+    os.replace(tmp_path, STORE_MANIFEST)
+
+
+# Function to check and normalize one chunk of long-format rows
+def validate_chunk(chunk, offset=0):
+    missing = [col for col in LONG_COLUMNS if col not in chunk.columns]
+    if missing:
+        raise ValueError(f"Input is missing required columns: {', '.join(missing)}")
+
+    chunk = chunk.copy()
+    for col, default in OPTIONAL_COLUMNS.items():
+        if col not in chunk.columns:
+            chunk[col] = default
+    for col in ["region", "indicator", "vintage", "level", "parent"]:
+        chunk[col] = chunk[col].fillna("").astype(str).str.strip()
+    chunk["level"] = chunk["level"].str.lower().replace("", STATE_LEVEL)
+    chunk["value"] = pd.to_numeric(chunk["value"], errors="coerce").astype(np.float64)
+
+    problems = []
+    checks = [
+        (chunk["region"] == "", "empty region"),
+        (~chunk["indicator"].isin(INDICATORS), f"indicator not one of {', '.join(sorted(INDICATORS))}"),
+        (~chunk["vintage"].str.match(VINTAGE_PATTERN), "vintage must look like 2021 or 2021-22"),
+        (chunk["value"].isna(), "value is not numeric"),
+        (chunk["value"] < 0, "value is negative"),
+        (chunk["indicator"].isin(PERCENT_INDICATORS) & (chunk["value"] > 100), "percentage above 100"),
+    ]
+    for mask, message in checks:
+        bad = np.flatnonzero(mask.to_numpy())
+        if len(bad):
+            rows = ", ".join(str(offset + i + 2) for i in bad[:5])  # +2: header line and 1-based rows
+            problems.append(f"{message} (line {rows}{', ...' if len(bad) > 5 else ''})")
+    if problems:
+        raise ValueError("Invalid input: " + "; ".join(problems))
+
+    return chunk[["region", "indicator", "vintage", "value", "level", "parent"]]
+
+
+# Function to stream a long-format CSV into the partitioned store, one chunk at a time.
+# Parts are staged first and only published (with the manifest entry) once the whole
+# file validated, so a bad upload leaves the store untouched.
+def ingest_file(source, chunksize=CHUNK_ROWS):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    with _ingest_lock:
+        manifest = read_manifest()
+        sequence = len(manifest)
+        staging = os.path.join(STORE_DIR, f".staging-{os.getpid()}-{threading.get_ident()}")
+        os.makedirs(staging, exist_ok=True)
+        digest = hashlib.sha1()
+        report = IngestReport(None)
+        schema = store_schema().remove(store_schema().get_field_index("vintage"))
+
+        try:
+            reader = pd.read_csv(source, chunksize=chunksize, encoding="utf-8-sig", dtype={"vintage": str})
+            for i, chunk in enumerate(reader):
+                chunk = validate_chunk(chunk, offset=report.rows)
+                digest.update(pd.util.hash_pandas_object(chunk, index=False).to_numpy().tobytes())
+                chunk["seq"] = sequence
+
+                report.rows += len(chunk)
+                report.regions.update(chunk["region"].unique())
+                for level, rows in chunk["level"].value_counts().items():
+                    report.levels[level] = report.levels.get(level, 0) + int(rows)
+                for vintage, part in chunk.groupby("vintage", sort=False):
+                    report.vintages.add(vintage)
+                    states = part.loc[part["level"] == STATE_LEVEL, "indicator"].unique()
+                    report.columns.update(column for column in (f"{vintage}-{indicator}" for indicator in states)
+                                          if column in SCHEMA)
+                    part_dir = os.path.join(staging, f"vintage={vintage}")
+                    os.makedirs(part_dir, exist_ok=True)
+                    table = pa.Table.from_pandas(part.drop(columns="vintage"), schema=schema, preserve_index=False)
+                    pq.write_table(table, os.path.join(part_dir, f"part-{sequence:06d}-{i:06d}.parquet"))
+
+            report.file_hash = digest.hexdigest()[:16]
+            if report.rows == 0 or any(entry["file_hash"] == report.file_hash for entry in manifest):
+                report.skipped = True
+                return report
+
+            for vintage_dir in os.listdir(staging):
+                target = os.path.join(STORE_DIR, vintage_dir)
+                os.makedirs(target, exist_ok=True)
+                for name in os.listdir(os.path.join(staging, vintage_dir)):
+                    os.replace(os.path.join(staging, vintage_dir, name), os.path.join(target, name))
+                    report.parts.append((vintage_dir[len("vintage="):], os.path.join(target, name)))
+            _write_manifest(manifest + [report.to_dict()])
+            return report
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+
+# Function to read long-format rows from the store, optionally for some vintages, indicators
+# or regions only (the filters are pushed down to the Parquet scan)
+def load_store(vintages=None, indicators=None, regions=None):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    if not os.path.exists(STORE_MANIFEST):
+        return pd.DataFrame(columns=[*LONG_COLUMNS, "level", "parent", "seq"])
+    partitioning = ds.partitioning(pa.schema([("vintage", pa.string())]), flavor="hive")
+    # Parts written before values were always stored as float64 are cast on read
+    dataset = ds.dataset(STORE_DIR, schema=store_schema(), format="parquet", partitioning=partitioning,
+                         exclude_invalid_files=True, ignore_prefixes=[".", "_", "manifest"])
+    condition = None
+    if vintages is not None:
+        condition = ds.field("vintage").isin([str(v) for v in vintages])
+    if indicators is not None:
+        indicator_condition = ds.field("indicator").isin(list(indicators))
+        condition = indicator_condition if condition is None else condition & indicator_condition
+    if regions is not None:
+        region_condition = ds.field("region").isin(list(regions))
+        condition = region_condition if condition is None else condition & region_condition
+    frame = dataset.to_table(filter=condition).to_pandas()
+    frame["vintage"] = frame["vintage"].astype(str)
+    return frame
+
+
+# Function to read the part files one ingest published, without scanning the rest of the store
+def read_parts(parts):
+    import pyarrow.parquet as pq
+
+    frames = [pq.read_table(path).to_pandas().assign(vintage=vintage) for vintage, path in parts]
+    if not frames:
+        return pd.DataFrame(columns=[*LONG_COLUMNS, "level", "parent", "seq"])
+    return pd.concat(frames, ignore_index=True)
+
+
+# Function to pivot state-level rows for the dataset's own columns into one row per region.
+# District and other sub-state rows stay in the store and never become extra "states".
+def state_wide(long):
+    long = long[long["level"] == STATE_LEVEL]
+    long = long.assign(column=long["vintage"] + "-" + long["indicator"])
+    long = long[long["column"].isin(SCHEMA)].sort_values("seq", kind="stable")
+    if long.empty:
+        return pd.DataFrame(columns=[STATE_COLUMN])
+    wide = long.pivot_table(index="region", columns="column", values="value", aggfunc="last")
+    return wide.rename_axis(STATE_COLUMN).rename_axis(None, axis=1).reset_index()
+
+
+# Function to pivot the stored state-level rows for the dataset's own vintages into wide columns
+def store_wide(regions=None):
+    return state_wide(load_store(vintages=DATASET_VINTAGES, regions=regions))
+
+
+# Function to apply ingested values on top of the raw CSV frame: stored values replace
+# existing ones and new regions are appended (the schema later drops incomplete rows)
+def overlay_store(raw, wide=None):
+    wide = store_wide() if wide is None else wide
+    if wide.empty:
+        return raw
+    base = raw.set_index(STATE_COLUMN)
+    merged = wide.set_index(STATE_COLUMN).combine_first(base)
+    order = list(base.index) + [region for region in merged.index if region not in base.index]
+    return merged.loc[order].reset_index()
+
+
+# Function to ingest a file and refresh only the derived artifacts it affects
+def ingest_and_refresh(source, chunksize=CHUNK_ROWS):
+    from utils.model_registry import MODEL_INPUTS, carry_over_models
+    from utils.statistics import append_stats, get_stats
+
+    old_df = load_dataset()
+    old_version = data_version()
+    with span("ingest.file"):
+        report = ingest_file(source, chunksize=chunksize)
+    if report.skipped:
+        return report
+
+    # The new version is built from the old frame plus the parts this file wrote; only regions
+    # it adds are completed from their earlier stored rows. Neither the CSV nor the rest of
+    # the store is read again.
+    old_regions = set(old_df[STATE_COLUMN].astype(str))
+    with span("ingest.refresh_dataset"):
+        wide = state_wide(read_parts(report.parts))
+        added_regions = set(wide[STATE_COLUMN]) - old_regions
+        if added_regions:
+            wide = pd.concat([wide[~wide[STATE_COLUMN].isin(added_regions)], store_wide(regions=added_regions)],
+                             ignore_index=True)
+        new_version = data_version()
+        prime_dataset(apply_schema(overlay_store(old_df.astype({STATE_COLUMN: str}), wide)), new_version)
+    new_df = load_dataset()
+    added = new_df[~new_df[STATE_COLUMN].astype(str).isin(old_regions)]
+    touched_columns = report.columns & set(SCHEMA) if report.regions & old_regions else set()
+    appended_only = not touched_columns and len(new_df) == len(old_df) + len(added)
+
+    # Statistics: fold appended rows into the old ones instead of rescanning
+    if appended_only:
+        get_stats(old_df, old_version)
+        append_stats(old_version, added, new_version)
+
+    # Models: reuse the fitted pipelines when neither their rows nor their inputs changed
+    if added.empty and not touched_columns & set(MODEL_INPUTS):
+        carry_over_models(old_version, new_version)
+
+    # Maps: GeoJSON layers are keyed by column content, so only changed columns rebuild
+    return report
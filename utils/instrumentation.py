@@ -0,0 +1,205 @@
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Set SEDVT_METRICS=0 to turn every span and counter into a no-op
+METRICS_ENABLED = os.environ.get("SEDVT_METRICS", "1") != "0"
+# Emit one JSON log line per span and counter update
+METRICS_LOG = os.environ.get("SEDVT_METRICS_LOG") == "1"
+# Token that unlocks the performance panel (?admin=<token>)
+ADMIN_TOKEN = os.environ.get("SEDVT_ADMIN_TOKEN")
+
+logger = logging.getLogger("sedvt.metrics")
+
+_timings = {}  # (stage, labels) -> [count, total seconds, max seconds]
+_counters = {}  # (name, labels) -> value
+_caches = {}  # name -> function returning {"hits": ..., "misses": ...}
+_lock = threading.Lock()
+_run = threading.local()
+_server = None
+_server_started = False  # Set on the first start attempt, so a failed bind is not retried every rerun
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _log(event, name, labels, **fields):
+    logger.info(json.dumps({"event": event, "name": name, **labels, **fields, "ts": time.time()}, default=str))
+
+
+# Function to record one timing of a stage (also kept for the current rerun)
+def record_timing(name, seconds, **labels):
+    if not METRICS_ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        entry = _timings.get(key)
+        if entry is None:
+            _timings[key] = [1, seconds, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+    timings = getattr(_run, "timings", None)
+    if timings is not None:
+        timings.append((name, labels, seconds))
+    if METRICS_LOG:
+        _log("span", name, labels, seconds=round(seconds, 6))
+
+
+# Function to add to a counter
+def count(name, value=1, **labels):
+    if not METRICS_ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+    if METRICS_LOG:
+        _log("counter", name, labels, value=value)
+
+
+class _Span:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        labels = self.labels if exc_type is None else {**self.labels, "error": exc_type.__name__}
+        record_timing(self.name, time.perf_counter() - self.start, **labels)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+# Function to time a block: `with span("map.render"): ...`
+def span(name, **labels):
+    if not METRICS_ENABLED:
+        return _NOOP_SPAN
+    return _Span(name, labels)
+
+
+# Function to expose the hit/miss counts of a cache to the metrics
+def register_cache(name, stats):
+    with _lock:
+        _caches[name] = stats
+
+
+def cache_stats():
+    with _lock:
+        caches = dict(_caches)
+    return {name: stats() for name, stats in caches.items()}
+
+
+# Function to start collecting the stage timings of one Streamlit rerun
+def begin_run():
+    _run.timings = []
+    _run.caches = cache_stats() if METRICS_ENABLED else {}
+    _run.start = time.perf_counter()
+
+
+# Function to get the timings and cache activity of the current rerun so far
+def run_report():
+    if getattr(_run, "timings", None) is None:
+        return {"seconds": 0.0, "timings": [], "caches": {}}
+    caches = {}
+    for name, stats in cache_stats().items():
+        before = _run.caches.get(name, {"hits": 0, "misses": 0})
+        hits, misses = stats["hits"] - before["hits"], stats["misses"] - before["misses"]
+        caches[name] = {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses) if hits + misses else None}
+    return {"seconds": time.perf_counter() - _run.start, "timings": list(_run.timings), "caches": caches}
+
+
+# Function to get the totals since startup
+def snapshot():
+    with _lock:
+        timings = {key: list(value) for key, value in _timings.items()}
+        counters = dict(_counters)
+    return {"timings": timings, "counters": counters, "caches": cache_stats()}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+# Function to render every metric in the Prometheus text exposition format
+def prometheus_text():
+    data = snapshot()
+    lines = [
+        "# HELP sedvt_stage_seconds Time spent in instrumented stages.",
+        "# TYPE sedvt_stage_seconds summary",
+    ]
+    for (name, labels), (n, total, _) in sorted(data["timings"].items()):
+        pairs = (("stage", name), *labels)
+        lines.append(f"sedvt_stage_seconds_count{_labels(pairs)} {n}")
+        lines.append(f"sedvt_stage_seconds_sum{_labels(pairs)} {total:.6f}")
+    lines += ["# HELP sedvt_stage_seconds_max Slowest run of each stage.", "# TYPE sedvt_stage_seconds_max gauge"]
+    for (name, labels), (_, _, slowest) in sorted(data["timings"].items()):
+        lines.append(f"sedvt_stage_seconds_max{_labels((('stage', name), *labels))} {slowest:.6f}")
+    lines += ["# HELP sedvt_events_total Counted events.", "# TYPE sedvt_events_total counter"]
+    for (name, labels), value in sorted(data["counters"].items()):
+        lines.append(f"sedvt_events_total{_labels((('event', name), *labels))} {value}")
+    lines += ["# HELP sedvt_cache_requests_total Cache lookups by result.", "# TYPE sedvt_cache_requests_total counter"]
+    for name, stats in sorted(data["caches"].items()):
+        for result in ("hits", "misses"):
+            lines.append(f"sedvt_cache_requests_total{_labels((('cache', name), ('result', result)))} {stats[result]}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+# Function to serve /metrics for Prometheus from a daemon thread (once per process). Returns
+# None when the port cannot be bound, e.g. because another worker process already serves it.
+def start_metrics_server(port, host="0.0.0.0"):
+    global _server, _server_started
+    with _lock:
+        if _server_started:
+            return _server
+        _server_started = True
+        try:
+            _server = HTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            logger.warning("Metrics server not started on %s:%s: %s", host, port, e)
+            return None
+    threading.Thread(target=_server.serve_forever, name="sedvt-metrics", daemon=True).start()
+    return _server
@@ -0,0 +1,275 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import closing
+
+from utils.chat_client import ChatClientError, get_client
+from utils.instrumentation import count, record_timing
+
+# Requests allowed in flight to the LLM provider at once, across all sessions
+MAX_CONCURRENCY = int(os.environ.get("SEDVT_LLM_CONCURRENCY", "4"))
+# Provider quota: requests per minute, and how many may go out back to back
+RATE_PER_MINUTE = float(os.environ.get("SEDVT_LLM_RATE_PER_MINUTE", "30"))
+BURST = int(os.environ.get("SEDVT_LLM_BURST", str(MAX_CONCURRENCY)))
+# Seconds a request may wait for its turn before the user is told to try again
+QUEUE_TIMEOUT = float(os.environ.get("SEDVT_LLM_QUEUE_TIMEOUT", "120"))
+MAX_QUEUED_PER_SESSION = int(os.environ.get("SEDVT_LLM_SESSION_QUEUE", "2"))
+# 429s from the provider are retried through the queue after pausing every request
+RATE_LIMIT_RETRIES = int(os.environ.get("SEDVT_LLM_RATE_LIMIT_RETRIES", "3"))
+RATE_LIMIT_BACKOFF = 1.0
+POLL_SECONDS = 0.25  # How often a waiting request checks whether it was cancelled
+
+# Priorities: interactive chat turns are always admitted before background work
+INTERACTIVE = 0
+BACKGROUND = 1
+
+
+class AdmissionError(ChatClientError):
+    pass
+
+
+class RequestCancelled(AdmissionError):
+    pass
+
+
+# Token bucket matching the provider's request quota
+class TokenBucket:
+    def __init__(self, rate_per_minute, capacity):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Function to get how long until a token is available (0 if one is available now)
+    def wait_time(self, now):
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    # Function to hold back every request for `seconds`, e.g. after the provider answered 429
+    def pause(self, seconds):
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+
+class _Ticket:
+    __slots__ = ("session", "priority", "enqueued")
+
+    def __init__(self, session, priority):
+        self.session = session
+        self.priority = priority
+        self.enqueued = time.monotonic()
+
+
+# Process-wide admission control for LLM requests: at most `concurrency` requests in flight,
+# started no faster than the token bucket allows. Waiting requests are served by priority
+# and, within a priority, round-robin across sessions, so one busy session cannot starve
+# the others.
+class LLMScheduler:
+    def __init__(self, concurrency=MAX_CONCURRENCY, rate_per_minute=RATE_PER_MINUTE, burst=BURST,
+                 queue_timeout=QUEUE_TIMEOUT, max_queued_per_session=MAX_QUEUED_PER_SESSION):
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(rate_per_minute, burst)
+        self.queue_timeout = queue_timeout
+        self.max_queued_per_session = max_queued_per_session
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.timed_out = 0
+        self._queues = {}  # priority -> OrderedDict(session -> deque of tickets), in serving order
+        self._cond = threading.Condition()
+
+    def _sessions(self, priority):
+        return self._queues.setdefault(priority, OrderedDict())
+
+    def _head(self):
+        for priority in sorted(self._queues):
+            sessions = self._queues[priority]
+            if sessions:
+                return next(iter(sessions.values()))[0]
+        return None
+
+    def _remove(self, ticket):
+        sessions = self._sessions(ticket.priority)
+        queue = sessions.get(ticket.session)
+        if queue is not None and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del sessions[ticket.session]
+            return True
+        return False
+
+    # Function to get how many requests will be admitted before this one
+    def _position(self, ticket):
+        ahead = 0
+        for priority in sorted(self._queues):
+            sessions = self._queues[priority]
+            if priority < ticket.priority:
+                ahead += sum(len(queue) for queue in sessions.values())
+                continue
+            if priority > ticket.priority:
+                break
+            # Round-robin: sessions before ours get one more turn than ours in our round
+            rank = sessions[ticket.session].index(ticket)
+            before = True
+            for session, queue in sessions.items():
+                if session == ticket.session:
+                    before = False
+                    ahead += rank
+                else:
+                    ahead += min(len(queue), rank + 1 if before else rank)
+        return ahead
+
+    def _admit(self, ticket, now):
+        self._remove(ticket)
+        sessions = self._sessions(ticket.priority)
+        if ticket.session in sessions:
+            sessions.move_to_end(ticket.session)  # Its next request waits for the other sessions
+        self.active += 1
+        self.admitted += 1
+        self.bucket.take()
+        record_timing("llm.queue_wait", now - ticket.enqueued, priority=ticket.priority)
+
+    # Function to wait for a turn. `on_wait(position)` is called whenever the queue position
+    # changes, and the wait ends with RequestCancelled as soon as `cancelled()` is true.
+    def acquire(self, session="default", priority=INTERACTIVE, on_wait=None, cancelled=None):
+        ticket = _Ticket(session, priority)
+        with self._cond:
+            queue = self._sessions(priority).setdefault(session, deque())
+            if len(queue) >= self.max_queued_per_session:
+                self.rejected += 1
+                count("llm.admission", result="rejected")
+                raise AdmissionError("You already have requests waiting, please wait for them to finish.")
+            queue.append(ticket)
+        deadline = ticket.enqueued + self.queue_timeout
+        last_position = None
+        try:
+            while True:
+                with self._cond:
+                    now = time.monotonic()
+                    delay = POLL_SECONDS
+                    if self._head() is ticket and self.active < self.concurrency:
+                        delay = self.bucket.wait_time(now)
+                        if delay <= 0:
+                            self._admit(ticket, now)
+                            count("llm.admission", result="admitted")
+                            return ticket
+                    if now >= deadline:
+                        self.timed_out += 1
+                        count("llm.admission", result="timeout")
+                        raise AdmissionError("The assistant is busy right now, please try again in a moment.")
+                    position = self._position(ticket)
+                    self._cond.wait(min(delay, POLL_SECONDS, deadline - now))
+                if cancelled is not None and cancelled():
+                    self.cancelled += 1
+                    count("llm.admission", result="cancelled")
+                    raise RequestCancelled("Request cancelled")
+                if on_wait is not None and position != last_position:
+                    on_wait(position)
+                    last_position = position
+        except BaseException:
+            with self._cond:
+                if self._remove(ticket):
+                    self._cond.notify_all()
+            raise
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    # Function to slow every request down after the provider answered 429
+    def backoff(self, seconds):
+        with self._cond:
+            self.bucket.pause(seconds)
+        count("llm.backoff")
+
+    def stats(self):
+        with self._cond:
+            queued = sum(len(queue) for sessions in self._queues.values() for queue in sessions.values())
+            return {
+                "active": self.active,
+                "queued": queued,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "cancelled": self.cancelled,
+                "timed_out": self.timed_out,
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+# Function to get the process-wide scheduler built from the environment
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler()
+        return _scheduler
+
+
+def _retry_delay(error, attempt):
+    return error.retry_after if error.retry_after is not None else RATE_LIMIT_BACKOFF * 2 ** attempt
+
+
+# Function to stream a completion once the scheduler admits it. Streaming stops (and the
+# slot is freed) as soon as `cancelled()` turns true or the consumer closes the generator.
+def scheduled_stream(messages, session="default", priority=INTERACTIVE, on_wait=None, cancelled=None,
+                     client=None, **kwargs):
+    scheduler = get_scheduler()
+    client = client or get_client()
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        scheduler.acquire(session, priority, on_wait, cancelled)
+        try:
+            with closing(client.stream(messages, **kwargs)) as stream:
+                for chunk in stream:
+                    if cancelled is not None and cancelled():
+                        count("llm.admission", result="cancelled")
+                        return
+                    yield chunk
+            return
+        except ChatClientError as e:
+            if e.status_code != 429 or attempt == RATE_LIMIT_RETRIES:
+                raise
+            scheduler.backoff(_retry_delay(e, attempt))
+        finally:
+            scheduler.release()
+
+
+# Function to get a whole completion once the scheduler admits it
+def scheduled_complete(messages, session="default", priority=INTERACTIVE, on_wait=None, cancelled=None,
+                       client=None, **kwargs):
+    scheduler = get_scheduler()
+    client = client or get_client()
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        scheduler.acquire(session, priority, on_wait, cancelled)
+        try:
+            return client.complete(messages, **kwargs)
+        except ChatClientError as e:
+            if e.status_code != 429 or attempt == RATE_LIMIT_RETRIES:
+                raise
+            scheduler.backoff(_retry_delay(e, attempt))
+        finally:
+            scheduler.release()
+
+
+# Function to identify the current Streamlit session and tell when it has disconnected
+def streamlit_session():
+    from streamlit import runtime
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    if ctx is None or not runtime.exists():
+        return threading.current_thread().name, None
+    session_id = ctx.session_id
+    return session_id, lambda: not runtime.get_instance().is_active_session(session_id)
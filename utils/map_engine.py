@@ -0,0 +1,267 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.artifact_cache import ArtifactCache
+from utils.data_loader import STATE_COLUMN, load_coordinates
+from utils.instrumentation import span
+
+# Optional GeoJSON file with state/district boundaries and the property holding the region name
+BOUNDARIES_PATH = os.environ.get("SEDVT_BOUNDARIES_PATH")
+BOUNDARIES_KEY = os.environ.get("SEDVT_BOUNDARIES_KEY", "name")
+
+MAP_CENTER = [20.5937, 78.9629]
+
+# Columns shown on the Geographical Data page
+MAP_COLUMNS = ['2011-12-INC', '2011-LIT', '2011-POP', '2011-SEX_RATIO', '2011-UNEMP', '2011-Poverty']
+
+# State coordinates for mapping
+STATE_COORDINATES = {
+    'Andaman and Nicobar Islands': [11.66702557, 92.73598262],
+    'Andhra Pradesh': [15.9129, 79.7400],
+    'Arunachal Pradesh': [28.2180, 94.7278],
+    'Assam': [26.2006, 92.9376],
+    'Bihar': [25.0961, 85.3131],
+    'Chandigarh': [30.7333, 76.7794],
+    'Chhattisgarh': [21.2787, 81.8661],
+    'Delhi': [28.6139, 77.2090],
+    'Goa': [15.2993, 74.1240],
+    'Gujarat': [22.2587, 71.1924],
+    'Haryana': [29.0588, 76.0856],
+    'Himachal Pradesh': [31.1048, 77.1734],
+    'Jammu and Kashmir': [33.7782, 76.5762],
+    'Jharkhand': [23.6102, 85.2799],
+    'Karnataka': [15.3173, 75.7139],
+    'Kerala': [10.8505, 76.2711],
+    'Madhya Pradesh': [22.9734, 78.6569],
+    'Maharashtra': [19.7515, 75.7139],
+    'Manipur': [24.6637, 93.9063],
+    'Meghalaya': [25.4670, 91.3662],
+    'Mizoram': [23.1645, 92.9376],
+    'Nagaland': [26.1584, 94.5624],
+    'Odisha': [20.9517, 85.0985],
+    'Puducherry': [11.9416, 79.8083],
+    'Punjab': [31.1471, 75.3412],
+    'Rajasthan': [27.0238, 74.2179],
+    'Sikkim': [27.5330, 88.5122],
+    'Tamil Nadu': [11.1271, 78.6569],
+    'Tripura': [23.9408, 91.9882],
+    'Uttar Pradesh': [26.8467, 80.9462],
+    'Uttarakhand': [30.0668, 79.0193],
+    'West Bengal': [22.9868, 87.8550]
+}
+
+# Rendered map HTML and per-column GeoJSON, shared across sessions
+map_cache = ArtifactCache("maps", max_items=32)
+
+# Viewport GeoJSON by (version, column, snapped bounds, zoom, boundaries), shared across sessions
+MAX_VIEWPORTS = 256
+_viewports = OrderedDict()
+_viewports_lock = threading.Lock()
+
+_HEX = np.array([f"{i:02x}" for i in range(256)], dtype=object)
+
+
+# Function to map a whole column of values to blue (low) .. red (high) colors, optionally
+# on a fixed value range (so that a subset is colored like the full column)
+def values_to_colors(values, min_val=None, max_val=None):
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return np.array([], dtype=object)
+    min_val = np.nanmin(values) if min_val is None else min_val
+    max_val = np.nanmax(values) if max_val is None else max_val
+    value_range = max_val - min_val
+    norm = np.clip((values - min_val) / value_range, 0, 1) if value_range else np.zeros_like(values)
+    red = (255 * norm).astype(np.int64)
+    blue = (255 * (1 - norm)).astype(np.int64)
+    return "#" + _HEX[red] + "00" + _HEX[blue]
+
+
+_boundaries = None
+
+
+# Function to load the optional boundary polygons once
+def load_boundaries(path=BOUNDARIES_PATH):
+    global _boundaries
+    if path is None:
+        return None
+    if _boundaries is None:
+        with open(path, encoding="utf-8") as f:
+            _boundaries = json.load(f)
+    return _boundaries
+
+
+# Function to build a GeoJSON FeatureCollection for one metric
+def build_geojson(df, column_name, boundaries=None, key=BOUNDARIES_KEY):
+    names = df[STATE_COLUMN].astype(str).to_numpy()
+    values = df[column_name].to_numpy()
+    colors = values_to_colors(values)
+    by_name = {name: (value.item(), color) for name, value, color in zip(names, values, colors)}
+
+    if boundaries is not None:
+        features = []
+        for feature in boundaries["features"]:
+            name = feature["properties"].get(key)
+            if name not in by_name:
+                continue
+            value, color = by_name[name]
+            features.append({
+                "type": "Feature",
+                "geometry": feature["geometry"],
+                "properties": {"name": name, "value": value, "color": color},
+            })
+    else:
+        coordinates = {**STATE_COORDINATES, **load_coordinates()}
+        features = [
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [lon, lat]},
+                "properties": {"name": name, "value": value, "color": color},
+            }
+            for name, (value, color) in by_name.items()
+            if name in coordinates
+            for lat, lon in [coordinates[name]]
+        ]
+
+    return {"type": "FeatureCollection", "features": features}
+
+
+def _feature_style(feature):
+    color = feature["properties"]["color"]
+    return {"color": color, "fillColor": color, "fillOpacity": 0.7, "weight": 1,
+            "radius": feature["properties"].get("radius", 10)}
+
+
+# Function to get the GeoJSON for one column, keyed by the column's content so that a new
+# dataset version only rebuilds the layers whose values actually changed
+def cached_geojson(df, column_name, boundaries=None):
+    import pandas as pd
+
+    content = pd.util.hash_pandas_object(df[[STATE_COLUMN, column_name]], index=False).to_numpy()
+    content_hash = hashlib.sha1(content.tobytes()).hexdigest()[:16]
+    key = ("geojson", content_hash, column_name, BOUNDARIES_PATH if boundaries is not None else None)
+    def build():
+        with span("map.geojson", column=column_name):
+            return json.dumps(build_geojson(df, column_name, boundaries)).encode("utf-8")
+
+    return json.loads(map_cache.get_or_create(key, build))
+
+
+# Function to create a single map with one switchable GeoJSON layer per column
+def create_map(df, columns, boundaries=None):
+    import folium  # Deferred: only needed when the rendered map is not cached
+
+    m = folium.Map(location=MAP_CENTER, zoom_start=5)
+
+    for i, column_name in enumerate(columns):
+        folium.GeoJson(
+            cached_geojson(df, column_name, boundaries),
+            name=column_name,
+            show=(i == 0),
+            marker=folium.CircleMarker(radius=10, fill=True),
+            style_function=_feature_style,
+            tooltip=folium.GeoJsonTooltip(fields=["name", "value"], aliases=["State/UT", column_name]),
+        ).add_to(m)
+
+    folium.LayerControl(collapsed=False).add_to(m)
+    return m
+
+
+# Function to get the fully rendered map HTML, built only on a cache miss
+def map_html(df, version, columns, boundaries=None):
+    key = ("html", version, tuple(columns), BOUNDARIES_PATH if boundaries is not None else None)
+    def build():
+        with span("map.render", layers=len(columns)):
+            return create_map(df, columns, boundaries).get_root().render().encode("utf-8")
+
+    return map_cache.get_or_create(key, build).decode("utf-8")
+
+
+# Function to create the empty base map that viewport layers are drawn on
+def base_map():
+    import folium
+
+    return folium.Map(location=MAP_CENTER, zoom_start=5)
+
+
+# Function to build the features for the visible part of the map: the polygons in view when
+# boundaries are loaded and few enough are visible, otherwise the regions in view clustered
+# for the current zoom level. Colors use the full column's range so they stay stable while panning.
+def viewport_features(df, version, column_name, bounds, zoom, boundaries=None):
+    from utils.spatial_index import MAX_FEATURES, get_spatial_index
+
+    index = get_spatial_index(df, version, boundaries)
+    values = df[column_name].to_numpy(dtype=np.float64)
+    min_val, max_val = np.nanmin(values), np.nanmax(values)
+
+    with span("map.viewport", column=column_name):
+        polygons = index.visible_polygons(values, bounds)
+        if polygons is not None:
+            colors = values_to_colors([value for _, _, value in polygons], min_val, max_val)
+            features = [
+                {
+                    "type": "Feature",
+                    "geometry": feature["geometry"],
+                    "properties": {"name": name, "value": round(value.item(), 2), "color": color},
+                }
+                for (feature, name, value), color in zip(polygons, colors)
+            ]
+            regions = len(features)
+        else:
+            points = index.visible_points(values, bounds, zoom).nlargest(MAX_FEATURES, "count")
+            colors = values_to_colors(points["value"], min_val, max_val)
+            features = [
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": [lon, lat]},
+                    "properties": {
+                        "name": name,
+                        "value": round(value, 2),
+                        "color": color,
+                        "radius": min(8 + 4 * np.log10(count), 24),
+                    },
+                }
+                for name, lat, lon, count, value, color in zip(
+                    points["name"], points["lat"], points["lon"], points["count"], points["value"], colors
+                )
+            ]
+            regions = int(points["count"].sum())
+    return features, {"features": len(features), "regions": regions}
+
+
+# Function to get the map layer for a viewport. The bounds are widened to whole grid cells
+# and the features cached, so panning within a cell or back to an earlier view is free.
+def viewport_layer(df, version, column_name, bounds, zoom, boundaries=None):
+    import folium
+    from utils.spatial_index import snap_bounds
+
+    bounds = snap_bounds(bounds)
+    key = (version, column_name, bounds, zoom, BOUNDARIES_PATH if boundaries is not None else None)
+    with _viewports_lock:
+        cached = _viewports.get(key)
+        if cached is not None:
+            _viewports.move_to_end(key)
+    if cached is None:
+        features, shown = viewport_features(df, version, column_name, bounds, zoom, boundaries)
+        # Kept as JSON: folium adds ids to the features it is given, so each rerun parses its own copy
+        cached = (json.dumps({"type": "FeatureCollection", "features": features}), shown)
+        with _viewports_lock:
+            _viewports[key] = cached
+            while len(_viewports) > MAX_VIEWPORTS:
+                _viewports.popitem(last=False)
+    geojson, shown = cached
+
+    # Folium elements are rebuilt per rerun: st_folium mutates them while rendering
+    layer = folium.FeatureGroup(name=column_name)
+    if shown["features"]:
+        folium.GeoJson(
+            geojson,
+            marker=folium.CircleMarker(fill=True),
+            style_function=_feature_style,
+            tooltip=folium.GeoJsonTooltip(fields=["name", "value"], aliases=["Region", column_name]),
+        ).add_to(layer)
+    return layer, shown
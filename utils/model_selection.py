@@ -0,0 +1,162 @@
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from utils.artifact_cache import ArtifactCache
+from utils.data_loader import STATE_COLUMN
+from utils.model_registry import FEATURES_2021, TARGET
+
+# Candidate estimators compared by cross-validation: name -> (kind, parameter)
+CANDIDATES = {
+    "Linear": ("polynomial", 1),
+    "Polynomial (degree 2)": ("polynomial", 2),
+    "Polynomial (degree 3)": ("polynomial", 3),
+    "Ridge (alpha=0.1)": ("ridge", 0.1),
+    "Ridge (alpha=1)": ("ridge", 1.0),
+    "Ridge (alpha=10)": ("ridge", 10.0),
+    "Lasso (alpha=0.01)": ("lasso", 0.01),
+    "Lasso (alpha=0.1)": ("lasso", 0.1),
+    "Random Forest": ("random_forest", 200),
+    "Gradient Boosting": ("gradient_boosting", None),
+}
+
+# Prediction problems offered for model selection
+TASKS = {
+    "Income (2011-12-INC)": "2011-12-INC",
+    "Poverty (2011-Poverty)": TARGET,
+}
+
+N_SPLITS = 5
+N_REPEATS = 3
+MAX_JOBS = 8  # Jobs kept for their leaderboards; finished ones are dropped oldest first
+
+cv_cache = ArtifactCache("cv", max_items=256, max_disk_bytes=16 * 1024 * 1024)
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+# Function to get the feature columns for a task: never the target itself or a column
+# derived from it (e.g. "Predicted 2011-Poverty")
+def task_features(df, target_column):
+    columns = FEATURES_2021 if target_column == TARGET else df.columns
+    return [column for column in columns if column != STATE_COLUMN and target_column not in column]
+
+
+# Function to get the feature matrix and target for a task
+def task_data(df, target_column):
+    X = df[task_features(df, target_column)]
+    return X.to_numpy(dtype=np.float64), df[target_column].to_numpy(dtype=np.float64)
+
+
+# Function to build an unfitted estimator for a candidate name
+def make_candidate(name):
+    # Deferred: sklearn estimators are only needed once a run starts
+    from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+    from sklearn.linear_model import Lasso, LinearRegression, Ridge
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+
+    kind, param = CANDIDATES[name]
+    if kind == "polynomial":
+        if param == 1:
+            return LinearRegression()
+        return make_pipeline(PolynomialFeatures(degree=param), LinearRegression())
+    if kind == "ridge":
+        return make_pipeline(StandardScaler(), PolynomialFeatures(degree=2), Ridge(alpha=param))
+    if kind == "lasso":
+        return make_pipeline(StandardScaler(), Lasso(alpha=param, max_iter=10000))
+    if kind == "random_forest":
+        return RandomForestRegressor(n_estimators=param, random_state=42)
+    return GradientBoostingRegressor(random_state=42)
+
+
+# Function to cross-validate one candidate (runs inside a worker process)
+def _score_candidate(name, X, y):
+    from sklearn.model_selection import RepeatedKFold, cross_validate
+
+    cv = RepeatedKFold(n_splits=min(N_SPLITS, len(y)), n_repeats=N_REPEATS, random_state=42)
+    scores = cross_validate(make_candidate(name), X, y, cv=cv, scoring=("neg_mean_squared_error", "r2"))
+    mse = -scores["test_neg_mean_squared_error"]
+    return {
+        "Model": name,
+        "MSE": float(mse.mean()),
+        "MSE Std": float(mse.std()),
+        "R²": float(np.mean(scores["test_r2"])),
+        "Folds": int(len(mse)),
+    }
+
+
+# Background model-selection run whose results grow as candidates finish
+class SelectionJob:
+    def __init__(self, version, target_column, features):
+        self.version = version
+        self.target_column = target_column
+        self.features = tuple(features)
+        self.results = []
+        self.total = len(CANDIDATES)
+        self.done = False
+        self.error = None
+        self._lock = threading.Lock()
+
+    def _add(self, result):
+        with self._lock:
+            self.results.append(result)
+
+    def leaderboard(self):
+        with self._lock:
+            board = pd.DataFrame(self.results, columns=["Model", "MSE", "MSE Std", "R²", "Folds"])
+        return board.sort_values("MSE").reset_index(drop=True)
+
+    def run(self, X, y):
+        try:
+            pending = []
+            for name in CANDIDATES:
+                cached = cv_cache.get((self.version, self.target_column, self.features, name, N_SPLITS, N_REPEATS))
+                if cached is not None:
+                    self._add(json.loads(cached))
+                else:
+                    pending.append(name)
+
+            if pending:
+                # Spawned, not forked: the app's threads (and their locks) must not be copied
+                with ProcessPoolExecutor(max_workers=min(len(pending), os.cpu_count() or 1),
+                                         mp_context=multiprocessing.get_context("spawn")) as pool:
+                    futures = [pool.submit(_score_candidate, name, X, y) for name in pending]
+                    for future in as_completed(futures):
+                        result = future.result()
+                        key = (self.version, self.target_column, self.features, result["Model"], N_SPLITS, N_REPEATS)
+                        cv_cache.put(key, json.dumps(result).encode("utf-8"))
+                        self._add(result)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+
+
+# Function to look up the job for a dataset version and target, if one was started
+def get_job(version, target_column):
+    return _jobs.get((version, target_column))
+
+
+# Function to start (or reuse) a background cross-validation run
+def start_selection(df, version, target_column):
+    key = (version, target_column)
+    with _jobs_lock:
+        job = _jobs.get(key)
+        if job is None or job.error is not None:
+            job = SelectionJob(version, target_column, task_features(df, target_column))
+            X, y = task_data(df, target_column)
+            threading.Thread(target=job.run, args=(X, y), daemon=True).start()
+            _jobs.pop(key, None)
+            _jobs[key] = job
+            # Running jobs are kept, so a page following one never loses it
+            finished = [old for old, old_job in _jobs.items() if old_job.done]
+            for old in finished[:max(0, len(_jobs) - MAX_JOBS)]:
+                del _jobs[old]
+    return job
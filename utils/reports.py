@@ -0,0 +1,465 @@
+import hashlib
+import html
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from utils.data_loader import CACHE_DIR, SCHEMA, STATE_COLUMN, data_version, load_coordinates, load_dataset
+from utils.instrumentation import count, span
+
+FORMATS = ["html", "png", "pdf"]
+REPORT_DIR = os.path.join(CACHE_DIR, "reports")
+BUNDLE_DIR = os.path.join(REPORT_DIR, "bundles")  # One rendered bundle per region input digest
+LAST_EXPORT = os.path.join(REPORT_DIR, "last_export.json")
+WORKERS = int(os.environ.get("SEDVT_REPORT_WORKERS", "0")) or os.cpu_count() or 1
+BATCH_REGIONS = 8  # Regions rendered per pool task
+MAX_BACKGROUND_POINTS = 5000  # Other regions drawn on each locator map
+RENDER_VERSION = 1  # Bump when the report layout changes, so every bundle is rendered again
+SHEET_DPI = 100
+MAX_JOBS = 8  # Export jobs (and their ZIPs) kept; finished ones are dropped oldest first
+
+INDICATORS = ["INC", "LIT", "POP", "SEX_RATIO", "UNEMP", "Poverty"]
+INDICATOR_LABELS = {
+    "INC": "Per-capita income (₹)",
+    "LIT": "Literacy rate (%)",
+    "POP": "Population (thousands)",
+    "SEX_RATIO": "Sex ratio (F per 1,000 M)",
+    "UNEMP": "Unemployment (per 1,000)",
+    "Poverty": "Poverty rate (%)",
+}
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+_export_ids = itertools.count()
+_background = None  # (lats, lons) of the locator-map background, set in every worker
+
+
+# Function to turn a region name into a file-system friendly folder name
+def slugify(name):
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "region"
+
+
+def _number(value):
+    value = float(value)
+    return None if np.isnan(value) else round(value, 6)
+
+
+# Everything the reports show, as arrays over all regions: the indicator values, the pooled
+# model's predictions, each region's own trend forecasts and its anomaly flags. A region's
+# payload is built from them only when it is needed.
+class ReportInputs:
+    def __init__(self, df, version):
+        from utils.anomaly import get_anomalies
+        from utils.forecasting import FORECAST_YEARS, get_forecasts
+        from utils.map_engine import STATE_COORDINATES
+        from utils.model_registry import get_models, predict
+
+        self.names = df[STATE_COLUMN].astype(str).to_numpy()
+        self.values = {column: df[column].to_numpy(dtype=np.float64) for column in SCHEMA}
+        predictions = predict(get_models(df, version), df)
+        self.predictions = {column: predictions[column].to_numpy(dtype=np.float64) for column in predictions.columns}
+
+        # Forecasts hold one row per (region, indicator), regions in dataset order
+        forecasts = get_forecasts(df, version)
+        self.trend_indicators = list(forecasts["indicator"].iloc[:forecasts["indicator"].nunique()])
+        self.trend_columns = ["slope_per_year", *(f"forecast_{year}" for year in FORECAST_YEARS)]
+        self.trends = {
+            column: forecasts[column].to_numpy(dtype=np.float64).reshape(len(self.names), -1)
+            for column in self.trend_columns
+        }
+
+        anomalies = get_anomalies(df, version).set_index(STATE_COLUMN).reindex(self.names)
+        self.anomaly_scores = anomalies["Anomaly Score"].to_numpy(dtype=np.float64)
+        self.flagged = anomalies["Flagged"].fillna(False).to_numpy(dtype=bool)
+        self.unusual = anomalies["Most Unusual Indicator"].astype(str).to_numpy()
+
+        coordinates = {**STATE_COORDINATES, **load_coordinates()}
+        self.locations = np.array([coordinates.get(name, (np.nan, np.nan)) for name in self.names], dtype=np.float64)
+
+    def __len__(self):
+        return len(self.names)
+
+    def payload(self, i):
+        location = self.locations[i]
+        return {
+            "name": self.names[i],
+            "values": {column: _number(values[i]) for column, values in self.values.items()},
+            "predictions": {column: _number(values[i]) for column, values in self.predictions.items()},
+            "trends": {
+                indicator: {column: _number(self.trends[column][i, j]) for column in self.trend_columns}
+                for j, indicator in enumerate(self.trend_indicators)
+            },
+            "anomaly": {
+                "score": _number(self.anomaly_scores[i]),
+                "flagged": bool(self.flagged[i]),
+                "indicator": self.unusual[i],
+            },
+            "location": None if np.isnan(location).any() else [float(location[0]), float(location[1])],
+        }
+
+    # Function to pick the (sampled) positions of all regions drawn behind each locator map
+    def background(self):
+        located = self.locations[~np.isnan(self.locations).any(axis=1)]
+        if len(located) > MAX_BACKGROUND_POINTS:
+            located = located[np.random.default_rng(0).choice(len(located), MAX_BACKGROUND_POINTS, replace=False)]
+        return located[:, 0].copy(), located[:, 1].copy()
+
+
+# Function to get the digest of everything a region's bundle is rendered from
+def payload_digest(payload, formats, background_digest):
+    text = json.dumps([RENDER_VERSION, sorted(formats), background_digest, payload], sort_keys=True)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _init_worker(background):
+    global _background
+    _background = background
+
+
+def _years(indicator):
+    from utils.forecasting import split_column, vintage_year
+
+    return sorted((vintage_year(vintage), column) for column, (vintage, name) in
+                  ((column, split_column(column)) for column in SCHEMA) if name == indicator)
+
+
+# Function to draw a region's report sheet: a locator map, the trend of every indicator
+# with its forecasts, and the model predictions and anomaly flags
+def draw_sheet(payload):
+    from matplotlib.figure import Figure  # Deferred: only needed in the render workers
+
+    fig = Figure(figsize=(11.69, 8.27))  # A4 landscape
+    grid = fig.add_gridspec(3, 3, hspace=0.55, wspace=0.3)
+    fig.suptitle(payload["name"], fontsize=16, fontweight="bold")
+
+    ax = fig.add_subplot(grid[0, 0])
+    if _background is not None:
+        ax.scatter(_background[1], _background[0], s=2, color="lightgray")
+    if payload["location"] is not None:
+        ax.scatter([payload["location"][1]], [payload["location"][0]], s=120, color="crimson", marker="*")
+    ax.set_xlim(68, 98)
+    ax.set_ylim(6, 37.5)
+    ax.set_aspect("equal")
+    ax.set_xticks([])
+    ax.set_yticks([])
+    ax.set_title("Location", fontsize=10)
+
+    slots = [grid[0, 1], grid[0, 2], grid[1, 0], grid[1, 1], grid[1, 2], grid[2, 0]]
+    for slot, indicator in zip(slots, INDICATORS):
+        ax = fig.add_subplot(slot)
+        points = [(year, payload["values"][column]) for year, column in _years(indicator)]
+        ax.plot([y for y, _ in points], [v for _, v in points], "o-", color="royalblue")
+        trend = payload["trends"].get(indicator, {})
+        forecast = [(int(key.split("_")[1]), value) for key, value in trend.items() if key.startswith("forecast_")]
+        if forecast and points[-1][1] is not None:
+            ax.plot([points[-1][0], *(y for y, _ in forecast)], [points[-1][1], *(v for _, v in forecast)],
+                    "o--", color="darkorange")
+        ax.set_title(INDICATOR_LABELS[indicator], fontsize=9)
+        ax.tick_params(labelsize=7)
+
+    ax = fig.add_subplot(grid[2, 1:])
+    ax.axis("off")
+    anomaly = payload["anomaly"]
+    lines = [
+        f"Predicted 2021 poverty (pooled model): {_fmt(payload['predictions'].get('Predicted 2021-Poverty'))}%",
+        f"Predicted 2031 poverty (pooled model): {_fmt(payload['predictions'].get('Predicted 2031-Poverty'))}%",
+        f"Anomaly score: {_fmt(anomaly['score'], 3)}" + ("  (FLAGGED)" if anomaly["flagged"] else ""),
+        f"Most unusual indicator: {anomaly['indicator']}",
+    ]
+    ax.text(0, 1, "\n".join(lines), va="top", fontsize=10, family="monospace")
+    return fig
+
+
+def _fmt(value, digits=2):
+    return "n/a" if value is None else f"{value:,.{digits}f}"
+
+
+def _table(rows):
+    cells = "".join(f"<tr><th>{html.escape(str(k))}</th><td>{html.escape(str(v))}</td></tr>" for k, v in rows)
+    return f"<table>{cells}</table>"
+
+
+# Function to write the HTML page of a region's report
+def report_html(payload, image):
+    anomaly = payload["anomaly"]
+    trends = [
+        (f"{indicator} {key.replace('_', ' ')}", _fmt(value))
+        for indicator, trend in payload["trends"].items() for key, value in trend.items()
+    ]
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{html.escape(payload['name'])}</title>
+<style>body{{font-family:sans-serif;margin:2em}}table{{border-collapse:collapse;margin-bottom:1.5em}}
+th,td{{border:1px solid #ccc;padding:4px 8px;text-align:left}}.flag{{color:#b00020;font-weight:bold}}</style></head>
+<body><h1>{html.escape(payload['name'])}</h1>
+<p><a href="../../index.html">All regions</a></p>
+{f'<img src="{image}" style="max-width:100%">' if image else ''}
+<h2>Indicators</h2>{_table((column, _fmt(value)) for column, value in payload['values'].items())}
+<h2>Predictions</h2>{_table((column, _fmt(value)) for column, value in payload['predictions'].items())}
+<h2>Trend forecasts</h2>{_table(trends)}
+<h2>Anomaly flags</h2>
+{'<p class="flag">Flagged as unusual</p>' if anomaly['flagged'] else '<p>Not flagged</p>'}
+{_table([("Anomaly score", _fmt(anomaly['score'], 3)), ("Most unusual indicator", anomaly['indicator'])])}
+</body></html>
+"""
+
+
+# Function to render one region's bundle as {file name: bytes}
+def render_region(payload, formats):
+    fig = draw_sheet(payload)
+    files = {}
+    png = None
+    if "png" in formats or "html" in formats:
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", dpi=SHEET_DPI)
+        png = buf.getvalue()
+    if "png" in formats:
+        files["sheet.png"] = png
+    if "pdf" in formats:
+        buf = io.BytesIO()
+        fig.savefig(buf, format="pdf")
+        files["report.pdf"] = buf.getvalue()
+    if "html" in formats:
+        import base64
+
+        image = "sheet.png" if "png" in formats else "data:image/png;base64," + base64.b64encode(png).decode("ascii")
+        files["report.html"] = report_html(payload, image).encode("utf-8")
+    fig.clear()
+    return files
+
+
+# Function to render a batch of regions in a worker, each bundle packed as a small ZIP
+def render_batch(batch, formats):
+    results = []
+    for digest, payload in batch:
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as bundle:
+            for name, data in render_region(payload, formats).items():
+                bundle.writestr(name, data)
+        results.append((digest, buf.getvalue()))
+    return results
+
+
+def _bundle_path(digest):
+    return os.path.join(BUNDLE_DIR, digest[:2], f"{digest}.zip")
+
+
+def _save_bundle(digest, data):
+    path = _bundle_path(digest)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+# Function to copy a rendered bundle into the export ZIP under the region's folder
+def _add_bundle(archive, folder, data):
+    with zipfile.ZipFile(io.BytesIO(data)) as bundle:
+        for info in bundle.infolist():
+            compression = zipfile.ZIP_DEFLATED if info.filename.endswith(".html") else zipfile.ZIP_STORED
+            archive.writestr(f"regions/{folder}/{info.filename}", bundle.read(info), compress_type=compression)
+
+
+def _index_html(entries):
+    rows = "".join(
+        f'<li><a href="regions/{folder}/report.html">{html.escape(name)}</a></li>' for name, folder in entries
+    )
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>SEDVT regional reports</title></head>
+<body><h1>SEDVT regional reports</h1><p>{len(entries):,} regions</p><ul>{rows}</ul></body></html>
+"""
+
+
+def _read_last_export():
+    try:
+        with open(LAST_EXPORT, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# Function to drop cached bundles that the latest full export no longer uses
+def _prune_bundles(keep):
+    if not os.path.isdir(BUNDLE_DIR):
+        return
+    for prefix in os.scandir(BUNDLE_DIR):
+        for entry in os.scandir(prefix.path):
+            if entry.name.endswith(".zip") and entry.name[:-4] not in keep:
+                os.remove(entry.path)
+
+
+# Bulk report export: regions are rendered on a process pool and written to the ZIP as they
+# finish. Regions whose inputs match an already rendered bundle are copied without rendering;
+# with changed_only, regions unchanged since the last export are left out of the ZIP.
+class ExportJob:
+    def __init__(self, path, formats=FORMATS, regions=None, changed_only=False, workers=WORKERS):
+        self.path = path
+        self.formats = [fmt for fmt in FORMATS if fmt in formats]
+        self.regions = set(regions) if regions else None
+        self.changed_only = changed_only
+        self.workers = workers
+        self.total = 0
+        self.rendered = 0
+        self.reused = 0
+        self.skipped = 0
+        self.seconds = 0.0
+        self.done = False
+        self.error = None
+
+    @property
+    def finished(self):
+        return self.rendered + self.reused + self.skipped
+
+    def run(self, progress=None):
+        start = time.perf_counter()
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            if not self.formats:
+                raise ValueError("Select at least one report format.")
+            with span("report.export"):
+                inputs = ReportInputs(load_dataset(), data_version())
+                rows = range(len(inputs))
+                if self.regions is not None:
+                    rows = [i for i, name in enumerate(inputs.names) if name in self.regions]
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._export(inputs, rows, tmp_path, progress)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            self.error = e
+            raise
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            self.seconds = time.perf_counter() - start
+            self.done = True
+        return self
+
+    def _export(self, inputs, rows, path, progress):
+        background = inputs.background()
+        background_digest = hashlib.sha1(np.stack(background).tobytes()).hexdigest()
+        last_export = _read_last_export()
+        folders, entries, manifest, pending = set(), [], {}, []
+        self.total = len(rows)
+
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+            for i in rows:
+                name = inputs.names[i]
+                digest = payload_digest(inputs.payload(i), self.formats, background_digest)
+                manifest[name] = digest
+                if self.changed_only and last_export.get(name) == digest:
+                    self.skipped += 1
+                    continue
+                folder = slugify(name)
+                if folder in folders:
+                    folder = f"{folder}-{i}"
+                folders.add(folder)
+                entries.append((name, folder))
+                try:
+                    with open(_bundle_path(digest), "rb") as f:
+                        _add_bundle(archive, folder, f.read())
+                    self.reused += 1
+                except OSError:
+                    pending.append((i, folder, digest))
+            count("report.regions", self.reused, result="reused")
+            count("report.regions", self.skipped, result="skipped")
+            if progress is not None:
+                progress(self)
+
+            if pending:
+                self._render(archive, inputs, pending, background, progress)
+
+            archive.writestr("index.html", _index_html(entries))
+            archive.writestr("manifest.json", json.dumps({
+                "formats": self.formats,
+                "regions": {name: manifest[name] for name, _ in entries},
+            }, indent=1))
+
+        # Remember what this export covered, so the next one can tell what changed
+        os.makedirs(REPORT_DIR, exist_ok=True)
+        with open(LAST_EXPORT, "w", encoding="utf-8") as f:
+            json.dump({**last_export, **manifest}, f)
+        if self.regions is None:
+            _prune_bundles(set(manifest.values()))
+
+    # Function to render the pending regions on a process pool, writing each bundle as soon
+    # as its batch comes back. Only a few batches per worker are in flight at a time, so
+    # memory stays flat however many regions there are.
+    def _render(self, archive, inputs, pending, background, progress):
+        folders = {digest: folder for _, folder, digest in pending}
+        batches = (
+            [(digest, inputs.payload(i)) for i, _, digest in pending[start:start + BATCH_REGIONS]]
+            for start in range(0, len(pending), BATCH_REGIONS)
+        )
+        workers = max(1, min(self.workers, -(-len(pending) // BATCH_REGIONS)))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(background,),
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            running = set()
+            while True:
+                while len(running) < workers * 2:
+                    batch = next(batches, None)
+                    if batch is None:
+                        break
+                    running.add(pool.submit(render_batch, batch, self.formats))
+                if not running:
+                    break
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    results = future.result()
+                    for digest, data in results:
+                        _save_bundle(digest, data)
+                        _add_bundle(archive, folders[digest], data)
+                    self.rendered += len(results)
+                    count("report.regions", len(results), result="rendered")
+                if progress is not None:
+                    progress(self)
+
+
+# Function to look up an export job by the key start_export returned
+def get_export(key):
+    return _jobs.get(key) if key is not None else None
+
+
+# Function to start (or reuse) a background report export and get its key. Jobs and their ZIP
+# files are keyed by what they export, so sessions asking for different regions or formats
+# never share a download. A changed_only export depends on what was exported before it,
+# so each request gets a job of its own.
+def start_export(formats=FORMATS, regions=None, changed_only=False):
+    key = (
+        data_version(),
+        tuple(fmt for fmt in FORMATS if fmt in formats),
+        tuple(sorted(regions)) if regions else None,
+        bool(changed_only),
+        next(_export_ids) if changed_only else None,
+    )
+    with _jobs_lock:
+        job = _jobs.get(key)
+        if job is None or job.error is not None:
+            digest = hashlib.sha1(json.dumps(key).encode("utf-8")).hexdigest()[:12]
+            path = os.path.join(REPORT_DIR, f"sedvt_reports_{key[0]}_{digest}.zip")
+            job = ExportJob(path, formats, regions, changed_only)
+            threading.Thread(target=_run_quietly, args=(job,), daemon=True).start()
+            _jobs.pop(key, None)
+            _jobs[key] = job
+            # Running exports are kept, so a page following one never loses it
+            finished = [old for old, old_job in _jobs.items() if old_job.done]
+            for old in finished[:max(0, len(_jobs) - MAX_JOBS)]:
+                old_job = _jobs.pop(old)
+                if os.path.exists(old_job.path):
+                    os.remove(old_job.path)
+    return key
+
+
+def _run_quietly(job):
+    try:
+        job.run()
+    except Exception:
+        pass  # Kept on job.error for the page to show
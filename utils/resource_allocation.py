@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import STATE_COLUMN
+from utils.instrumentation import span
+
+# Direction of each indicator: +1 when a higher value means more need, -1 when lower does
+SAMPLE_INDICATORS = {
+    "Unemployment Rate": 1,
+    "Urbanization Rate": -1,  # Rural areas are harder to reach with existing services
+    "Literacy Rate": -1,
+    "Average Income": -1,
+    "Population Density": 1,
+}
+DATASET_INDICATORS = {
+    "2011-UNEMP": 1,
+    "2011-Poverty": 1,
+    "2011-LIT": -1,
+    "2011-12-INC": -1,
+}
+MAX_ENGINES = 4  # Engines kept in memory, least recently used dropped first
+
+_engines = OrderedDict()
+_lock = threading.Lock()
+
+
+# Ranks regions by a weighted need score. The indicators are scaled to 0 (least need) ..
+# 1 (most need) once, so re-ranking for new weights is a single matrix-vector product.
+class AllocationEngine:
+    def __init__(self, frame, indicators, id_column):
+        self.indicators = list(indicators)
+        self.names = frame[id_column].astype(str).to_numpy()
+        values = frame[self.indicators].to_numpy(dtype=np.float64)
+        low, high = np.nanmin(values, axis=0), np.nanmax(values, axis=0)
+        scaled = (values - low) / np.where(high > low, high - low, 1.0)
+        directions = np.array([indicators[name] for name in self.indicators])
+        self.need = np.ascontiguousarray(np.where(directions > 0, scaled, 1.0 - scaled))
+        self.need = np.nan_to_num(self.need)
+
+    def __len__(self):
+        return len(self.names)
+
+    # Function to get every region's need score (0..1) for a {indicator: weight} mapping
+    def scores(self, weights):
+        w = np.array([max(float(weights.get(name, 0)), 0.0) for name in self.indicators])
+        if w.sum() == 0:
+            return np.zeros(len(self.names))
+        return self.need @ (w / w.sum())
+
+    # Function to rank regions by need and split a budget in proportion to their scores
+    def allocate(self, weights, budget=100.0, top=None):
+        with span("allocation.rank"):
+            scores = self.scores(weights)
+            total = scores.sum()
+            if top is not None and top < len(scores):
+                order = np.argpartition(-scores, top)[:top]
+                order = order[np.argsort(-scores[order], kind="stable")]
+            else:
+                order = np.argsort(-scores, kind="stable")
+            shares = scores[order] / total if total else np.zeros(len(order))
+            return pd.DataFrame({
+                "Rank": np.arange(1, len(order) + 1),
+                "Region": self.names[order],
+                "Need Score": scores[order].round(3),
+                "Share (%)": shares * 100,
+                "Allocation": shares * budget,
+            })
+
+
+# Function to get the engine for an indicator table, building it at most once per key
+def get_engine(key, frame, indicators, id_column=STATE_COLUMN):
+    with _lock:
+        if key not in _engines:
+            _engines[key] = AllocationEngine(frame, indicators, id_column)
+        _engines.move_to_end(key)
+        while len(_engines) > MAX_ENGINES:
+            _engines.popitem(last=False)
+        return _engines[key]
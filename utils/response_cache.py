@@ -0,0 +1,197 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from utils.data_loader import CACHE_DIR
+from utils.instrumentation import register_cache
+
+CHAT_CACHE_PATH = os.path.join(CACHE_DIR, "chat_responses.sqlite3")
+SIMILARITY_THRESHOLD = float(os.environ.get("SEDVT_CHAT_CACHE_THRESHOLD", "0.85"))
+TTL_SECONDS = float(os.environ.get("SEDVT_CHAT_CACHE_TTL", str(7 * 24 * 3600)))
+MAX_ENTRIES = int(os.environ.get("SEDVT_CHAT_CACHE_SIZE", "2000"))
+# New prompts are added to the similarity index in place; it is refitted once this share
+# of its rows has been added or evicted since the last fit
+REBUILD_FRACTION = 0.25
+
+
+# Function to normalize a prompt so trivial differences map to the same key
+def normalize_prompt(prompt):
+    prompt = re.sub(r"[^\w\s]", " ", prompt.lower())
+    return " ".join(prompt.split())
+
+
+# Function to get the entities (regions, indicators, years) a prompt names
+def prompt_entities(prompt):
+    from utils.data_questions import question_entities
+
+    return question_entities(prompt)
+
+
+# Character n-gram TF-IDF index over the cached prompts. Prompts are only compared with
+# prompts naming the same entities, so "poverty in Bihar" never matches "poverty in Kerala".
+class SimilarityIndex:
+    def __init__(self, rows, entities):
+        from sklearn.feature_extraction.text import TfidfVectorizer  # Deferred until the first lookup
+
+        self.entities = entities
+        self.keys = [key for key, _ in rows]
+        self.groups = [entities(prompt) for _, prompt in rows]
+        self.positions = {key: i for i, key in enumerate(self.keys)}
+        self.alive = [True] * len(rows)
+        self.changes = 0
+        self.vectorizer = TfidfVectorizer(analyzer="char_wb", ngram_range=(3, 5))
+        self.matrix = self.vectorizer.fit_transform([prompt for _, prompt in rows]) if rows else None
+
+    def stale(self):
+        return self.matrix is None or self.changes > REBUILD_FRACTION * len(self.keys)
+
+    # Function to add a prompt using the vocabulary of the last fit
+    def add(self, key, prompt):
+        from scipy.sparse import vstack
+
+        if key in self.positions:
+            self.alive[self.positions[key]] = True
+            return
+        self.positions[key] = len(self.keys)
+        self.keys.append(key)
+        self.groups.append(self.entities(prompt))
+        self.alive.append(True)
+        self.matrix = vstack([self.matrix, self.vectorizer.transform([prompt])], format="csr")
+        self.changes += 1
+
+    def remove(self, keys):
+        for key in keys:
+            if key in self.positions and self.alive[self.positions[key]]:
+                self.alive[self.positions[key]] = False
+                self.changes += 1
+
+    # Function to get the key of the most similar live prompt naming the same entities
+    def best(self, prompt, threshold):
+        if self.matrix is None:
+            return None
+        group = self.entities(prompt)
+        scores = (self.matrix @ self.vectorizer.transform([prompt]).T).toarray().ravel()
+        candidates = [i for i, (alive, other) in enumerate(zip(self.alive, self.groups)) if alive and other == group]
+        if not candidates:
+            return None
+        best = max(candidates, key=scores.__getitem__)
+        return self.keys[best] if scores[best] >= threshold else None
+
+
+# Cache of chatbot answers: exact matches come from an SQLite table on disk, near
+# duplicates from a SimilarityIndex over the cached prompts.
+class ResponseCache:
+    def __init__(self, path=CHAT_CACHE_PATH, threshold=SIMILARITY_THRESHOLD,
+                 ttl=TTL_SECONDS, max_entries=MAX_ENTRIES, entities=prompt_entities):
+        self.path = path
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entities = entities
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index = None
+        register_cache("chat_responses", lambda: {"hits": self.exact_hits + self.similar_hits, "misses": self.misses})
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, prompt TEXT, response TEXT, created REAL, last_used REAL)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def _key(normalized):
+        return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+    # Function to delete expired and least recently used entries, returning their keys
+    def _evict(self, now):
+        keys = [key for key, in self._db.execute(
+            "SELECT key FROM responses WHERE created < ? UNION "
+            "SELECT key FROM (SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (now - self.ttl, self.max_entries),
+        )]
+        self._db.executemany("DELETE FROM responses WHERE key = ?", [(key,) for key in keys])
+        return keys
+
+    def _similar_key(self, normalized):
+        if self._index is None or self._index.stale():
+            rows = self._db.execute("SELECT key, prompt FROM responses").fetchall()
+            self._index = SimilarityIndex(rows, self.entities)
+        return self._index.best(normalized, self.threshold)
+
+    # Function to find a cached response for a prompt, or None on a miss
+    def lookup(self, prompt):
+        normalized = normalize_prompt(prompt)
+        now = time.time()
+        with self._lock:
+            key = self._key(normalized)
+            row = self._db.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            exact = row is not None and row[1] >= now - self.ttl
+            if not exact:
+                key = self._similar_key(normalized)
+                row = None
+                if key is not None:
+                    row = self._db.execute(
+                        "SELECT response, created FROM responses WHERE key = ?", (key,)
+                    ).fetchone()
+                if row is None or row[1] < now - self.ttl:
+                    self.misses += 1
+                    return None
+
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            if exact:
+                self.exact_hits += 1
+            else:
+                self.similar_hits += 1
+            return row[0]
+
+    # Function to store a response, evicting expired and least recently used entries
+    def store(self, prompt, response):
+        normalized = normalize_prompt(prompt)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, prompt, response, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (self._key(normalized), normalized, response, now, now),
+            )
+            removed = self._evict(now)
+            self._db.commit()
+            if self._index is not None and not self._index.stale():
+                self._index.add(self._key(normalized), normalized)
+                self._index.remove(removed)
+
+    # Function to get hit/miss counters for monitoring
+    def stats(self):
+        with self._lock:
+            lookups = self.exact_hits + self.similar_hits + self.misses
+            size = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": (self.exact_hits + self.similar_hits) / lookups if lookups else 0.0,
+            "entries": size,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+# Function to get the process-wide response cache
+def get_response_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import STATE_COLUMN
+from utils.model_registry import FEATURES_2021, predict
+
+
+# Function to check an uploaded/assembled scenario table has every model input
+def validate_scenarios(scenarios):
+    missing = [col for col in FEATURES_2021 if col not in scenarios.columns]
+    if missing:
+        raise ValueError(f"Scenarios are missing required columns: {', '.join(missing)}")
+    inputs = scenarios[FEATURES_2021].apply(pd.to_numeric, errors="coerce")
+    if inputs.isna().any().any():
+        raise ValueError("Scenario inputs must all be numeric and non-empty")
+    scenarios = scenarios.copy()
+    scenarios[FEATURES_2021] = inputs
+    return scenarios
+
+
+# Function to read scenarios from a CSV file or file-like object
+def read_scenarios(source):
+    return validate_scenarios(pd.read_csv(source, encoding="utf-8-sig"))
+
+
+# Function to expand every selected state into a literacy x unemployment grid
+def expand_grid(df, literacy_values, unemployment_values, states=None):
+    base = df if states is None else df[df[STATE_COLUMN].isin(states)]
+    base = base[[STATE_COLUMN, '2001-Poverty', '2011-Poverty']].astype({STATE_COLUMN: str})
+
+    literacy, unemployment = np.meshgrid(
+        np.asarray(literacy_values, dtype=np.float64),
+        np.asarray(unemployment_values, dtype=np.float64),
+        indexing="ij",
+    )
+    grid = pd.DataFrame({'2011-LIT': literacy.ravel(), '2011-UNEMP': unemployment.ravel()})
+    return base.merge(grid, how="cross")
+
+
+# Function to score all scenarios with both chained models in one vectorized pass
+def score_scenarios(models, scenarios):
+    scenarios = validate_scenarios(scenarios).reset_index(drop=True)
+    return pd.concat([scenarios, predict(models, scenarios)], axis=1)
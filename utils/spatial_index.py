@@ -0,0 +1,223 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import STATE_COLUMN, load_coordinates
+from utils.instrumentation import span
+
+# Viewports are (south, west, north, east) in degrees
+INDIA_BOUNDS = (6.0, 68.0, 37.5, 98.0)
+GRID_DEGREES = 0.25  # Cell size of the point index
+TILE_PIXELS = 256
+CLUSTER_PIXELS = 60  # Points closer than this on screen are merged into one cluster
+MAX_CLUSTER_ZOOM = 11  # From this zoom on, every point is shown on its own
+MIN_CLUSTER_POINTS = 500  # Smaller datasets (e.g. the 32 states) are never clustered
+MAX_FEATURES = 2000  # Upper bound on what is sent to the browser for one view
+MAX_INDEXES = 4  # (version, boundaries) indexes kept in memory, least recently used dropped first
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+# Function to read the viewport from the bounds returned by st_folium
+def parse_bounds(bounds):
+    try:
+        south_west, north_east = bounds["_southWest"], bounds["_northEast"]
+        return (south_west["lat"], south_west["lng"], north_east["lat"], north_east["lng"])
+    except (KeyError, TypeError):
+        return INDIA_BOUNDS
+
+
+# Function to widen a viewport to whole grid cells, so that views differing by a small pan
+# share one cached layer
+def snap_bounds(bounds, cell_degrees=GRID_DEGREES):
+    south, west, north, east = bounds
+    return (
+        float(np.floor(south / cell_degrees) * cell_degrees),
+        float(np.floor(west / cell_degrees) * cell_degrees),
+        float(np.ceil(north / cell_degrees) * cell_degrees),
+        float(np.ceil(east / cell_degrees) * cell_degrees),
+    )
+
+
+# Function to get the (south, west, north, east) box of a GeoJSON geometry
+def geometry_bounds(geometry):
+    coords = np.array(list(_flatten(geometry["coordinates"])), dtype=np.float64).reshape(-1, 2)
+    return (coords[:, 1].min(), coords[:, 0].min(), coords[:, 1].max(), coords[:, 0].max())
+
+
+def _flatten(coords):
+    if coords and isinstance(coords[0], (int, float)):
+        yield from coords[:2]
+        return
+    for item in coords:
+        yield from _flatten(item)
+
+
+# Function to give every point the id of the grid cell it falls in, as one int64 per point
+def cell_ids(lats, lons, cell_degrees):
+    cell_x = np.floor(lons / cell_degrees).astype(np.int64)
+    cell_y = np.floor(lats / cell_degrees).astype(np.int64)
+    return (cell_x << 32) + (cell_y + (1 << 31))  # y is offset so it never borrows from x
+
+
+# Uniform grid over points: the points are sorted by cell, so a viewport query only looks
+# at the points of the cells it overlaps
+class PointIndex:
+    def __init__(self, lats, lons, cell_degrees=GRID_DEGREES):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.cell_degrees = cell_degrees
+        ids = cell_ids(self.lats, self.lons, cell_degrees)
+        self.order = np.argsort(ids, kind="stable")
+        cells, self.starts, counts = np.unique(ids[self.order], return_index=True, return_counts=True)
+        self.cell_x, self.cell_y = cells >> 32, (cells & 0xFFFFFFFF) - (1 << 31)
+        self.ends = self.starts + counts
+
+    def __len__(self):
+        return len(self.lats)
+
+    # Function to get the indices of the points inside a viewport
+    def query(self, bounds):
+        south, west, north, east = bounds
+        size = self.cell_degrees
+        cells = np.flatnonzero(
+            (self.cell_x >= np.floor(west / size)) & (self.cell_x <= np.floor(east / size))
+            & (self.cell_y >= np.floor(south / size)) & (self.cell_y <= np.floor(north / size))
+        )
+        if len(cells) == 0:
+            return np.empty(0, dtype=np.int64)
+        candidates = np.concatenate([self.order[self.starts[c]:self.ends[c]] for c in cells])
+        inside = (
+            (self.lats[candidates] >= south) & (self.lats[candidates] <= north)
+            & (self.lons[candidates] >= west) & (self.lons[candidates] <= east)
+        )
+        return np.sort(candidates[inside])
+
+
+# Bounding boxes of polygon features; a viewport query keeps the boxes it overlaps
+class BoxIndex:
+    def __init__(self, boxes):
+        self.boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def query(self, bounds):
+        south, west, north, east = bounds
+        b = self.boxes
+        return np.flatnonzero((b[:, 0] <= north) & (b[:, 2] >= south) & (b[:, 1] <= east) & (b[:, 3] >= west))
+
+
+# Function to get the grid cell size (in degrees) used for clustering at a zoom level
+def cluster_degrees(zoom):
+    return CLUSTER_PIXELS * 360.0 / (TILE_PIXELS * 2 ** zoom)
+
+
+# Regions of one dataset version with their positions, a point index and per-zoom
+# clusters. The clusters are built once per zoom level over the whole dataset, so panning
+# only filters them and the same points always end up in the same cluster.
+class SpatialIndex:
+    def __init__(self, rows, names, lats, lons, polygons=None):
+        self.rows = np.asarray(rows, dtype=np.int64)  # Dataset row of every located region
+        self.names = np.asarray(names, dtype=object)
+        self.points = PointIndex(lats, lons)
+        self.polygons = polygons  # (features, names, dataset rows, BoxIndex) when boundaries are used
+        self._clusters = {}
+        self._lock = threading.Lock()
+
+    # Function to assign every region to a cluster at one zoom level
+    def clusters(self, zoom):
+        with self._lock:
+            if zoom not in self._clusters:
+                ids = cell_ids(self.points.lats, self.points.lons, cluster_degrees(zoom))
+                _, first, inverse, counts = np.unique(ids, return_index=True, return_inverse=True, return_counts=True)
+                lats = np.bincount(inverse, weights=self.points.lats) / counts
+                lons = np.bincount(inverse, weights=self.points.lons) / counts
+                self._clusters[zoom] = (inverse, counts, first, lats, lons)
+            return self._clusters[zoom]
+
+    # Function to get the aggregated features inside a viewport: one row per cluster (or
+    # per region once zoomed in), with the mean value of the regions it holds
+    def visible_points(self, values, bounds, zoom):
+        values = np.asarray(values, dtype=np.float64)[self.rows]
+        if zoom >= MAX_CLUSTER_ZOOM or len(self.points) <= MIN_CLUSTER_POINTS:
+            rows = self.points.query(bounds)
+            return pd.DataFrame({
+                "name": self.names[rows],
+                "lat": self.points.lats[rows],
+                "lon": self.points.lons[rows],
+                "count": 1,
+                "value": values[rows],
+            })
+
+        inverse, counts, first, lats, lons = self.clusters(zoom)
+        means = np.bincount(inverse, weights=values) / counts
+        south, west, north, east = bounds
+        shown = np.flatnonzero((lats >= south) & (lats <= north) & (lons >= west) & (lons <= east))
+        names = np.where(counts[shown] == 1, self.names[first[shown]], [f"{n:,} regions" for n in counts[shown]])
+        return pd.DataFrame({
+            "name": names,
+            "lat": lats[shown],
+            "lon": lons[shown],
+            "count": counts[shown],
+            "value": means[shown],
+        })
+
+    # Function to get the polygon features inside a viewport, or None when there are too many
+    # to ship (the caller then falls back to clustered points)
+    def visible_polygons(self, values, bounds):
+        if self.polygons is None:
+            return None
+        features, names, rows, boxes = self.polygons
+        hits = boxes.query(bounds)
+        if len(hits) > MAX_FEATURES:
+            return None
+        values = np.asarray(values, dtype=np.float64)
+        return [(features[i], names[i], values[rows[i]]) for i in hits]
+
+
+# Function to build the spatial index of a dataset: positions come from the dataset's own
+# coordinates, the built-in state coordinates, or the centres of the boundary polygons
+def build_spatial_index(df, boundaries=None):
+    from utils.map_engine import BOUNDARIES_KEY, STATE_COORDINATES
+
+    names = df[STATE_COLUMN].astype(str).to_numpy()
+    coordinates = {**STATE_COORDINATES, **load_coordinates()}
+    polygons = None
+
+    if boundaries is not None:
+        positions = {name: i for i, name in enumerate(names)}
+        features, feature_names, feature_rows, boxes = [], [], [], []
+        for feature in boundaries["features"]:
+            name = feature["properties"].get(BOUNDARIES_KEY)
+            if name not in positions:
+                continue
+            south, west, north, east = geometry_bounds(feature["geometry"])
+            features.append(feature)
+            feature_names.append(name)
+            feature_rows.append(positions[name])
+            boxes.append((south, west, north, east))
+            coordinates.setdefault(name, [(south + north) / 2, (west + east) / 2])
+        polygons = (features, feature_names, np.array(feature_rows, dtype=np.int64), BoxIndex(boxes))
+
+    # Regions without a position are left out of the point index
+    rows = [i for i, name in enumerate(names) if name in coordinates]
+    lats = [coordinates[names[i]][0] for i in rows]
+    lons = [coordinates[names[i]][1] for i in rows]
+    return SpatialIndex(rows, names[rows], lats, lons, polygons)
+
+
+# Function to get the spatial index for a dataset version, building it at most once
+def get_spatial_index(df, version, boundaries=None):
+    key = (version, boundaries is not None)
+    with _lock:
+        if key not in _indexes:
+            with span("map.spatial_index"):
+                _indexes[key] = build_spatial_index(df, boundaries)
+        _indexes.move_to_end(key)
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+        return _indexes[key]
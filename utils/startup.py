@@ -0,0 +1,104 @@
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.environ.get("SEDVT_WARMUP", "1") == "1"
+
+# Heavy modules used by the pages, imported in the background while the Home page is shown
+WARMUP_MODULES = [
+    "numpy",
+    "pandas",
+    "pyarrow",
+    "matplotlib.figure",
+    "seaborn",
+    "sklearn.linear_model",
+    "sklearn.preprocessing",
+    "sklearn.pipeline",
+    "sklearn.model_selection",
+    "sklearn.metrics",
+    "sklearn.feature_extraction.text",
+    "folium",
+    "requests",
+]
+
+_import_times = {}
+_preload_times = {}
+_warmup_thread = None
+_warmup_lock = threading.Lock()
+
+
+# Function to import a module and record how long it took (0 if it was already loaded)
+def timed_import(name):
+    already_loaded = name in sys.modules
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    if not already_loaded:
+        _import_times[name] = time.perf_counter() - start
+        logger.info("Imported %s in %.1f ms", name, _import_times[name] * 1000)
+    return module
+
+
+def _timed_preload(name, load):
+    start = time.perf_counter()
+    try:
+        load()
+    except Exception:
+        logger.exception("Warm-up step %s failed", name)
+        return
+    _preload_times[name] = time.perf_counter() - start
+    logger.info("Preloaded %s in %.1f ms", name, _preload_times[name] * 1000)
+
+
+# Import heavy modules and build the shared data, models, statistics and map artifacts
+def _warmup():
+    for name in WARMUP_MODULES:
+        try:
+            timed_import(name)
+        except ImportError:
+            logger.warning("Warm-up could not import %s", name)
+
+    from utils.data_loader import data_version, load_dataset
+    from utils.forecasting import get_forecasts
+    from utils.map_engine import load_boundaries
+    from utils.spatial_index import get_spatial_index
+    from utils.model_registry import get_models
+    from utils.statistics import get_stats
+
+    _timed_preload("dataset", load_dataset)
+    # Every later step needs the dataset: without it there is nothing left to warm up
+    try:
+        df = load_dataset()
+        version = data_version()
+    except Exception:
+        logger.exception("Warm-up stopped: the dataset could not be loaded")
+        return
+    _timed_preload("models", lambda: get_models(df, version))
+    _timed_preload("statistics", lambda: get_stats(df, version))
+    _timed_preload("forecasts", lambda: get_forecasts(df, version))
+    _timed_preload("maps", lambda: get_spatial_index(df, version, load_boundaries()))
+
+
+# Function to start the background warm-up once per process
+def start_warmup():
+    global _warmup_thread
+    if not WARMUP_ENABLED:
+        return None
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=_warmup, name="sedvt-warmup", daemon=True)
+            _warmup_thread.start()
+    return _warmup_thread
+
+
+# Function to get recorded import and preload timings in seconds, slowest first
+def startup_report():
+    return {
+        "imports": dict(sorted(_import_times.items(), key=lambda item: item[1], reverse=True)),
+        "preloads": dict(_preload_times),
+        "done": _warmup_thread is not None and not _warmup_thread.is_alive(),
+    }
@@ -0,0 +1,145 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.instrumentation import span
+
+HIST_BINS = 20
+KDE_BINS = 256
+KDE_POINTS = 200
+MAX_VERSIONS = 4  # Dataset versions whose statistics stay in memory
+
+_stats = OrderedDict()
+_lock = threading.Lock()
+
+
+# Summary statistics, correlation and histogram/KDE inputs for the numeric columns of a
+# dataset. Everything is built from mergeable pieces (counts, means, co-moments, sorted
+# values, bin counts), so appended rows are folded in without rescanning the old ones.
+class DatasetStats:
+    def __init__(self, columns, n, mean, comoment, sorted_values):
+        self.columns = list(columns)
+        self.n = n
+        self.mean = mean
+        self.comoment = comoment
+        self.sorted_values = sorted_values
+        self._hist = {}
+        self._fine = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        numeric_df = df.select_dtypes(include=[np.number])
+        values = numeric_df.to_numpy(dtype=np.float64)
+        mean = values.mean(axis=0)
+        centered = values - mean
+        stats = cls(numeric_df.columns, len(values), mean, centered.T @ centered, np.sort(values, axis=0))
+        for i, column in enumerate(stats.columns):
+            stats._hist[column] = cls._bin(stats.sorted_values[:, i], HIST_BINS)
+            stats._fine[column] = cls._bin(stats.sorted_values[:, i], KDE_BINS)
+        return stats
+
+    @staticmethod
+    def _bin(values, bins):
+        counts, edges = np.histogram(values, bins=bins)
+        return edges, counts
+
+    # Function to fold new rows into a copy of these statistics
+    def append(self, rows):
+        values = rows[self.columns].to_numpy(dtype=np.float64)
+        if len(values) == 0:
+            return self
+
+        n_new = len(values)
+        mean_new = values.mean(axis=0)
+        centered = values - mean_new
+        n = self.n + n_new
+        delta = mean_new - self.mean
+        mean = self.mean + delta * n_new / n
+        comoment = self.comoment + centered.T @ centered + np.outer(delta, delta) * self.n * n_new / n
+
+        new_sorted = np.sort(values, axis=0)
+        merged = np.empty((n, len(self.columns)))
+        for i in range(len(self.columns)):
+            merged[:, i] = np.insert(
+                self.sorted_values[:, i],
+                np.searchsorted(self.sorted_values[:, i], new_sorted[:, i]),
+                new_sorted[:, i],
+            )
+
+        stats = DatasetStats(self.columns, n, mean, comoment, merged)
+        for i, column in enumerate(self.columns):
+            old_min, old_max = self.sorted_values[0, i], self.sorted_values[-1, i]
+            inside = new_sorted[0, i] >= old_min and new_sorted[-1, i] <= old_max
+            for target, source, bins in ((stats._hist, self._hist, HIST_BINS), (stats._fine, self._fine, KDE_BINS)):
+                if inside:
+                    edges, counts = source[column]
+                    target[column] = (edges, counts + np.histogram(new_sorted[:, i], bins=edges)[0])
+                else:
+                    target[column] = self._bin(merged[:, i], bins)
+        return stats
+
+    # Function to get the same table as DataFrame.describe() for the numeric columns
+    def describe(self):
+        std = np.sqrt(np.diag(self.comoment) / (self.n - 1)) if self.n > 1 else np.full(len(self.columns), np.nan)
+        quantiles = np.quantile(self.sorted_values, [0.25, 0.5, 0.75], axis=0)
+        return pd.DataFrame(
+            [
+                np.full(len(self.columns), float(self.n)),
+                self.mean,
+                std,
+                self.sorted_values[0],
+                *quantiles,
+                self.sorted_values[-1],
+            ],
+            index=["count", "mean", "std", "min", "25%", "50%", "75%", "max"],
+            columns=self.columns,
+        )
+
+    # Function to get the Pearson correlation matrix
+    def corr(self):
+        scale = np.sqrt(np.diag(self.comoment))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = self.comoment / np.outer(scale, scale)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    # Function to get the bin edges and counts of a column's histogram
+    def histogram(self, column):
+        return self._hist[column]
+
+    # Function to get a Gaussian KDE (Scott's rule) scaled to histogram counts
+    def kde(self, column, points=KDE_POINTS):
+        i = self.columns.index(column)
+        std = np.sqrt(self.comoment[i, i] / max(self.n - 1, 1))
+        bandwidth = std * self.n ** (-1 / 5) or 1.0
+        edges, counts = self._fine[column]
+        centers = (edges[:-1] + edges[1:]) / 2
+        grid = np.linspace(edges[0] - 3 * bandwidth, edges[-1] + 3 * bandwidth, points)
+        weights = np.exp(-0.5 * ((grid[:, None] - centers[None, :]) / bandwidth) ** 2)
+        density = weights @ counts / (self.n * bandwidth * np.sqrt(2 * np.pi))
+        hist_edges = self._hist[column][0]
+        return grid, density * self.n * (hist_edges[1] - hist_edges[0])
+
+
+# Function to get the statistics for a dataset version, computing them at most once
+def get_stats(df, version):
+    with _lock:
+        if version not in _stats:
+            with span("stats.build"):
+                _remember(version, DatasetStats.from_frame(df))
+        _stats.move_to_end(version)
+        return _stats[version]
+
+
+# Function to register statistics for a new version built by appending rows to an old one
+def append_stats(version, rows, new_version):
+    with _lock:
+        return _remember(new_version, _stats[version].append(rows))
+
+
+def _remember(version, stats):
+    _stats[version] = stats
+    while len(_stats) > MAX_VERSIONS:
+        _stats.popitem(last=False)
+    return stats
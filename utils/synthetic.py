@@ -0,0 +1,124 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import COORDINATE_COLUMNS, DATA_PATH, SCHEMA, STATE_COLUMN, apply_schema
+from utils.map_engine import STATE_COORDINATES
+
+# Row counts that roughly match India's administrative levels
+LEVELS = {"state": 32, "district": 750, "subdistrict": 6_000, "village": 600_000}
+CHUNK_ROWS = 100_000
+# How closely a generated region follows the profile of its state (0 = not at all, 1 = copy)
+STATE_AFFINITY = 0.8
+MAX_RADIUS_DEGREES = 2.0
+
+
+# Gaussian-copula model of the real dataset. Regions are drawn around the normal scores of
+# their state, and each column is mapped back through the real data's empirical quantiles,
+# so the generated marginals match the real ones and the rank correlations are preserved.
+class SyntheticModel:
+    def __init__(self, base, affinity=STATE_AFFINITY):
+        from scipy.special import ndtri
+
+        base = apply_schema(base)
+        values = base[list(SCHEMA)].to_numpy(dtype=np.float64)
+        n_rows = len(values)
+        self.columns = list(SCHEMA)
+        self.states = base[STATE_COLUMN].astype(str).to_numpy()
+        self.affinity = affinity
+
+        # Empirical quantile function of every column
+        self.sorted_values = np.sort(values, axis=0)
+        self.probs = (np.arange(n_rows) + 0.5) / n_rows
+
+        # Normal scores of each state and the correlation between them
+        ranks = values.argsort(axis=0).argsort(axis=0)
+        self.state_scores = ndtri((ranks + 0.5) / n_rows)
+        correlation = np.corrcoef(self.state_scores, rowvar=False)
+        eigenvalues, eigenvectors = np.linalg.eigh(correlation)
+        self.noise_factor = eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+
+        # Every state gets an equal share of regions: weighting by population would let the
+        # largest states dominate and visibly distort the correlations
+        self.weights = np.full(len(self.states), 1 / len(self.states))
+
+        # Regions are scattered around the state's centre, no further than halfway to the nearest other state
+        known = np.array([STATE_COORDINATES.get(state, [np.nan, np.nan]) for state in self.states], dtype=np.float64)
+        fallback = np.nanmean(known, axis=0)
+        self.centers = np.where(np.isnan(known), fallback, known)
+        distances = np.linalg.norm(self.centers[:, None, :] - self.centers[None, :, :], axis=2)
+        np.fill_diagonal(distances, np.inf)
+        self.radii = np.clip(distances.min(axis=1) / 2, 0.05, MAX_RADIUS_DEGREES)
+
+    # Function to map normal scores to uniforms under the state mixture, so that the
+    # empirical quantiles are hit exactly whatever the state weights are
+    def _mixture_cdf(self, scores):
+        from scipy.special import ndtr
+
+        spread = np.sqrt(1 - self.affinity ** 2)
+        uniforms = np.empty_like(scores)
+        for j in range(scores.shape[1]):
+            shifted = (scores[:, j, None] - self.affinity * self.state_scores[None, :, j]) / spread
+            uniforms[:, j] = ndtr(shifted) @ self.weights
+        return uniforms
+
+    # Function to generate one chunk of regions, numbered from `start`
+    def sample(self, rows, rng, start=0):
+        state_index = rng.choice(len(self.states), size=rows, p=self.weights)
+        noise = rng.standard_normal((rows, len(self.columns))) @ self.noise_factor.T
+        scores = self.affinity * self.state_scores[state_index] + np.sqrt(1 - self.affinity ** 2) * noise
+        uniforms = self._mixture_cdf(scores)
+
+        chunk = {
+            STATE_COLUMN: [f"{state} #{i}" for i, state in zip(range(start, start + rows), self.states[state_index])],
+            "State": self.states[state_index],
+        }
+        for j, column in enumerate(self.columns):
+            column_values = np.interp(uniforms[:, j], self.probs, self.sorted_values[:, j])
+            chunk[column] = np.round(column_values) if SCHEMA[column].startswith("int") else np.round(column_values, 2)
+
+        angle = rng.uniform(0, 2 * np.pi, rows)
+        radius = self.radii[state_index] * np.sqrt(rng.uniform(0, 1, rows))
+        centers = self.centers[state_index]
+        chunk[COORDINATE_COLUMNS[0]] = np.round(centers[:, 0] + radius * np.sin(angle), 5)
+        chunk[COORDINATE_COLUMNS[1]] = np.round(centers[:, 1] + radius * np.cos(angle), 5)
+        return pd.DataFrame(chunk).astype({column: SCHEMA[column] for column in self.columns})
+
+
+# Function to yield `rows` synthetic regions in chunks of at most `chunk_rows`
+def generate_chunks(rows, chunk_rows=CHUNK_ROWS, seed=0, base_path=DATA_PATH):
+    model = SyntheticModel(pd.read_csv(base_path, encoding="utf-8-sig"))
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, chunk_rows):
+        yield model.sample(min(chunk_rows, rows - start), rng, start=start)
+
+
+# Function to stream a synthetic dataset to a .csv or .parquet file. The file is written
+# under a temporary name and moved into place once complete.
+def write_dataset(path, rows, chunk_rows=CHUNK_ROWS, seed=0, base_path=DATA_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    writer = None
+    try:
+        for i, chunk in enumerate(generate_chunks(rows, chunk_rows, seed, base_path)):
+            if path.endswith(".parquet"):
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+            else:
+                chunk.to_csv(tmp_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        if writer is not None:
+            writer.close()
+            writer = None
+        os.replace(tmp_path, path)
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
@@ -1,32 +1,38 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
-
-# Sample data for demo
-states = ["Andhra Pradesh", "Maharashtra", "Uttar Pradesh", "Karnataka", "Tamil Nadu", "Rajasthan", "Gujarat", "Odisha", "West Bengal", "Kerala"]
-
-locations = {
-    "Andhra Pradesh": [(15.9129, 79.7400)],
-    "Maharashtra": [(19.7515, 75.7139)],
-    "Uttar Pradesh": [(26.8467, 80.9462)],
-    "Karnataka": [(15.3173, 75.7139)],
-    "Tamil Nadu": [(11.1271, 78.6569)],
-    "Rajasthan": [(27.0238, 74.2179)],
-    "Gujarat": [(22.2587, 71.1924)],
-    "Odisha": [(20.9517, 85.0985)],
-    "West Bengal": [(22.9868, 87.8550)],
-    "Kerala": [(10.8505, 76.2711)]
-}
-
-resource_data = pd.DataFrame({
-    'State': states,
-    'Population Density': [303, 365, 828, 319, 555, 200, 308, 269, 1029, 859],
-    'Literacy Rate': [67, 82, 67, 75, 80, 66, 78, 73, 77, 94],
-    'Average Income': [140000, 180000, 57000, 150000, 160000, 82000, 150000, 73000, 88000, 135000],
-    'Urbanization Rate': [35, 45, 28, 40, 48, 24, 42, 29, 31, 47],
-    'Unemployment Rate': [5, 4, 6, 5, 4, 5, 4, 6, 5, 3]
-})
+from utils.assistance_data import AID_DATA, LOCATIONS, RESOURCE_DATA, STATES, VOLUNTEER_COUNTS, VOLUNTEER_DATA
+from utils.charts import show_figure, vega_bar, vega_pie, vega_scatter
+from utils.data_loader import data_version, load_dataset
+from utils.resource_allocation import DATASET_INDICATORS, SAMPLE_INDICATORS, get_engine
+
+# Sample data for demo (built once per process)
+states = STATES
+locations = LOCATIONS
+resource_data = RESOURCE_DATA
+
+# Regions shown in the allocation table
+ALLOCATION_ROWS = 100
+
+
+# Allocation table in a fragment, so moving a weight only re-ranks the table
+@st.fragment
+def allocation_table():
+    st.markdown("#### Resource Allocation Ranking")
+    source = st.radio("Regions to rank:", ["Sample states", "Dataset regions"], horizontal=True)
+    if source == "Sample states":
+        engine = get_engine("sample", resource_data, SAMPLE_INDICATORS, id_column="State")
+    else:
+        engine = get_engine(("dataset", data_version()), load_dataset(), DATASET_INDICATORS)
+
+    st.write("Priority weights (how much each indicator counts towards a region's need):")
+    weights = {name: st.slider(f"{name} weight", 0, 100, 50, key=f"weight-{source}-{name}") for name in engine.indicators}
+    budget = st.number_input("Budget to allocate (₹ crore):", value=100.0, min_value=0.0, step=10.0)
+
+    allocation = engine.allocate(weights, budget, top=ALLOCATION_ROWS)
+    if len(engine) > ALLOCATION_ROWS:
+        st.caption(f"Top {ALLOCATION_ROWS} of {len(engine):,} regions by need.")
+    st.dataframe(allocation, hide_index=True)
+
 
 # Main App
 st.set_page_config(layout="wide")
@@ -56,10 +62,6 @@ with col2:
         # State selection
         selected_state = st.selectbox("Select a state:", states)
 
-        # Additional inputs
-        urbanization_rate = st.slider("Urbanization Rate (%)", 10, 100, 50)
-        unemployment_rate = st.slider("Unemployment Rate (%)", 1, 20, 5)
-
         # Displaying map for selected state
         map_data = pd.DataFrame({
             'lat': [locations[selected_state][0][0]],
@@ -71,18 +73,21 @@ with col2:
         st.dataframe(resource_data[resource_data['State'] == selected_state])
 
         # Bar chart for literacy rate and average income
-        fig, ax = plt.subplots()
-        resource_data.set_index('State')[['Literacy Rate', 'Average Income']].plot(kind='bar', ax=ax)
-        st.pyplot(fig)
+        show_figure(
+            "resource_bar",
+            resource_data[['State', 'Literacy Rate', 'Average Income']],
+            lambda ax: resource_data.set_index('State')[['Literacy Rate', 'Average Income']].plot(kind='bar', ax=ax),
+            figsize=(6.4, 4.8),
+            vega_spec=vega_bar('State', ['Literacy Rate', 'Average Income']),
+        )
+
+        # Rank all regions against the weights and split the budget by need
+        allocation_table()
 
     elif choice == "Aid Coordination":
         st.subheader("Connect with Relevant Aid Organizations")
 
-        aid_data = pd.DataFrame({
-            'Organization': ['NGO A', 'Government Program B', 'Charity C', 'NGO D', 'Charity E', 'Government Program F'],
-            'Contact': ['contact@ngoa.org', 'contact@govb.org', 'contact@charityc.org', 'contact@ngod.org', 'contact@charitye.org', 'contact@govf.org'],
-            'Programs Offered': [2, 3, 1, 2, 3, 2]
-        })
+        aid_data = AID_DATA
 
         # Search bar
         search_term = st.text_input("Search for an organization:")
@@ -93,18 +98,18 @@ with col2:
             st.dataframe(aid_data)
 
         # Pie chart for programs offered
-        fig, ax = plt.subplots()
-        aid_data.set_index('Organization')['Programs Offered'].plot(kind='pie', ax=ax)
-        st.pyplot(fig)
+        show_figure(
+            "aid_pie",
+            aid_data[['Organization', 'Programs Offered']],
+            lambda ax: aid_data.set_index('Organization')['Programs Offered'].plot(kind='pie', ax=ax),
+            figsize=(6.4, 4.8),
+            vega_spec=vega_pie('Organization', 'Programs Offered'),
+        )
 
     elif choice == "Volunteer Opportunities":
         st.subheader("Volunteer to Combat Poverty")
 
-        volunteer_data = pd.DataFrame({
-            'Opportunity': ['Teach children', 'Distribute food', 'Provide medical assistance', 'Clean-up drives', 'Skill development workshops', 'Agricultural assistance'],
-            'Location': ['Andhra Pradesh', 'Maharashtra', 'Uttar Pradesh', 'Karnataka', 'Tamil Nadu', 'Rajasthan'],
-            'Details': ['Teach subjects like Math, Science', 'Distribute food packets', 'Provide basic medical checkups', 'Organize community clean-up', 'Provide vocational training', 'Help with farming techniques']
-        })
+        volunteer_data = VOLUNTEER_DATA
 
         opportunity_type = st.selectbox("Filter by type:", ["All", "Teaching", "Medical", "Food Distribution"])
         if opportunity_type == "Teaching":
@@ -117,9 +122,14 @@ with col2:
             st.dataframe(volunteer_data)
 
         # Bar chart for opportunities by state
-        fig, ax = plt.subplots()
-        volunteer_data['Location'].value_counts().plot(kind='bar', ax=ax)
-        st.pyplot(fig)
+        location_counts = VOLUNTEER_COUNTS
+        show_figure(
+            "volunteer_bar",
+            location_counts,
+            lambda ax: location_counts.set_index('Location')['count'].plot(kind='bar', ax=ax),
+            figsize=(6.4, 4.8),
+            vega_spec=vega_bar('Location', ['count']),
+        )
 
     elif choice == "Unemployment Solutions":
         st.subheader("Solutions to Combat Unemployment")
@@ -141,10 +151,15 @@ with col2:
             st.write("Unemployment rate is under control, continue existing support strategies.")
 
         # Visualization of unemployment vs literacy rate
-        fig, ax = plt.subplots()
-        x = resource_data['Literacy Rate']
-        y = resource_data['Unemployment Rate']
-        ax.scatter(x, y)
-        ax.set_xlabel("Literacy Rate")
-        ax.set_ylabel("Unemployment Rate")
-        st.pyplot(fig)
+        def draw_literacy_vs_unemployment(ax):
+            ax.scatter(resource_data['Literacy Rate'], resource_data['Unemployment Rate'])
+            ax.set_xlabel("Literacy Rate")
+            ax.set_ylabel("Unemployment Rate")
+
+        show_figure(
+            "literacy_vs_unemployment",
+            resource_data[['Literacy Rate', 'Unemployment Rate']],
+            draw_literacy_vs_unemployment,
+            figsize=(6.4, 4.8),
+            vega_spec=vega_scatter('Literacy Rate', 'Unemployment Rate', color="steelblue"),
+        )
@@ -1,24 +1,20 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.preprocessing import PolynomialFeatures
-from sklearn.pipeline import make_pipeline
-from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, r2_score
+import streamlit.components.v1 as components
+from utils.anomaly import get_anomalies
+from utils.charts import show_figure, vega_bar, vega_box, vega_scatter
+from utils.data_loader import data_version, load_dataset
+from utils.forecasting import FORECAST_YEARS, REFERENCE_YEAR, get_forecasts, indicator_forecasts
+from utils.instrumentation import span
+from utils.map_engine import map_html
+from utils.model_registry import FEATURES_2021, get_models, predict
+from utils.scenarios import expand_grid, read_scenarios, score_scenarios
 
 st.set_page_config(layout="wide")
 
-# Load Dataset
-@st.cache_data
-def load_data():
-    df = pd.read_csv('data/data.csv')
-    df = df.dropna()  # Drop rows has no value
-    return df
-
-df = load_data()
+# Load Dataset (shared and read-only: predictions are kept in their own frame)
+df = load_dataset()
 
 st.title("Poverty Rate Prediction & Fraud Detection")
 st.divider()
@@ -28,71 +24,119 @@ st.subheader("📋 Data Overview")
 st.write(df)
 
 st.subheader("📊 Poverty Data for 2001 and 2011")
-fig, ax = plt.subplots(figsize=(10, 5))
-df.set_index('States_UnionTerritories')[['2001-Poverty', '2011-Poverty']].plot(kind='bar', ax=ax, color=['blue', 'red'])
-ax.set_ylabel("Poverty Rate (%)")
-st.pyplot(fig)
+poverty_df = df[['States_UnionTerritories', '2001-Poverty', '2011-Poverty']].astype({'States_UnionTerritories': str})
+
+
+def draw_poverty_bar(ax):
+    poverty_df.set_index('States_UnionTerritories').plot(kind='bar', ax=ax, color=['blue', 'red'])
+    ax.set_ylabel("Poverty Rate (%)")
+
+
+show_figure(
+    "poverty_bar",
+    poverty_df,
+    draw_poverty_bar,
+    figsize=(10, 5),
+    vega_spec=vega_bar('States_UnionTerritories', ['2001-Poverty', '2011-Poverty'], title="Poverty Rate (%)"),
+)
 
 # Feature Correlation
 st.subheader("🔍 Relationship Between Poverty & Other Socio-Economic Factors")
 features = ['2001-LIT', '2011-LIT', '2001-UNEMP', '2011-UNEMP']
-for feature in features:
-    fig, ax = plt.subplots(figsize=(6, 4))
-    sns.scatterplot(data=df, x=feature, y='2011-Poverty', ax=ax, color="teal")
-    ax.set_title(f"{feature} vs 2011 Poverty Rate")
-    st.pyplot(fig)
 
-# Model Training for Future Predictions
-st.subheader("🤖 Predictive Analytics")
-st.write("🔹 Training models to predict **2021 & 2031 Poverty Rates**")
 
-# Train Model for 2021
-X_2021 = df[['2001-Poverty', '2011-Poverty', '2011-LIT', '2011-UNEMP']]
-y_2021 = df['2011-Poverty']
+def draw_feature_scatter(feature):
+    def draw(ax):
+        import seaborn as sns
 
-X_train_2021, X_test_2021, y_train_2021, y_test_2021 = train_test_split(X_2021, y_2021, test_size=0.2, random_state=42)
+        sns.scatterplot(data=df, x=feature, y='2011-Poverty', ax=ax, color="teal")
+        ax.set_title(f"{feature} vs 2011 Poverty Rate")
+    return draw
 
-model_2021 = make_pipeline(PolynomialFeatures(degree=2), LinearRegression())
-model_2021.fit(X_train_2021, y_train_2021)
 
-df['Predicted 2021-Poverty'] = model_2021.predict(X_2021)
-
-# Train Model for 2031 using 2021 Predictions
-X_2031 = df[['2001-Poverty', '2011-Poverty', 'Predicted 2021-Poverty', '2011-LIT', '2011-UNEMP']]
-y_2031 = df['2011-Poverty']  # Using 2011 as a proxy for training (since we don't have 2021 actuals)
+for feature in features:
+    show_figure(
+        ("poverty_scatter", feature),
+        df[[feature, '2011-Poverty']],
+        draw_feature_scatter(feature),
+        figsize=(6, 4),
+        vega_spec=vega_scatter(feature, '2011-Poverty', title=f"{feature} vs 2011 Poverty Rate"),
+    )
 
-X_train_2031, X_test_2031, y_train_2031, y_test_2031 = train_test_split(X_2031, y_2031, test_size=0.2, random_state=42)
+# Model Training for Future Predictions
+st.subheader("🤖 Predictive Analytics")
+st.write("🔹 Training models to predict **2021 & 2031 Poverty Rates**")
 
-model_2031 = make_pipeline(PolynomialFeatures(degree=2), LinearRegression())
-model_2031.fit(X_train_2031, y_train_2031)
+# Models are trained once per dataset version and shared by all sessions
+models = get_models(df, data_version())
 
-df['Predicted 2031-Poverty'] = model_2031.predict(X_2031)
+predictions = predict(models, df)
 
-# st.write(df[['States_UnionTerritories', 'Predicted 2021-Poverty', 'Predicted 2031-Poverty']])
-st.write(df[['States_UnionTerritories', 'Predicted 2021-Poverty']])
+# st.write(pd.concat([df[['States_UnionTerritories']], predictions], axis=1))
+st.write(pd.concat([df[['States_UnionTerritories']], predictions[['Predicted 2021-Poverty']]], axis=1))
 
 # Model Performance
-y_pred_2021 = model_2021.predict(X_test_2021)
-y_pred_2031 = model_2031.predict(X_test_2031)
-
-mse_2021 = mean_squared_error(y_test_2021, y_pred_2021)
-r2_2021 = r2_score(y_test_2021, y_pred_2021)
-
-mse_2031 = mean_squared_error(y_test_2031, y_pred_2031)
-r2_2031 = r2_score(y_test_2031, y_pred_2031)
+metrics_2021 = models["metrics"]["2021"]
+metrics_2031 = models["metrics"]["2031"]
 
 st.write(f"✅ **Model Performance for 2021 Prediction:**")
-st.write(f"🔹 **MSE:** {mse_2021:.2f}, **R² Score:** {r2_2021:.4f}")
+st.write(f"🔹 **MSE:** {metrics_2021['mse']:.2f}, **R² Score:** {metrics_2021['r2']:.4f}")
 
 st.write(f"✅ **Model Performance for 2031 Prediction:**")
-st.write(f"🔹 **MSE:** {mse_2031:.2f}, **R² Score:** {r2_2031:.4f}")
+st.write(f"🔹 **MSE:** {metrics_2031['mse']:.2f}, **R² Score:** {metrics_2031['r2']:.4f}")
+
+# Per-region trends: one linear trend per region and indicator over all available vintages
+st.subheader("📈 Per-Region Trend Forecasts")
+st.write("🔹 Each region's own trend across every census vintage, projected to **2021 & 2031**")
+forecasts = get_forecasts(load_dataset(), data_version())
+trend_indicators = sorted(forecasts["indicator"].unique())
+trend_indicator = st.selectbox("Indicator:", trend_indicators, index=trend_indicators.index("Poverty"))
+trend_table = indicator_forecasts(forecasts, trend_indicator).rename(columns={
+    "vintages": "Vintages",
+    "slope_per_year": "Change per Year",
+    f"level_{REFERENCE_YEAR}": f"Trend {REFERENCE_YEAR}",
+    **{f"forecast_{year}": f"Forecast {year}" for year in FORECAST_YEARS},
+})
+st.dataframe(trend_table, hide_index=True)
+st.download_button(
+    "Download trend forecasts as CSV",
+    trend_table.to_csv(index=False).encode("utf-8"),
+    file_name=f"{trend_indicator.lower()}_trend_forecasts.csv",
+    mime="text/csv",
+)
 
 # Fraud Detection (Anomalies in Poverty Rates)
 st.subheader("⚠️ Fraud Detection - Unusual Poverty Rates")
-fig, ax = plt.subplots(figsize=(8, 4))
-sns.boxplot(df['2011-Poverty'], ax=ax, color="red")
-ax.set_title("Poverty Rate Distribution (2011)")
-st.pyplot(fig)
+
+
+def draw_poverty_box(ax):
+    import seaborn as sns
+
+    sns.boxplot(df['2011-Poverty'], ax=ax, color="red")
+    ax.set_title("Poverty Rate Distribution (2011)")
+
+
+show_figure(
+    "poverty_box",
+    df[['2011-Poverty']],
+    draw_poverty_box,
+    figsize=(8, 4),
+    vega_spec=vega_box('2011-Poverty', title="Poverty Rate Distribution (2011)"),
+)
+
+# Records ranked by robust z-scores, Isolation Forest and Local Outlier Factor across all indicators
+st.write("🔹 **Unusual records across all indicators** (income, literacy, population, sex ratio, unemployment, poverty and their 2001→2011 changes)")
+with span("view.anomalies", page="data_prediction"):
+    anomalies = get_anomalies(load_dataset(), data_version())
+    st.dataframe(
+        anomalies.style.apply(lambda row: ["background-color: #ffd6d6" if row["Flagged"] else ""] * len(row), axis=1),
+        hide_index=True,
+    )
+    components.html(
+        map_html(anomalies, data_version(), ["Anomaly Score"]),
+        width=700,
+        height=500,
+    )
 st.divider()
 
 # Custom Prediction
@@ -113,14 +157,59 @@ else:
     literacy_2011 = st.number_input("Enter 2011 Literacy Rate:", value=70.0, min_value=0.0, max_value=100.0)
     unemployment_2011 = st.number_input("Enter 2011 Unemployment Rate:", value=5.0, min_value=0.0, max_value=100.0)
 
-# input_data_2021 = np.array([[poverty_2001, poverty_2011, literacy_2011, unemployment_2011]])
-input_data_2021 = pd.DataFrame([[poverty_2001, poverty_2011, literacy_2011, unemployment_2011]], columns=['2001-Poverty', '2011-Poverty', '2011-LIT', '2011-UNEMP'])
-predicted_2021 = model_2021.predict(input_data_2021)
-
-# input_data_2031 = np.array([[poverty_2001, poverty_2011, predicted_2021[0], literacy_2011, unemployment_2011]])
-input_data_2031 = pd.DataFrame([[poverty_2001, poverty_2011, predicted_2021[0], literacy_2011, unemployment_2011]], columns=['2001-Poverty', '2011-Poverty', 'Predicted 2021-Poverty', '2011-LIT', '2011-UNEMP'])
-predicted_2031 = model_2031.predict(input_data_2031)
+input_data = pd.DataFrame([[poverty_2001, poverty_2011, literacy_2011, unemployment_2011]], columns=FEATURES_2021)
+predicted = predict(models, input_data)
+predicted_2021 = predicted['Predicted 2021-Poverty'].to_numpy()
+predicted_2031 = predicted['Predicted 2031-Poverty'].to_numpy()
 
 if st.button("Predict"):
     st.write(f"🔹 **Predicted 2021 Poverty Rate:** {predicted_2021[0]:.2f}%")
     st.write(f"🔹 **Predicted 2031 Poverty Rate:** {predicted_2031[0]:.2f}%")
+st.divider()
+
+# Batch Scenario Prediction
+st.subheader("Batch Scenario Prediction")
+st.write("Score many what-if scenarios at once, either from an uploaded CSV or a literacy/unemployment grid over the selected states.")
+
+batch_mode = st.radio("Scenario source:", ["Parameter grid", "Upload CSV"], horizontal=True)
+
+scenarios = None
+with st.form("batch_prediction"):
+    if batch_mode == "Upload CSV":
+        uploaded_file = st.file_uploader(f"CSV with columns: {', '.join(FEATURES_2021)}", type="csv")
+    else:
+        grid_states = st.multiselect("States/UTs (leave empty for all):", df["States_UnionTerritories"].astype(str))
+        lit_min, lit_max = st.slider("2011 Literacy Rate range:", 0.0, 100.0, (50.0, 95.0))
+        lit_step = st.number_input("Literacy step:", value=5.0, min_value=0.5, max_value=50.0)
+        unemp_min, unemp_max = st.slider("2011 Unemployment Rate range:", 0.0, 100.0, (0.0, 20.0))
+        unemp_step = st.number_input("Unemployment step:", value=2.0, min_value=0.5, max_value=50.0)
+    submitted = st.form_submit_button("Run batch prediction")
+
+if submitted:
+    try:
+        if batch_mode == "Upload CSV":
+            if uploaded_file is not None:
+                scenarios = read_scenarios(uploaded_file)
+            else:
+                st.warning("Please upload a CSV file first.")
+        else:
+            scenarios = expand_grid(
+                df,
+                np.arange(lit_min, lit_max + lit_step / 2, lit_step),
+                np.arange(unemp_min, unemp_max + unemp_step / 2, unemp_step),
+                states=grid_states or None,
+            )
+    except ValueError as e:
+        st.error(str(e))
+
+if scenarios is not None:
+    with span("scenarios.score"):
+        results = score_scenarios(models, scenarios)
+    st.write(f"✅ Scored **{len(results):,}** scenarios.")
+    st.dataframe(results)
+    st.download_button(
+        "Download results as CSV",
+        results.to_csv(index=False).encode("utf-8"),
+        file_name="poverty_scenarios.csv",
+        mime="text/csv",
+    )
@@ -1,11 +1,16 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_squared_error, r2_score
+from utils.charts import show_figure, vega_bar, vega_scatter
+from utils.data_loader import data_version, load_dataset
+from utils.ingestion import ingest_and_refresh
+from utils.instrumentation import span
+from utils.model_selection import TASKS, get_job, start_selection
+from utils.reports import FORMATS, get_export, start_export
+from utils.statistics import get_stats
 
 st.set_page_config(layout="wide")
 
@@ -13,101 +18,233 @@ st.title("Data Preprocessing, visualization and Model Evaluation")
 st.divider()
 
 # Load dataset
-@st.cache_data
-def load_data():
-    df = pd.read_csv("data/data.csv")
-    df = df.dropna()  # Drop rows has no value
-    return df
-
-df = load_data()
+df = load_dataset()
 
 # Display raw data
 st.subheader("📋 Raw Data")
 st.write(df)
 
+# Ingest new vintages or district-level files in long format
+with st.expander("📥 Ingest new data"):
+    st.write("Upload a long-format CSV with columns `region, indicator, vintage, value` (optional `level, parent`). "
+             "Indicators: INC, LIT, POP, SEX_RATIO, UNEMP, Poverty.")
+    with st.form("ingest_data", clear_on_submit=True):
+        uploaded_file = st.file_uploader("Long-format CSV", type="csv")
+        if st.form_submit_button("Ingest") and uploaded_file is not None:
+            try:
+                report = ingest_and_refresh(uploaded_file)
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                if report.skipped:
+                    st.info("Nothing to ingest: the file is empty or was already ingested.")
+                else:
+                    st.success(f"Ingested {report.rows:,} rows for vintages {', '.join(sorted(report.vintages))}.")
+                    for note in report.notes():
+                        st.warning(note)
+                    df = load_dataset()
+
+# Precomputed statistics for this dataset version
+version = data_version()
+stats = get_stats(df, version)
+
 # Display statistics
 st.subheader("📊 Data Statistics")
-st.write(df.describe())
+st.write(stats.describe())
+
+
+# Feature selection for visualization (a fragment, so changing it only redraws this chart)
+@st.fragment
+def data_distributions():
+    st.subheader("📈 Data Distributions")
+    selected_feature = st.selectbox("Select a feature to visualize:", stats.columns)
+    edges, counts = stats.histogram(selected_feature)
+    grid, density = stats.kde(selected_feature)
+
+    def draw(ax):
+        ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge", color="royalblue", alpha=0.75, edgecolor="white")
+        ax.plot(grid, density, color="royalblue")
+        ax.set_xlabel(selected_feature)
+        ax.set_ylabel("Count")
+
+    show_figure(("distribution", selected_feature), (version, selected_feature), draw)
 
-# Feature selection for visualization
-st.subheader("📈 Data Distributions")
-selected_feature = st.selectbox("Select a feature to visualize:", df.columns[1:])
-fig, ax = plt.subplots(figsize=(8, 5))
-sns.histplot(df[selected_feature], kde=True, bins=20, ax=ax, color="royalblue")
-st.pyplot(fig)
+
+data_distributions()
 
 # Correlation Heatmap
 st.subheader("📌 Feature Correlation Heatmap")
-numeric_df = df.select_dtypes(include=[np.number])
-corr = numeric_df.corr()
-
-fig, ax = plt.subplots(figsize=(10, 8))
-sns.heatmap(corr, annot=True, cmap="coolwarm", fmt=".2f", linewidths=0.5, ax=ax)
-st.pyplot(fig)
-
-# Train-Test Split
-st.subheader("⚙️ Data Preprocessing & Model Training")
-test_size = st.slider("Select Train-Test Split Ratio:", 0.1, 0.5, 0.2, 0.05)
-
-# Define Features & Target
-target_column = "2011-12-INC"  # Define prediction target
-X = df.drop(columns=["States_UnionTerritories", target_column])
-y = df[target_column]
-
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=42)
-st.write(f"✅ Data split completed: {100 * (1-test_size):.0f}% training, {100 * test_size:.0f}% testing.")
-
-# Train Model
-model = LinearRegression()
-model.fit(X_train, y_train)
-
-st.write("✅ Model trained successfully using **Linear Regression**.")
-
-# Feature Importance
-st.subheader("🔍 Feature Importance")
-feature_importance = pd.DataFrame({"Feature": X.columns, "Importance": model.coef_})
-feature_importance = feature_importance.sort_values(by="Importance", ascending=False)
-
-fig, ax = plt.subplots(figsize=(8, 5))
-sns.barplot(
-    data=feature_importance,
-    x="Importance",
-    y="Feature",
-    palette="coolwarm",
-    hue='Feature',
-    dodge=False,
-    ax=ax,
-    legend=False
-)
-st.pyplot(fig)
-
-# Model Evaluation
-st.subheader("📉 Model Evaluation")
-
-# Predictions
-y_pred = model.predict(X_test)
-
-mse = mean_squared_error(y_test, y_pred)
-r2 = r2_score(y_test, y_pred)
-
-st.write(f"🔹 **Mean Squared Error (MSE):** {mse:.2f}")
-st.write(f"🔹 **R² Score:** {r2:.4f} (Closer to 1 is better)")
-
-# Predictions vs Actual Values
-st.subheader("📊 Predictions vs Actual Values")
-fig, ax = plt.subplots(figsize=(7, 5))
-ax.scatter(y_test, y_pred, color="teal", alpha=0.6)
-ax.plot([y.min(), y.max()], [y.min(), y.max()], 'k--', lw=2)
-ax.set_xlabel("Actual Values")
-ax.set_ylabel("Predicted Values")
-ax.set_title("Actual vs Predicted Income Levels")
-st.pyplot(fig)
-
-# Error Distribution
-st.subheader("⚠️ Prediction Error Distribution")
-errors = y_test - y_pred
-fig, ax = plt.subplots(figsize=(8, 5))
-sns.histplot(errors, bins=20, kde=True, color="red", ax=ax)
-ax.set_xlabel("Prediction Error")
-ax.set_title("Error Distribution")
-st.pyplot(fig)
+corr = stats.corr()
+
+
+def draw_heatmap(ax):
+    import seaborn as sns
+
+    sns.heatmap(corr, annot=True, cmap="coolwarm", fmt=".2f", linewidths=0.5, ax=ax)
+
+
+show_figure("correlation_heatmap", corr, draw_heatmap, figsize=(10, 8))
+
+
+# Model training runs in a fragment, so moving the split slider does not redraw the charts above
+@st.fragment
+def model_training():
+    # Train-Test Split
+    st.subheader("⚙️ Data Preprocessing & Model Training")
+    test_size = st.slider("Select Train-Test Split Ratio:", 0.1, 0.5, 0.2, 0.05)
+
+    # Define Features & Target
+    target_column = "2011-12-INC"  # Define prediction target
+    X = df.drop(columns=["States_UnionTerritories", target_column])
+    y = df[target_column]
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=42)
+    st.write(f"✅ Data split completed: {100 * (1-test_size):.0f}% training, {100 * test_size:.0f}% testing.")
+
+    # Train Model
+    model = LinearRegression()
+    with span("model.fit", model="linear_regression"):
+        model.fit(X_train, y_train)
+
+    st.write("✅ Model trained successfully using **Linear Regression**.")
+
+    # Feature Importance
+    st.subheader("🔍 Feature Importance")
+    feature_importance = pd.DataFrame({"Feature": X.columns, "Importance": model.coef_})
+    feature_importance = feature_importance.sort_values(by="Importance", ascending=False)
+
+    def draw_feature_importance(ax):
+        import seaborn as sns
+
+        sns.barplot(
+            data=feature_importance,
+            x="Importance",
+            y="Feature",
+            palette="coolwarm",
+            hue='Feature',
+            dodge=False,
+            ax=ax,
+            legend=False
+        )
+
+    show_figure(
+        "feature_importance",
+        feature_importance,
+        draw_feature_importance,
+        vega_spec=vega_bar("Feature", ["Importance"], title="Importance", horizontal=True),
+    )
+
+    # Model Evaluation
+    st.subheader("📉 Model Evaluation")
+
+    # Predictions
+    y_pred = model.predict(X_test)
+
+    mse = mean_squared_error(y_test, y_pred)
+    r2 = r2_score(y_test, y_pred)
+
+    st.write(f"🔹 **Mean Squared Error (MSE):** {mse:.2f}")
+    st.write(f"🔹 **R² Score:** {r2:.4f} (Closer to 1 is better)")
+
+    # Predictions vs Actual Values
+    st.subheader("📊 Predictions vs Actual Values")
+    actual_vs_predicted = pd.DataFrame({"Actual Values": y_test.to_numpy(), "Predicted Values": y_pred})
+
+    def draw_actual_vs_predicted(ax):
+        ax.scatter(y_test, y_pred, color="teal", alpha=0.6)
+        ax.plot([y.min(), y.max()], [y.min(), y.max()], 'k--', lw=2)
+        ax.set_xlabel("Actual Values")
+        ax.set_ylabel("Predicted Values")
+        ax.set_title("Actual vs Predicted Income Levels")
+
+    show_figure(
+        ("actual_vs_predicted", float(y.min()), float(y.max())),
+        actual_vs_predicted,
+        draw_actual_vs_predicted,
+        figsize=(7, 5),
+        vega_spec=vega_scatter("Actual Values", "Predicted Values", title="Actual vs Predicted Income Levels"),
+    )
+
+    # Error Distribution
+    st.subheader("⚠️ Prediction Error Distribution")
+    errors = y_test - y_pred
+
+    def draw_errors(ax):
+        import seaborn as sns
+
+        sns.histplot(errors, bins=20, kde=True, color="red", ax=ax)
+        ax.set_xlabel("Prediction Error")
+        ax.set_title("Error Distribution")
+
+    show_figure("error_distribution", errors, draw_errors)
+
+
+model_training()
+
+# Cross-Validated Model Selection
+st.subheader("🏆 Model Selection (Cross-Validation)")
+st.write("Compares polynomial, ridge, lasso and tree-ensemble models with repeated k-fold cross-validation, using all CPU cores in the background.")
+
+task = st.selectbox("Select a prediction task:", list(TASKS))
+job = get_job(version, TASKS[task])
+
+if st.button("Run cross-validation"):
+    job = start_selection(df, version, TASKS[task])
+polling = job is not None and not job.done
+
+
+# Refreshes every 2 seconds while the job runs, then reruns the page once it finishes
+@st.fragment(run_every=2 if polling else None)
+def show_leaderboard():
+    current = get_job(version, TASKS[task])
+    if current is None:
+        st.info("Run cross-validation to build the leaderboard.")
+        return
+    if current.error is not None:
+        st.error(f"Cross-validation failed: {current.error}")
+    board = current.leaderboard()
+    if not current.done:
+        st.progress(len(board) / current.total, text=f"Evaluated {len(board)} of {current.total} models...")
+    st.dataframe(board, hide_index=True)
+    if current.done and polling:
+        st.rerun()
+
+
+show_leaderboard()
+
+# Bulk Report Export
+st.subheader("📦 Report Export")
+st.write("Exports a report (locator map, trend chart with forecasts, predictions and anomaly flags) for every region into one ZIP, rendered on all CPU cores. Regions whose data has not changed reuse their last rendering.")
+
+with st.form("report_export"):
+    report_formats = st.multiselect("Formats:", FORMATS, default=FORMATS)
+    report_regions = st.multiselect("Regions (leave empty for all):", df["States_UnionTerritories"].astype(str))
+    changed_only = st.checkbox("Only regions changed since the last export")
+    if st.form_submit_button("Export reports"):
+        st.session_state.report_export = start_export(report_formats, report_regions or None, changed_only)
+export = get_export(st.session_state.get("report_export"))
+export_running = export is not None and not export.done
+
+
+# Refreshes every 2 seconds while the export runs, then reruns the page once it finishes
+@st.fragment(run_every=2 if export_running else None)
+def show_export():
+    export = get_export(st.session_state.get("report_export"))
+    if export is None:
+        return
+    if not export.done:
+        st.progress(export.finished / max(export.total, 1),
+                    text=f"Exported {export.finished:,} of {export.total:,} regions...")
+        return
+    if export.error is not None:
+        st.error(f"Report export failed: {export.error}")
+    else:
+        st.write(f"✅ Exported **{export.total:,}** regions in {export.seconds:.1f}s "
+                 f"({export.rendered:,} rendered, {export.reused:,} reused, {export.skipped:,} unchanged).")
+        with open(export.path, "rb") as f:
+            st.download_button("Download reports (ZIP)", f, file_name="sedvt_reports.zip", mime="application/zip")
+    if export_running:
+        st.rerun()
+
+
+show_export()